@@ -0,0 +1,35 @@
+"""
+Compare parse cost of xml and json replies
+
+    python -m benchmarks.bench_parsers
+"""
+import json
+import timeit
+
+from benchmarks import fixtures
+from namesilo.parsers import JsonParser, XmlParser
+
+REPLIES = {
+    "listDomains (10k domains)": fixtures.list_domains,
+    "dnsListRecords (500 records)": fixtures.dns_list_records,
+    "getPrices (400 TLDs)": fixtures.get_prices,
+}
+
+PARSERS = {
+    "xml (xmltodict)": ("xml", XmlParser()),
+    "json (json)": ("json", JsonParser(loads=json.loads)),
+    "json (default)": ("json", JsonParser()),
+}
+
+
+def main(repeat: int = 20):
+    for reply_name, fixture in REPLIES.items():
+        print(reply_name)
+        for parser_name, (response_format, parser) in PARSERS.items():
+            content = fixture(response_format=response_format)
+            seconds = min(timeit.repeat(lambda: parser.parse(content), number=1, repeat=repeat))
+            print(f"  {parser_name:<18} {len(content) / 1024:8.1f} KiB {seconds * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Realistic NameSilo replies for benchmarks, in both xml and json format
+"""
+import json
+
+TLDS = [f"tld{index}" for index in range(400)]
+
+
+def _xml(operation: str, body: str) -> bytes:
+    return (
+        f'<?xml version="1.0"?><namesilo><request><operation>{operation}</operation>'
+        f'<ip>127.0.0.1</ip></request><reply><code>300</code><detail>success</detail>'
+        f'{body}</reply></namesilo>'
+    ).encode()
+
+
+def _json(operation: str, reply: dict) -> bytes:
+    reply = dict(code=300, detail="success", **reply)
+    return json.dumps({"request": {"operation": operation, "ip": "127.0.0.1"}, "reply": reply}).encode()
+
+
+def list_domains(count: int = 10000, response_format: str = "xml") -> bytes:
+    domains = [
+        {"domain": f"domain-{index}.com", "created": "2020-01-01", "expires": "2030-01-01"}
+        for index in range(count)
+    ]
+    if response_format == "json":
+        return _json("listDomains", {"domains": {"domain": domains}})
+    return _xml("listDomains", "<domains>" + "".join(
+        f'<domain created="{domain["created"]}" expires="{domain["expires"]}">{domain["domain"]}</domain>'
+        for domain in domains
+    ) + "</domains>")
+
+
+def dns_list_records(count: int = 500, response_format: str = "xml") -> bytes:
+    records = [
+        {
+            "record_id": f"{index:032x}",
+            "type": "A" if index % 5 else "MX",
+            "host": f"host-{index}.example.com",
+            "value": f"10.0.{index // 256}.{index % 256}",
+            "ttl": "7207",
+            "distance": "0" if index % 5 else "10",
+        }
+        for index in range(count)
+    ]
+    if response_format == "json":
+        return _json("dnsListRecords", {"resource_record": records})
+    return _xml("dnsListRecords", "".join(
+        "<resource_record>" + "".join(f"<{key}>{value}</{key}>" for key, value in record.items()) +
+        "</resource_record>" for record in records
+    ))
+
+
+def get_prices(response_format: str = "xml") -> bytes:
+    prices = {
+        tld: {"registration": "8.99", "transfer": "8.39", "renew": "1,008.99"}
+        for tld in TLDS
+    }
+    if response_format == "json":
+        return _json("getPrices", prices)
+    return _xml("getPrices", "".join(
+        f"<{tld}>" + "".join(f"<{key}>{value}</{key}>" for key, value in price.items()) + f"</{tld}>"
+        for tld, price in prices.items()
+    ))
+
+
+def domain_info(response_format: str = "xml") -> bytes:
+    reply = {
+        "created": "2020-01-01", "expires": "2030-01-01", "status": "Active", "locked": "Yes",
+        "private": "No", "auto_renew": "Yes", "traffic_type": "Custom DNS",
+        "email_verification_required": "No", "portfolio": "", "forward_url": "N/A", "forward_type": "N/A",
+        "contact_ids": {"registrant": "500", "administrative": "500", "technical": "500", "billing": "500"},
+    }
+    name_servers = [f"NS{index}.EXAMPLE.COM" for index in range(1, 5)]
+    if response_format == "json":
+        reply["nameservers"] = [
+            {"position": position, "nameserver": name_server} for position, name_server in enumerate(name_servers, 1)
+        ]
+        return _json("getDomainInfo", reply)
+    body = "".join(
+        f"<{key}>{value}</{key}>" if not isinstance(value, dict) else
+        f"<{key}>" + "".join(f"<{child}>{text}</{child}>" for child, text in value.items()) + f"</{key}>"
+        for key, value in reply.items()
+    )
+    body += "<nameservers>" + "".join(
+        f'<nameserver position="{position}">{name_server}</nameserver>'
+        for position, name_server in enumerate(name_servers, 1)
+    ) + "</nameservers>"
+    return _xml("getDomainInfo", body)
+
+
+def contact_list(count: int = 50, response_format: str = "xml") -> bytes:
+    contacts = [
+        {
+            "contact_id": str(index), "default_profile": "0", "nickname": f"Contact {index}",
+            "company": "Example Company", "first_name": "First", "last_name": f"Last {index}",
+            "address": f"Main Street {index}", "address2": "", "city": "Springfield", "state": "IL",
+            "zip": "62701", "country": "US", "email": f"contact-{index}@example.com",
+            "phone": "15555555555", "fax": "", "usnc": "", "usap": "", "calf": "", "caln": "",
+            "caag": "", "cawd": "",
+        }
+        for index in range(count)
+    ]
+    if response_format == "json":
+        return _json("contactList", {"contact": contacts})
+    return _xml("contactList", "".join(
+        "<contact>" + "".join(f"<{key}>{value}</{key}>" for key, value in contact.items()) + "</contact>"
+        for contact in contacts
+    ))
@@ -0,0 +1,242 @@
+"""
+Benchmark suite for request building, parsing and model conversion
+
+    python -m benchmarks.suite                       # run and save results
+    python -m benchmarks.suite --compare results.json
+
+Every benchmark reports CPU time per call and peak memory allocated
+during one call. Throughput benchmarks run the whole client against a
+stub transport, without sockets. Memory benchmarks report bytes kept
+alive per object for raw reply items and for models built from them. Results are saved as JSON in
+benchmarks/results so runs of different versions can be compared.
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+
+from benchmarks import fixtures
+from namesilo.common import DnsRecord, DomainInfo, LazyDomainInfo
+from namesilo.core import ContactModel, NameSilo
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def iter_content(self, chunk_size: int = 65536):
+        for index in range(0, len(self.content), chunk_size):
+            yield self.content[index:index + chunk_size]
+
+    def close(self):
+        pass
+
+
+class StubPool:
+    """Stands in for ConnectionPool, replies with canned bodies for each operation"""
+    pool_size = 16
+
+    def __init__(self, replies: dict):
+        self.replies = replies
+
+    def get(self, url: str, **kwargs) -> StubResponse:
+        operation = url.rsplit("/", 1)[-1].split("?", 1)[0]
+        return StubResponse(self.replies[operation])
+
+    def close(self):
+        pass
+
+
+def stub_client(response_format: str = "xml") -> NameSilo:
+    client = NameSilo("benchmark-token", response_format=response_format)
+    client._pool = StubPool({
+        "listDomains": fixtures.list_domains(response_format=response_format),
+        "dnsListRecords": fixtures.dns_list_records(response_format=response_format),
+        "getPrices": fixtures.get_prices(response_format=response_format),
+        "getDomainInfo": fixtures.domain_info(response_format=response_format),
+        "contactList": fixtures.contact_list(response_format=response_format),
+    })
+    return client
+
+
+def measure(func, repeat: int) -> dict:
+    func()
+    cpu_times = []
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        cpu_times.append(time.process_time() - started)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "cpu_ms_min": min(cpu_times) * 1000,
+        "cpu_ms_median": statistics.median(cpu_times) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def throughput(func, threads: int, duration: float) -> dict:
+    calls = [0] * threads
+    deadline = time.monotonic() + duration
+
+    def worker(index):
+        while time.monotonic() < deadline:
+            func()
+            calls[index] += 1
+
+    started = time.monotonic()
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return {"calls_per_second": sum(calls) / (time.monotonic() - started), "threads": threads}
+
+
+def cpu_benchmarks(response_format: str):
+    client = stub_client(response_format)
+    domain_info_reply = client._parser.parse(fixtures.domain_info(response_format=response_format))
+    contact = client._parser.parse(fixtures.contact_list(2, response_format))["namesilo"]["reply"]["contact"][0]
+    benchmarks = {
+        "request_building": lambda: [
+            client.get_domain_info.__wrapped__(client, f"domain-{index}.com").send(None)
+            for index in range(1000)
+        ],
+        "build_dns_add_record_x1000": lambda: [
+            client._dns_add_url("example.com", "TXT", f"host-{index}", "v=spf1 include:example.com ~all", 3600)
+            for index in range(1000)
+        ],
+        "parse_list_domains_10k": lambda: client._get_content_xml("listDomains?version=1"),
+        "parse_dns_list_records_500": lambda: client._get_content_xml("dnsListRecords?version=1"),
+        "parse_get_prices": lambda: client._get_content_xml("getPrices?version=1"),
+        "list_domains_10k": client.list_domains,
+        "list_dns_records_500": lambda: client.list_dns_records("example.com"),
+        "get_prices": client.get_prices,
+        "domain_info_model_x1000": lambda: [DomainInfo(domain_info_reply) for _ in range(1000)],
+        "lazy_domain_info_expires_x1000": lambda: [
+            LazyDomainInfo(domain_info_reply).expires for _ in range(1000)
+        ],
+        "convert_contact_model_x1000": lambda: [
+            ContactModel.convert_contact_model(contact) for _ in range(1000)
+        ],
+        "list_contacts_50": client.list_contacts,
+        "get_domain_info": lambda: client.get_domain_info("example.com"),
+    }
+    if response_format == "xml":
+        benchmarks["iter_domains_10k"] = lambda: sum(1 for _ in client.iter_domains())
+    return benchmarks
+
+
+def throughput_benchmarks(response_format: str, duration: float):
+    client = stub_client(response_format)
+    domains = [f"domain-{index}.com" for index in range(1000)]
+    return {
+        "get_domain_info_throughput": throughput(lambda: client.get_domain_info("example.com"), 8, duration),
+        "get_domains_info_1000": measure(
+            lambda: list(client.get_domains_info(domains)), 3
+        ),
+    }
+
+
+def retained(build) -> dict:
+    """
+    Memory kept alive by objects returned from build, per object
+    """
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes_per_object": current / len(objects), "objects": len(objects)}
+
+
+def memory_benchmarks(response_format: str):
+    client = stub_client(response_format)
+    records = client.list_dns_records("example.com")
+    domain_info_reply = client._parser.parse(fixtures.domain_info(response_format=response_format))
+    reply = domain_info_reply["namesilo"]["reply"]
+    return {
+        "dns_records_raw": retained(lambda: [dict(record) for record in records]),
+        "dns_records_model": retained(lambda: DnsRecord.process(records)),
+        "domains_raw": retained(client.list_domains),
+        "domains_model": retained(lambda: client.list_domains(models=True)),
+        "domain_info_raw": retained(lambda: [
+            {key: value for key, value in reply.items() if key not in ("code", "detail")} for _ in range(1000)
+        ]),
+        "domain_info_model": retained(lambda: [DomainInfo(domain_info_reply) for _ in range(1000)]),
+    }
+
+
+def run(response_formats=("xml", "json"), repeat: int = 10, duration: float = 2.0) -> dict:
+    results = {}
+    for response_format in response_formats:
+        for name, func in cpu_benchmarks(response_format).items():
+            results[f"{response_format}.{name}"] = measure(func, repeat)
+        for name, result in throughput_benchmarks(response_format, duration).items():
+            results[f"{response_format}.{name}"] = result
+        for name, result in memory_benchmarks(response_format).items():
+            results[f"{response_format}.{name}"] = result
+    return results
+
+
+def label() -> str:
+    try:
+        from importlib.metadata import version
+        return version("python-namesilo")
+    except Exception:
+        return "dev"
+
+
+def save(results: dict, name: str) -> str:
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIRECTORY, f"{name}-{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump({"label": name, "created": timestamp, "results": results}, results_file, indent=2)
+    return path
+
+
+def report(results: dict, baseline: dict = None):
+    for name, metrics in results.items():
+        line = [f"{name:<45}"]
+        for metric, value in metrics.items():
+            text = f"{metric}={value:.2f}" if isinstance(value, float) else f"{metric}={value}"
+            previous = (baseline or {}).get(name, {}).get(metric)
+            if isinstance(previous, (int, float)) and previous:
+                text += f" ({(value - previous) / previous * 100:+.1f}%)"
+            line.append(text)
+        print("  ".join(line))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="python-namesilo benchmark suite")
+    parser.add_argument("--format", choices=["xml", "json"], action="append", dest="formats")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds for throughput benchmarks")
+    parser.add_argument("--label", default=label(), help="name of saved results, package version by default")
+    parser.add_argument("--compare", help="results file to compare with")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    results = run(tuple(args.formats or ("xml", "json")), args.repeat, args.duration)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    report(results, baseline)
+    if not args.no_save:
+        print(f"Results saved to {save(results, args.label)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+import asyncio
+import functools
+import threading
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, List, Tuple
+
+from namesilo.exceptions import OperationSkipped
+
+__author__ = 'goran.vrbaski'
+
+
+class BatchOperation:
+    def __init__(self, method: str, *args, **kwargs):
+        """
+        Single client call queued in batch executor
+
+        Operations on the same domain run in order they were submitted.
+        Domain is taken from domain_name or domain keyword argument, or
+        from first positional argument when it is a string.
+
+        :param str method: Client method name, e.g. register_domain
+        :param args: Positional arguments of the method
+        :param kwargs: Keyword arguments of the method
+        """
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        domain = kwargs.get('domain_name', kwargs.get('domain'))
+        if domain is None and args and isinstance(args[0], str):
+            domain = args[0]
+        self.domain = domain.lower() if isinstance(domain, str) else None
+
+    def __repr__(self):
+        arguments = [repr(arg) for arg in self.args] + [f"{key}={value!r}" for key, value in self.kwargs.items()]
+        return f"BatchOperation({self.method}({', '.join(arguments)}))"
+
+    def __call__(self, client):
+        return getattr(client, self.method)(*self.args, **self.kwargs)
+
+
+class BatchReport:
+    def __init__(self, results: List[Tuple[BatchOperation, Future]]):
+        """
+        Outcome of all operations submitted to batch executor
+
+        :param results: Submitted operations with their futures, all done
+        """
+        self.succeeded = []
+        self.failed = []
+        self.skipped = []
+        self.cancelled = []
+        for operation, future in results:
+            if future.cancelled():
+                self.cancelled.append(operation)
+            elif isinstance(future.exception(), OperationSkipped):
+                self.skipped.append(operation)
+            elif future.exception() is not None:
+                self.failed.append((operation, future.exception()))
+            else:
+                self.succeeded.append((operation, future.result()))
+
+    def __repr__(self):
+        return f"BatchReport(succeeded={len(self.succeeded)}, failed={len(self.failed)}, " \
+               f"skipped={len(self.skipped)}, cancelled={len(self.cancelled)})"
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.skipped and not self.cancelled
+
+
+class BatchExecutor:
+    def __init__(self, client, max_concurrency: int = None, on_progress: Callable = None,
+                 stop_on_error: bool = True):
+        """
+        Run mixed client calls concurrently on a thread pool
+
+        At most max_concurrency calls run at once. Calls on the same
+        domain run one after another in order of submission, calls on
+        different domains and account-wide calls run in parallel.
+
+        :param NameSilo client: Client used for the calls
+        :param int max_concurrency: Maximum number of running calls, defaults to client pool size
+        :param on_progress: Called with (completed, total, operation, future) after every call
+        :param bool stop_on_error: Skip queued calls on a domain after a call on it failed,
+                                   their futures fail with OperationSkipped
+        """
+        self._client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency or client._pool.pool_size)
+        self._on_progress = on_progress
+        self._stop_on_error = stop_on_error
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._submitted = []
+        self._completed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def submit(self, operation: BatchOperation) -> Future:
+        """
+        Queue operation
+
+        :param BatchOperation operation: Call to run
+        :return: Future with result of the call
+        :rtype: Future
+        """
+        future = Future()
+        future.add_done_callback(functools.partial(self._progress, operation))
+        with self._lock:
+            self._submitted.append((operation, future))
+            if operation.domain is not None:
+                if operation.domain in self._queues:
+                    self._queues[operation.domain].append((operation, future))
+                    return future
+                self._queues[operation.domain] = deque()
+        self._executor.submit(self._execute, operation, future)
+        return future
+
+    def map(self, operations: Iterable[BatchOperation]) -> List[Future]:
+        """
+        Queue many operations
+
+        :param operations: Calls to run
+        :return: Futures in order of operations
+        :rtype: list
+        """
+        return [self.submit(operation) for operation in operations]
+
+    def wait(self) -> BatchReport:
+        """
+        Wait until all submitted operations are done
+
+        :rtype: BatchReport
+        """
+        with self._lock:
+            submitted = list(self._submitted)
+        wait([future for _, future in submitted])
+        return BatchReport(submitted)
+
+    def run(self, operations: Iterable[BatchOperation]) -> BatchReport:
+        """
+        Submit operations and wait for all of them
+
+        :param operations: Calls to run
+        :rtype: BatchReport
+        """
+        self.map(operations)
+        return self.wait()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _execute(self, operation: BatchOperation, future: Future):
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(operation(self._client))
+            except Exception as error:
+                future.set_exception(error)
+        self._next(operation, future)
+
+    def _next(self, operation: BatchOperation, future: Future):
+        if operation.domain is None:
+            return
+
+        skipped = []
+        with self._lock:
+            queue = self._queues[operation.domain]
+            if self._stop_on_error and not future.cancelled() and future.exception() is not None:
+                skipped = list(queue)
+                queue.clear()
+            following = queue.popleft() if queue else None
+            if following is None:
+                del self._queues[operation.domain]
+
+        for skipped_operation, queued_future in skipped:
+            if queued_future.set_running_or_notify_cancel():
+                queued_future.set_exception(OperationSkipped(f"{skipped_operation!r} skipped, "
+                                                             f"earlier operation on {operation.domain} failed"))
+        if following is not None:
+            self._executor.submit(self._execute, *following)
+
+    def _progress(self, operation: BatchOperation, future: Future):
+        with self._lock:
+            self._completed += 1
+            completed, total = self._completed, len(self._submitted)
+        if self._on_progress is not None:
+            self._on_progress(completed, total, operation, future)
+
+
+class AsyncBatchExecutor:
+    def __init__(self, client, max_concurrency: int = None, on_progress: Callable = None,
+                 stop_on_error: bool = True):
+        """
+        Run mixed AsyncNameSilo calls concurrently as asyncio tasks
+
+        Same ordering and failure rules as BatchExecutor.
+
+        :param AsyncNameSilo client: Client used for the calls
+        :param int max_concurrency: Maximum number of running calls, defaults to client max_concurrency
+        :param on_progress: Called with (completed, total, operation, task) after every call
+        :param bool stop_on_error: Skip queued calls on a domain after a call on it failed,
+                                   their tasks fail with OperationSkipped
+        """
+        self._client = client
+        self.max_concurrency = max_concurrency or client.max_concurrency
+        self._semaphore = None
+        self._on_progress = on_progress
+        self._stop_on_error = stop_on_error
+        self._locks = {}
+        self._failed_domains = set()
+        self._submitted = []
+        self._completed = 0
+
+    def submit(self, operation: BatchOperation) -> asyncio.Task:
+        """
+        Queue operation
+
+        :param BatchOperation operation: Call to run
+        :return: Task with result of the call
+        :rtype: asyncio.Task
+        """
+        task = asyncio.ensure_future(self._execute(operation))
+        task.add_done_callback(functools.partial(self._progress, operation))
+        self._submitted.append((operation, task))
+        return task
+
+    def map(self, operations: Iterable[BatchOperation]) -> List[asyncio.Task]:
+        return [self.submit(operation) for operation in operations]
+
+    async def wait(self) -> BatchReport:
+        """
+        Wait until all submitted operations are done
+
+        :rtype: BatchReport
+        """
+        submitted = list(self._submitted)
+        await asyncio.gather(*[task for _, task in submitted], return_exceptions=True)
+        return BatchReport(submitted)
+
+    async def run(self, operations: Iterable[BatchOperation]) -> BatchReport:
+        self.map(operations)
+        return await self.wait()
+
+    async def _execute(self, operation: BatchOperation):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if operation.domain is None:
+            async with self._semaphore:
+                return await operation(self._client)
+
+        async with self._locks.setdefault(operation.domain, asyncio.Lock()):
+            if operation.domain in self._failed_domains:
+                raise OperationSkipped(f"{operation!r} skipped, earlier operation on {operation.domain} failed")
+            try:
+                async with self._semaphore:
+                    return await operation(self._client)
+            except Exception:
+                if self._stop_on_error:
+                    self._failed_domains.add(operation.domain)
+                raise
+
+    def _progress(self, operation: BatchOperation, task: asyncio.Task):
+        self._completed += 1
+        if self._on_progress is not None:
+            self._on_progress(self._completed, len(self._submitted), operation, task)
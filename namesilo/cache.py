@@ -0,0 +1,129 @@
+import copy
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from namesilo.operations import is_read_operation, operation_name, request_domain
+
+__author__ = 'goran.vrbaski'
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = None,
+                 operations: Iterable[str] = ('getDomainInfo', 'dnsListRecords')):
+        """
+        Read-through cache of parsed API responses with LRU eviction
+
+        Responses of listed read operations are cached per request.
+        Every write operation on a domain (lock, privacy, DNS changes,
+        name servers, ...) drops all cached responses for that domain,
+        so reads never return data older than the client's own writes.
+        A read that was in flight while its domain was invalidated is not
+        stored, see generation(). Every hit returns a copy, so callers
+        may modify responses without changing the cache.
+
+        :param int maxsize: Maximum number of cached responses
+        :param float ttl: Seconds response stays valid, forever by default
+        :param operations: Names of API operations to cache
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.operations = frozenset(operations)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._domains = {}
+        self._generations = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url_extend: str) -> Optional[dict]:
+        """
+        Returns cached response for request, None when not cached
+
+        :param str url_extend: Request URL relative to API base URL
+        :rtype: dict
+        """
+        if operation_name(url_extend) not in self.operations:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(url_extend)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(url_extend)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(url_extend)
+            self.hits += 1
+            parsed_context = entry[0]
+        return copy.deepcopy(parsed_context)
+
+    def generation(self, url_extend: str) -> int:
+        """
+        Invalidation counter of request's domain, taken before request is sent
+
+        :param str url_extend: Request URL relative to API base URL
+        :rtype: int
+        """
+        return self._generations.get(request_domain(url_extend), 0)
+
+    def update(self, url_extend: str, parsed_context: Optional[dict], generation: int = None):
+        """
+        Store response of read request or invalidate domain after write request
+
+        :param str url_extend: Request URL relative to API base URL
+        :param dict parsed_context: Parsed response, None when request failed
+        :param int generation: Result of generation() before request was sent,
+                               response is dropped when domain was invalidated since
+        """
+        operation = operation_name(url_extend)
+        if not is_read_operation(operation):
+            domain = request_domain(url_extend)
+            if domain is not None:
+                self.invalidate(domain)
+            return
+
+        if operation not in self.operations or parsed_context is None:
+            return
+
+        domain = request_domain(url_extend)
+        with self._lock:
+            if generation is not None and self._generations.get(domain, 0) != generation:
+                return
+            self._entries[url_extend] = (parsed_context, time.monotonic(), domain)
+            self._entries.move_to_end(url_extend)
+            self._domains.setdefault(domain, set()).add(url_extend)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, domain: str):
+        """
+        Drop all cached responses for domain
+
+        :param str domain: Domain name
+        """
+        domain = domain.lower()
+        with self._lock:
+            self._generations[domain] = self._generations.get(domain, 0) + 1
+            for url_extend in self._domains.pop(domain, ()):
+                self._entries.pop(url_extend, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._domains.clear()
+
+    def _remove(self, url_extend: str):
+        _, _, domain = self._entries.pop(url_extend)
+        urls = self._domains.get(domain)
+        if urls is not None:
+            urls.discard(url_extend)
+            if not urls:
+                del self._domains[domain]
@@ -1 +1,4 @@
-from .models import Contact, DomainInfo, NameServers
+from .models import (
+    Contact, DnsRecord, DomainAvailability, DomainInfo, DomainResult, DomainSummary, LazyDomainInfo,
+    NameServers, TldPrice
+)
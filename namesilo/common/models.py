@@ -1,17 +1,88 @@
+from datetime import date
+
 __author__ = 'goran.vrbaski'
 
 
+def parse_date(value):
+    """
+    Convert API date (YYYY-MM-DD) to date, None when empty or invalid
+    """
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_bool(value) -> bool:
+    """
+    Convert API flag (Yes/No, 1/0) to bool
+    """
+    if isinstance(value, str):
+        return value.strip().lower() in ('yes', '1', 'true')
+    return bool(value)
+
+
+def as_list(value) -> list:
+    """
+    Single element replies are not wrapped in list by xmltodict
+    """
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
 class DomainInfo:
+    __slots__ = ('auto_renew', 'created', 'expires', 'locked', 'private', 'status',
+                 'traffic_type', 'name_servers', 'contacts')
+
+    _decoders = {
+        'auto_renew': lambda reply: parse_bool(reply['auto_renew']),
+        'created': lambda reply: parse_date(reply['created']),
+        'expires': lambda reply: parse_date(reply['expires']),
+        'locked': lambda reply: parse_bool(reply['locked']),
+        'private': lambda reply: parse_bool(reply['private']),
+        'status': lambda reply: reply['status'],
+        'traffic_type': lambda reply: reply['traffic_type'],
+        'name_servers': lambda reply: NameServers.process(reply['nameservers']),
+        'contacts': lambda reply: Contact(reply['contact_ids']),
+    }
+
+    def __init__(self, data):
+        """
+        Domain information from getDomainInfo reply
+
+        Dates are converted to date, flags to bool.
+        """
+        reply = data['namesilo']['reply']
+        for name, decode in self._decoders.items():
+            setattr(self, name, decode(reply))
+
+    def __repr__(self):
+        return f"{type(self).__name__}(status={self.status!r}, expires={self.expires}, " \
+               f"locked={self.locked}, private={self.private}, auto_renew={self.auto_renew})"
+
+
+class LazyDomainInfo(DomainInfo):
+    __slots__ = ('_reply',)
+
     def __init__(self, data):
-        self.auto_renew = data['namesilo']['reply']['auto_renew']
-        self.created = data['namesilo']['reply']['created']
-        self.expires = data['namesilo']['reply']['expires']
-        self.locked = data['namesilo']['reply']['locked']
-        self.private = data['namesilo']['reply']['private']
-        self.status = data['namesilo']['reply']['status']
-        self.traffic_type = data['namesilo']['reply']['traffic_type']
-        self.name_servers = NameServers.process(data['namesilo']['reply']['nameservers'])
-        self.contacts = Contact(data['namesilo']['reply']['contact_ids'])
+        """
+        DomainInfo decoding each field on first access
+
+        Keeps the reply and decodes only fields that are read, decoded
+        value is stored in its slot so it is decoded once.
+        """
+        self._reply = data['namesilo']['reply']
+
+    def __getattr__(self, name):
+        decode = DomainInfo._decoders.get(name)
+        if decode is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        value = decode(self._reply)
+        setattr(self, name, value)
+        return value
 
 
 class NameServers:
@@ -24,8 +95,172 @@ class NameServers:
 
 
 class Contact:
+    __slots__ = ('administrative', 'billing', 'registrant', 'technical')
+
     def __init__(self, data):
         self.administrative = data['administrative']
         self.billing = data['billing']
         self.registrant = data['registrant']
         self.technical = data['technical']
+
+
+class DomainAvailability:
+    def __init__(self, domain, available, price=None, premium=False):
+        self.domain = domain
+        self.available = available
+        self.price = price
+        self.premium = premium
+
+    def __repr__(self):
+        return f"DomainAvailability({self.domain!r}, available={self.available}, " \
+               f"price={self.price}, premium={self.premium})"
+
+    @staticmethod
+    def process(data):
+        availability = {}
+        for status in ('available', 'unavailable', 'invalid'):
+            domains = (data.get(status) or {}).get('domain', [])
+            if not isinstance(domains, list):
+                domains = [domains]
+
+            for domain in domains:
+                if isinstance(domain, dict):
+                    availability[domain['#text']] = DomainAvailability(
+                        domain['#text'],
+                        status == 'available',
+                        float(domain['@price'].replace(",", "")) if '@price' in domain else None,
+                        domain.get('@premium') == '1'
+                    )
+                else:
+                    availability[domain] = DomainAvailability(domain, status == 'available')
+        return availability
+
+
+class DomainResult:
+    def __init__(self, domain, value=None, error=None):
+        """
+        Outcome of a bulk operation for single domain
+
+        :param str domain: Domain name
+        :param value: Result of the operation, if it succeeded
+        :param Exception error: Exception raised by the operation, if it failed
+        """
+        self.domain = domain
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        if self.ok:
+            return f"DomainResult({self.domain!r}, value={self.value!r})"
+        return f"DomainResult({self.domain!r}, error={self.error!r})"
+
+
+class TldPrice:
+    def __init__(self, tld, registration, renew, transfer):
+        self.tld = tld
+        self.registration = registration
+        self.renew = renew
+        self.transfer = transfer
+
+    def __repr__(self):
+        return f"TldPrice({self.tld!r}, registration={self.registration}, " \
+               f"renew={self.renew}, transfer={self.transfer})"
+
+    def __eq__(self, other):
+        return isinstance(other, TldPrice) and vars(self) == vars(other)
+
+    @staticmethod
+    def _price(value):
+        return float(value.replace(",", "")) if value else None
+
+    @staticmethod
+    def process(data):
+        prices = {}
+        for tld, price in data.items():
+            if isinstance(price, dict) and 'registration' in price:
+                prices[tld] = TldPrice(
+                    tld,
+                    TldPrice._price(price.get('registration')),
+                    TldPrice._price(price.get('renew')),
+                    TldPrice._price(price.get('transfer'))
+                )
+        return prices
+
+
+class DomainSummary:
+    __slots__ = ('name', 'created', 'expires')
+
+    def __init__(self, name, created=None, expires=None):
+        """
+        Domain from listDomains reply
+
+        :param str name: Domain name
+        :param date created: Registration date, when returned by API
+        :param date expires: Expiration date, when returned by API
+        """
+        self.name = name
+        self.created = parse_date(created)
+        self.expires = parse_date(expires)
+
+    def __repr__(self):
+        return f"DomainSummary({self.name!r}, expires={self.expires})"
+
+    def __eq__(self, other):
+        return isinstance(other, DomainSummary) and \
+            (self.name, self.created, self.expires) == (other.name, other.created, other.expires)
+
+    @staticmethod
+    def process(data):
+        summaries = []
+        for domain in as_list(data):
+            if isinstance(domain, dict):
+                summaries.append(DomainSummary(
+                    domain.get('#text') or domain.get('domain'),
+                    domain.get('@created', domain.get('created')),
+                    domain.get('@expires', domain.get('expires'))
+                ))
+            else:
+                summaries.append(DomainSummary(domain))
+        return summaries
+
+
+class DnsRecord:
+    __slots__ = ('record_id', 'type', 'host', 'value', 'ttl', 'distance')
+
+    def __init__(self, record_id, type, host, value, ttl=None, distance=None):
+        """
+        DNS resource record from dnsListRecords reply
+
+        :param str record_id: NameSilo record ID
+        :param str type: Record type, e.g. A, MX, TXT
+        :param str host: Fully qualified host name
+        :param str value: Record value
+        :param int ttl: Record TTL
+        :param int distance: Priority of MX and SRV records
+        """
+        self.record_id = record_id
+        self.type = type
+        self.host = host
+        self.value = value
+        self.ttl = int(ttl) if ttl not in (None, '') else None
+        self.distance = int(distance) if distance not in (None, '') else None
+
+    def __repr__(self):
+        return f"DnsRecord({self.type} {self.host} {self.value!r}, ttl={self.ttl}, id={self.record_id!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, DnsRecord) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    @staticmethod
+    def process(data):
+        return [
+            DnsRecord(record.get('record_id'), record.get('type'), record.get('host'), record.get('value'),
+                      record.get('ttl'), record.get('distance'))
+            for record in as_list(data)
+        ]
@@ -1,16 +1,56 @@
-import os
-import requests
-import xmltodict
+import asyncio
+import functools
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from namesilo.cache import ResponseCache
+from namesilo.common import (
+    DnsRecord, DomainAvailability, DomainInfo, DomainResult, DomainSummary, LazyDomainInfo, TldPrice
+)
+from namesilo.exceptions import (
+    DomainAlreadyAutoRenew, DomainAlreadyLocked, DomainAlreadyNotAutoRenew, DomainAlreadyNotPrivate,
+    DomainAlreadyPrivate, DomainAlreadyUnlocked, HTTPError, TooManyRequests, exception_codes
+)
+from namesilo.instrumentation import CallEvent, current_call, record, scrub_url
+from namesilo.operations import is_read_operation, operation_name
+from namesilo.parsers import XmlStreamParser, get_parser
+from namesilo.prices import PriceCache
+from namesilo.ratelimit import TokenBucket
+from namesilo.request_builder import RequestBuilder
+from namesilo.retry import RetryPolicy
+from namesilo.singleflight import SingleFlight
+from namesilo.transport import AsyncConnectionPool, ConnectionPool, PoolStats
+from namesilo.zone import DnsChange, DnsSyncPlan, plan_dns_sync
 
-from typing import List, Tuple
+__author__ = 'goran.vrbaski'
 
-from namesilo.common import DomainInfo
-from namesilo.exceptions import exception_codes
+MAX_NAME_SERVERS = 13
 
-__author__ = 'goran.vrbaski'
+
+def operation(method):
+    """
+    Turn a generator that yields API request URLs into client method
+
+    Generator yields URL extend for each API request it needs and
+    receives parsed response back, return value of generator is the
+    result of the method. Yielding a list of URL extends sends those
+    requests concurrently and returns a list of parsed responses, with
+    exception in place of response for failed requests. The same operation is driven synchronously
+    by NameSilo and asynchronously by AsyncNameSilo.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._run(method(self, *args, **kwargs))
+    return wrapper
 
 
 class ContactModel:
+    __slots__ = ('contact_id', 'first_name', 'last_name', 'address', 'city', 'state', 'country',
+                 'email', 'phone', 'zip')
+
     def __init__(self, **kwargs):
         """
         Model for manipulating NameSilo contacts
@@ -26,16 +66,16 @@ class ContactModel:
         :param str phone: Telephone number
         :param str zip: ZIP Code
         """
-        self.contact_id = self._correct_formating(kwargs.get('contact_id'))
-        self.first_name = self._correct_formating(kwargs.get('first_name'))
-        self.last_name = self._correct_formating(kwargs.get('last_name'))
-        self.address = self._correct_formating(kwargs.get('address'))
-        self.city = self._correct_formating(kwargs.get('city'))
-        self.state = self._correct_formating(kwargs.get('state'))
-        self.country = self._correct_formating(kwargs.get('country'))
-        self.email = self._correct_formating(kwargs.get('email'))
-        self.phone = self._correct_formating(kwargs.get('phone'))
-        self.zip = self._correct_formating(kwargs.get('zip'))
+        self.contact_id = kwargs.get('contact_id')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+        self.address = kwargs.get('address')
+        self.city = kwargs.get('city')
+        self.state = kwargs.get('state')
+        self.country = kwargs.get('country')
+        self.email = kwargs.get('email')
+        self.phone = kwargs.get('phone')
+        self.zip = kwargs.get('zip')
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.contact_id}"
@@ -62,36 +102,287 @@ class ContactModel:
             phone=reply['phone']
         )
 
-    @staticmethod
-    def _correct_formating(data: str):
-        """
-        Replacing all whitespaces with %20 (NameSilo requirement)
-        :param data:
-
-        :return: string
-        """
-        return data.replace(" ", "%20")
-
 
 class NameSilo:
-    def __init__(self, token, sandbox: bool=True):
+    _pool_class = ConnectionPool
+    _state_methods = {
+        'locked': (('lock_domain', DomainAlreadyLocked), ('unlock_domain', DomainAlreadyUnlocked)),
+        'private': (('add_domain_privacy', DomainAlreadyPrivate), ('remove_domain_privacy', DomainAlreadyNotPrivate)),
+        'auto_renew': (('auto_renew_domain', DomainAlreadyAutoRenew),
+                       ('remove_auto_renew_domain', DomainAlreadyNotAutoRenew)),
+    }
+
+    def __init__(self, token, sandbox: bool=True, pool_size: int = 10,
+                 keep_alive: bool = True, warm_up: int = 0, timeout: float = None,
+                 response_format: str = 'xml', parser=None, rate_limiter: TokenBucket = None,
+                 retry_policy: RetryPolicy = None, price_cache: PriceCache = None,
+                 response_cache: ResponseCache = None, coalesce_reads: bool = False,
+                 base_url: str = None, observers: Iterable[Callable[[CallEvent], None]] = ()):
         """
         Creating Namesilo object with given token
 
+        NameSilo object owns a thread-safe connection pool and can be
+        shared between worker threads.
+
         :param token: access token from namesilo.com
         :param sandbox: true or false
+        :param int pool_size: maximum number of pooled connections
+        :param bool keep_alive: reuse connections between API calls
+        :param int warm_up: number of connections to open on creation
+        :param float timeout: timeout in seconds for each API call
+        :param str response_format: API response format, xml or json
+        :param parser: custom response parser, overrides response_format
+        :param TokenBucket rate_limiter: limits API calls per second, can be shared
+                                         with other NameSilo objects using the same token
+        :param RetryPolicy retry_policy: retries failed API calls, no retries by default
+        :param PriceCache price_cache: cache used by get_tld_prices
+        :param ResponseCache response_cache: cache for domain info and DNS records,
+                                             invalidated by writes to the domain
+        :param bool coalesce_reads: share single request between identical
+                                    concurrent read calls
+        :param str base_url: API URL overriding sandbox and production URL,
+                             e.g. local namesilo.fake_server
+        :param observers: functions called with CallEvent after every API call,
+                          e.g. namesilo.instrumentation.HistogramObserver
         """
         self._token = token
-        if sandbox:
+        self._observers = list(observers)
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self._price_cache = price_cache
+        self._response_cache = response_cache
+        self._single_flight = SingleFlight() if coalesce_reads else None
+        self._parser = parser or get_parser(response_format)
+        self._response_type = self._parser.response_type
+        self._requests = RequestBuilder(token, self._response_type)
+        if base_url is not None:
+            self._base_url = base_url if base_url.endswith('/') else f"{base_url}/"
+        elif sandbox:
             self._base_url = "http://sandbox.namesilo.com/api/"
         else:
             self._base_url = "https://www.namesilo.com/api/"
 
+        self._pool = self._pool_class(pool_size=pool_size, keep_alive=keep_alive, timeout=timeout)
+        if warm_up:
+            self._pool.warm_up(self._base_url, warm_up)
+
+    @property
+    def collapsed_calls(self) -> int:
+        """
+        Number of read calls served by another identical in-flight call
+        """
+        return self._single_flight.collapsed if self._single_flight is not None else 0
+
+    @property
+    def pool_stats(self) -> PoolStats:
+        """
+        Connection reuse statistics
+
+        :rtype: PoolStats
+        """
+        return self._pool.stats
+
+    def close(self):
+        """
+        Close all pooled connections
+        """
+        self._pool.close()
+
+    def add_observer(self, observer: Callable[[CallEvent], None]):
+        """
+        Register function called with CallEvent after every API call
+
+        :param observer: Callable receiving CallEvent
+        """
+        self._observers.append(observer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self, operation):
+        url_extend = next(operation)
+        while True:
+            if isinstance(url_extend, list):
+                parsed_context = self._process_many(url_extend)
+                try:
+                    url_extend = operation.send(parsed_context)
+                except StopIteration as result:
+                    return result.value
+                continue
+
+            event = self._start_call(url_extend)
+            parsed_context = None
+            try:
+                parsed_context = self._process_data(url_extend)
+                self._start_convert(event)
+                url_extend = operation.send(parsed_context)
+            except StopIteration as result:
+                return result.value
+            except Exception as error:
+                self._set_error(event, error)
+                raise
+            finally:
+                self._finish_call(event, parsed_context)
+
+    def _process_many(self, url_extends: List[str]) -> List:
+        def process(url_extend):
+            event = self._start_call(url_extend)
+            parsed_context = None
+            try:
+                parsed_context = self._process_data(url_extend)
+                return parsed_context
+            except Exception as error:
+                self._set_error(event, error)
+                return error
+            finally:
+                self._finish_call(event, parsed_context)
+
+        if len(url_extends) < 2:
+            return [process(url_extend) for url_extend in url_extends]
+
+        with ThreadPoolExecutor(max_workers=min(len(url_extends), self._pool.pool_size)) as executor:
+            return list(executor.map(process, url_extends))
+
     def _process_data(self, url_extend):
-        parsed_context = self._get_content_xml(url_extend)
-        self.check_error_code(self._get_error_code(parsed_context))
+        generation = None
+        if self._response_cache is not None:
+            parsed_context = self._response_cache.get(url_extend)
+            if parsed_context is not None:
+                record(cached=True)
+                return parsed_context
+            generation = self._response_cache.generation(url_extend)
+
+        if self._single_flight is not None and is_read_operation(operation_name(url_extend)):
+            return self._single_flight.do(
+                url_extend, functools.partial(self._request_data, url_extend, generation)
+            )
+        return self._request_data(url_extend, generation)
+
+    def _request_data(self, url_extend, generation: int = None):
+        retries = 0
+        while True:
+            try:
+                parsed_context = self._get_content_xml(url_extend)
+                error_code = self._get_error_code(parsed_context)
+                record(code=error_code[0])
+                self.check_error_code(error_code)
+                break
+            except Exception as error:
+                if not self._should_retry(url_extend, error, retries):
+                    record(retries=retries)
+                    self._update_cache(url_extend, None)
+                    raise
+            time.sleep(self._retry_policy.delay(retries))
+            retries += 1
+
+        record(retries=retries)
+        self._record_retries(url_extend, retries, False)
+        self._update_cache(url_extend, parsed_context, generation)
         return parsed_context
 
+    def _update_cache(self, url_extend: str, parsed_context: dict, generation: int = None):
+        if self._response_cache is not None:
+            self._response_cache.update(url_extend, parsed_context, generation)
+
+    def _should_retry(self, url_extend: str, error: Exception, retries: int) -> bool:
+        if self._retry_policy is None:
+            return False
+        if self._retry_policy.should_retry(url_extend, error, retries):
+            return True
+        self._record_retries(url_extend, retries, True)
+        return False
+
+    def _record_retries(self, url_extend: str, retries: int, failed: bool):
+        if self._retry_policy is not None:
+            self._retry_policy.record(url_extend, retries, failed)
+
+    def _start_call(self, url_extend: str):
+        """
+        Start collecting measurements of API call, when observers are registered
+        """
+        if not self._observers:
+            return None
+        event = CallEvent(operation_name(url_extend), scrub_url(url_extend))
+        event._started = time.perf_counter()
+        event._context_token = current_call.set(event)
+        return event
+
+    @staticmethod
+    def _start_convert(event):
+        if event is not None:
+            event._convert_started = time.perf_counter()
+
+    @staticmethod
+    def _set_error(event, error: Exception):
+        if event is not None:
+            event.error = type(error)
+            event.error_message = scrub_url(str(error))
+
+    def _finish_call(self, event, parsed_context=None):
+        """
+        Complete measurements and pass event to observers
+        """
+        if event is None:
+            return
+        finished = time.perf_counter()
+        current_call.reset(event._context_token)
+        if event._convert_started is not None:
+            event.convert = finished - event._convert_started
+        event.total = finished - event._started
+        if event.code is None and isinstance(parsed_context, dict):
+            try:
+                event.code = self._get_error_code(parsed_context)[0]
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        for observer in self._observers:
+            try:
+                observer(event)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _record_response(api_request, started: float, received: float):
+        if current_call.get() is None:
+            return
+        elapsed = getattr(api_request, 'elapsed', None)
+        connect = elapsed.total_seconds() if isinstance(elapsed, timedelta) else received - started
+        record(connect=connect, transfer=max(received - started - connect, 0.0),
+               response_size=len(api_request.content))
+
+    def _fan_out(self, func: Callable, domains: Iterable[str], max_workers: int = None,
+                 rate: float = None) -> Iterator[DomainResult]:
+        """
+        Call func for every domain on a thread pool, yield results as they complete
+
+        :param func: Function called with domain name
+        :param domains: Domain names
+        :param int max_workers: Number of worker threads, defaults to pool size
+        :param float rate: Maximum number of calls per second
+        """
+        limiter = TokenBucket(rate) if rate else None
+
+        def call(domain):
+            if limiter is not None:
+                limiter.acquire()
+            return func(domain)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers or self._pool.pool_size)
+        futures = {executor.submit(call, domain): domain for domain in domains}
+        try:
+            for future in as_completed(futures):
+                try:
+                    yield DomainResult(futures[future], value=future.result())
+                except Exception as error:
+                    yield DomainResult(futures[future], error=error)
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
     @staticmethod
     def _get_error_code(data):
         return int(data['namesilo']['reply']['code']), \
@@ -104,16 +395,43 @@ class NameSilo:
         else:
             raise exception_codes[error_code[0]](error_code[1])
 
-    def _get_content_xml(self, url: str) -> dict:
-        api_request = requests.get(os.path.join(self._base_url, url))
-        if api_request.status_code != 200:
-            raise Exception(
-                f"API responded with status code: {api_request.status_code}"
-            )
-
-        content = xmltodict.parse(api_request.content.decode())
-        return content
+    @staticmethod
+    def _check_status_code(status_code: int):
+        if status_code == 429:
+            raise TooManyRequests(status_code)
+        if status_code != 200:
+            raise HTTPError(status_code)
+
+    def _parse_response(self, status_code: int, content: bytes) -> dict:
+        self._check_status_code(status_code)
+        return self._parser.parse(content)
+
+    def _stream_records(self, url: str, record_tag: str) -> Iterator:
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        api_request = self._pool.get(self._base_url + url, stream=True)
+        try:
+            self._check_status_code(api_request.status_code)
+            parser = XmlStreamParser(record_tag, self.check_error_code)
+            for chunk in api_request.iter_content(chunk_size=65536):
+                yield from parser.feed(chunk)
+            yield from parser.close()
+        finally:
+            api_request.close()
 
+    def _get_content_xml(self, url: str) -> dict:
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        started = time.perf_counter()
+        api_request = self._pool.get(self._base_url + url)
+        parse_started = time.perf_counter()
+        self._record_response(api_request, started, parse_started)
+        try:
+            return self._parse_response(api_request.status_code, api_request.content)
+        finally:
+            record(parse=time.perf_counter() - parse_started)
+
+    @operation
     def check_domain(self, domain_name: str) -> bool:
         """
         Check if domain name is available
@@ -122,54 +440,193 @@ class NameSilo:
         :return: Availability of domain
         :rtype: bool
         """
-        url_extend = f"checkRegisterAvailability?version=1&type=xml&" \
-                     f"key={self._token}&domains={domain_name}"
-        parsed_content = self._process_data(url_extend)
+        url_extend = self._requests.build("checkRegisterAvailability", domains=domain_name)
+        parsed_content = yield url_extend
         if 'available' in parsed_content['namesilo']['reply'].keys():
             return True
 
         return False
 
-    def get_domain_info(self, domain_name: str) -> DomainInfo:
+    @operation
+    def check_domains(self, domain_names: Iterable[str], batch_size: int = 200) -> Dict[str, DomainAvailability]:
+        """
+        Check availability of many domain names
+
+        Domain names are sent in batches of up to 200 names (NameSilo
+        limit) per request, batches are sent concurrently.
+
+        :param domain_names: Domain names for checking
+        :param int batch_size: Number of domain names per request
+        :return: Availability, price and premium flag for each domain name
+        :rtype: dict
+        """
+        domain_names = list(dict.fromkeys(domain_names))
+        url_extends = [
+            self._requests.build("checkRegisterAvailability",
+                                 domains=','.join(domain_names[index:index + batch_size]))
+            for index in range(0, len(domain_names), batch_size)
+        ]
+        availability = {}
+        for parsed_content in (yield url_extends):
+            if isinstance(parsed_content, BaseException):
+                raise parsed_content
+            availability.update(DomainAvailability.process(parsed_content['namesilo']['reply']))
+        return availability
+
+    @operation
+    def get_domain_info(self, domain_name: str, lazy: bool = False) -> DomainInfo:
         """
         Returns information about specified domain
 
         :param str domain_name: name of domain
+        :param bool lazy: return LazyDomainInfo, decoding fields on first access
         :return: domain information
         :rtype: DomainInfo
         """
-        url_extend = f"getDomainInfo?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}"
-        parsed_content = self._process_data(url_extend)
+        url_extend = self._requests.build("getDomainInfo", domain=domain_name)
+        parsed_content = yield url_extend
+        if lazy:
+            return LazyDomainInfo(parsed_content)
         return DomainInfo(parsed_content)
 
-    def change_domain_nameservers(self, domain: str, primary_ns: str, secondary_ns: str) -> bool:
+    def get_domains_info(self, domains: Iterable[str], max_workers: int = None,
+                         rate: float = None, lazy: bool = False) -> Iterator[DomainResult]:
+        """
+        Fetch information about many domains concurrently
+
+        Results are yielded as they complete, failure for one domain is
+        yielded as result with error instead of stopping the whole run.
+
+        :param domains: Domain names, DomainSummary objects or list_domains() items
+        :param int max_workers: Number of worker threads, defaults to pool size
+        :param float rate: Maximum number of requests per second
+        :param bool lazy: return LazyDomainInfo, scans reading few fields
+                          decode only those fields
+        :return: DomainResult with DomainInfo as value for each domain
+        :rtype: Iterator[DomainResult]
+        """
+        return self._fan_out(functools.partial(self.get_domain_info, lazy=lazy), self._domain_names(domains),
+                             max_workers, rate)
+
+    @staticmethod
+    def _domain_names(domains: Iterable) -> Iterator[str]:
+        for domain in domains:
+            if isinstance(domain, DomainSummary):
+                yield domain.name
+            elif isinstance(domain, dict):
+                yield domain.get('#text') or domain.get('domain')
+            else:
+                yield domain
+
+    @operation
+    def change_domain_nameservers(self, domain: str, primary_ns: str, secondary_ns: str, *name_servers: str) -> bool:
         """
         Change name server for specified domain
 
         :param str domain: Domain name
         :param str primary_ns: Primary name Server
         :param str secondary_ns: Secondary name server
+        :param name_servers: Additional name servers, up to 13 name servers in total
         :return: Status of action
         :rtype: bool
         """
-        url_extend = f"changeNameServers?version=1&" \
-                     f"type=xml&key={self._token}&domain={domain}&" \
-                     f"ns1={primary_ns}&ns2={secondary_ns}"
-        self._process_data(url_extend)
+        name_servers = self._check_name_servers((primary_ns, secondary_ns) + name_servers)
+        url_extend = self._requests.build("changeNameServers", domain=domain, **{
+            f"ns{position}": name_server for position, name_server in enumerate(name_servers, 1)
+        })
+        yield url_extend
         return True
 
-    def list_domains(self) -> List:
+    @staticmethod
+    def _check_name_servers(name_servers: Iterable[str]) -> Tuple[str, ...]:
+        name_servers = tuple(name_servers)
+        if not 2 <= len(name_servers) <= MAX_NAME_SERVERS:
+            raise ValueError(f"Between 2 and {MAX_NAME_SERVERS} name servers are required, got {len(name_servers)}")
+        return name_servers
+
+    @staticmethod
+    def _same_name_servers(current: Iterable[str], name_servers: Iterable[str]) -> bool:
+        def normalize(hosts):
+            return [host.lower().rstrip('.') for host in hosts]
+        return normalize(current) == normalize(name_servers)
+
+    def _plan_name_servers(self, domains: Iterable[str], name_servers: Tuple[str, ...], known_state) -> Tuple[Dict, List]:
+        domains = list(dict.fromkeys(domains))
+        if hasattr(known_state, 'domains'):
+            known_state = known_state.domains(domains)
+        unchanged = {}
+        pending = []
+        for domain in domains:
+            known = (known_state or {}).get(domain, (known_state or {}).get(domain.lower()))
+            if known is not None and self._same_name_servers(known.name_servers, name_servers):
+                unchanged[domain] = DomainResult(domain, value=False)
+            else:
+                pending.append((domain, known is None))
+        return unchanged, pending
+
+    def set_nameservers(self, domains: Iterable[str], name_servers: Iterable[str], known_state=None,
+                        max_workers: int = None, rate: float = None) -> Dict[str, DomainResult]:
+        """
+        Delegate many domains to the same name servers
+
+        Domains already using the name servers are skipped. Name servers
+        of domains missing from known_state are read with getDomainInfo
+        before changing them. Changes run concurrently,
+        failure for one domain (e.g. NameServerUpdateError) is reported
+        in its result.
+
+        :param domains: Domain names
+        :param name_servers: Name servers in order, 2 to 13 host names
+        :param known_state: Known domain state, dict of DomainInfo by domain name or Inventory
+        :param int max_workers: Number of concurrent calls, defaults to pool size
+        :param float rate: Maximum number of domains processed per second
+        :return: DomainResult for each domain, value is True when name servers were changed
+        :rtype: dict
+        """
+        name_servers = self._check_name_servers(name_servers)
+        results, pending = self._plan_name_servers(domains, name_servers, known_state)
+        check_current = dict(pending)
+
+        def change(domain):
+            if check_current[domain] and self._same_name_servers(
+                    self.get_domain_info(domain, lazy=True).name_servers, name_servers):
+                return False
+            return self.change_domain_nameservers(domain, *name_servers)
+
+        for result in self._fan_out(change, check_current, max_workers, rate):
+            results[result.domain] = result
+        return results
+
+    @operation
+    def list_domains(self, models: bool = False) -> List:
         """
         List all domains registered with current account
 
+        :param bool models: return DomainSummary objects instead of reply items
         :return: list of registered domains
         :rtype: list
         """
-        url_extend = f"listDomains?version=1&type=xml&key={self._token}"
-        parsed_content = self._process_data(url_extend)
-        return parsed_content['namesilo']['reply']['domains']['domain']
+        url_extend = self._requests.build("listDomains")
+        parsed_content = yield url_extend
+        domains = parsed_content['namesilo']['reply']['domains']['domain']
+        if models:
+            return DomainSummary.process(domains)
+        return domains
+
+    def iter_domains(self) -> Iterator[str]:
+        """
+        Iterate over all domains registered with current account
 
+        Domains are yielded while response is downloaded, without
+        building the whole list in memory.
+
+        :return: registered domain names
+        :rtype: Iterator[str]
+        """
+        url_extend = self._requests.build("listDomains", response_type='xml')
+        return self._stream_records(url_extend, 'domain')
+
+    @operation
     def register_domain(self, domain_name: str, years: int = 1, auto_renew: int =0, private: int = 0) -> bool:
         """
         Register a new domain name
@@ -181,12 +638,12 @@ class NameSilo:
         :return: status of domain registration
         :rtype: bool
         """
-        url_extend = f"registerDomain?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}&years={years}&private={private}&" \
-                     f"auto_renew={auto_renew}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("registerDomain", domain=domain_name, years=years, private=private,
+                                          auto_renew=auto_renew)
+        yield url_extend
         return True
 
+    @operation
     def renew_domain(self, domain_name: str, years: int = 1) -> bool:
         """
         Renew domain name
@@ -196,33 +653,33 @@ class NameSilo:
         :return: status of renewal
         :rtype: bool
         """
-        url_extend = f"renewDomain?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}&years={years}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("renewDomain", domain=domain_name, years=years)
+        yield url_extend
         return True
 
+    @operation
     def lock_domain(self, domain_name: str) -> bool:
         """
 
         :param str domain_name:
         :return:
         """
-        url_extend = f"domainLock?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("domainLock", domain=domain_name)
+        yield url_extend
         return True
 
+    @operation
     def unlock_domain(self, domain_name: str) -> bool:
         """
 
         :param str domain_name:
         :return:
         """
-        url_extend = f"domainUnlock?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("domainUnlock", domain=domain_name)
+        yield url_extend
         return True
 
+    @operation
     def auto_renew_domain(self, domain_name: str) -> bool:
         """
         Set auto-renew to specific domain
@@ -231,11 +688,11 @@ class NameSilo:
         :return: Status of action
         :rtype: bool
         """
-        url_extend = f"addAutoRenewal?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("addAutoRenewal", domain=domain_name)
+        yield url_extend
         return True
 
+    @operation
     def remove_auto_renew_domain(self, domain_name: str) -> bool:
         """
         Remove auto-renew to specific domain
@@ -244,11 +701,11 @@ class NameSilo:
         :return: Status of action
         :rtype: bool
         """
-        url_extend = f"removeAutoRenewal?version=1&type=xml&" \
-                     f"key={self._token}&domain={domain_name}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("removeAutoRenewal", domain=domain_name)
+        yield url_extend
         return True
 
+    @operation
     def get_prices(self):
         """
         Returns all prices for supported TLDs
@@ -256,10 +713,28 @@ class NameSilo:
         :return: Prices for supported TLDs
         :rtype: dict
         """
-        url_extend = f"getPrices?version=1&type=xml&key={self._token}"
-        parsed_content = self._process_data(url_extend)
+        url_extend = self._requests.build("getPrices")
+        parsed_content = yield url_extend
         return parsed_content['namesilo']['reply']
 
+    def _fetch_tld_prices(self) -> Dict[str, TldPrice]:
+        return TldPrice.process(self.get_prices())
+
+    def get_tld_prices(self) -> Dict[str, TldPrice]:
+        """
+        Returns registration, renew and transfer prices for supported TLDs
+
+        Prices are served from price cache when NameSilo object was
+        created with one.
+
+        :return: Prices for each TLD, e.g. {'com': TldPrice(...)}
+        :rtype: dict
+        """
+        if self._price_cache is None:
+            return self._fetch_tld_prices()
+        return self._price_cache.get(self._fetch_tld_prices)
+
+    @operation
     def list_contacts(self) -> List[ContactModel]:
         """
         Returns list of all contacts for current account
@@ -268,8 +743,8 @@ class NameSilo:
         :rtype: list
         """
         contacts = []
-        url_extend = f"contactList?version=1&type=xml&key={self._token}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._requests.build("contactList")
+        parsed_context = yield url_extend
         reply = parsed_context['namesilo']['reply']['contact']
 
         if isinstance(reply, list):
@@ -281,6 +756,7 @@ class NameSilo:
 
         return contacts
 
+    @operation
     def add_contact(self, contact: ContactModel) -> bool:
         """
         Adding new contact for current account
@@ -289,15 +765,14 @@ class NameSilo:
         :return: Status for adding contact
         :rtype: bool
         """
-        url_extend = f"contactAdd?version=1&type=xml&key={self._token}&" \
-                     f"fn={contact.first_name}&ln={contact.last_name}&" \
-                     f"ad={contact.address}&cy={contact.city}&" \
-                     f"st={contact.state}&zp={contact.zip}&" \
-                     f"ct={contact.country}&em={contact.email}&" \
-                     f"ph={contact.phone}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build(
+            "contactAdd", fn=contact.first_name, ln=contact.last_name, ad=contact.address, cy=contact.city,
+            st=contact.state, zp=contact.zip, ct=contact.country, em=contact.email, ph=contact.phone
+        )
+        yield url_extend
         return True
 
+    @operation
     def update_contact(self, contact: ContactModel) -> bool:
         """
         Update existing contact with new information
@@ -306,17 +781,15 @@ class NameSilo:
         :return: status of action
         :rtype: bool
         """
-        url_extend = f"contactUpdate?version=1&type=xml&key={self._token}&" \
-                     f"contact_id={contact.contact_id}&" \
-                     f"fn={contact.first_name}%20{contact.last_name}&" \
-                     f"ad={contact.address}&cy={contact.city}&" \
-                     f"st={contact.state}&zp={contact.zip}&" \
-                     f"ct={contact.country}&em={contact.email}&" \
-                     f"ph={contact.phone}"
-
-        self._process_data(url_extend)
+        url_extend = self._requests.build(
+            "contactUpdate", contact_id=contact.contact_id, fn=f"{contact.first_name} {contact.last_name}",
+            ad=contact.address, cy=contact.city, st=contact.state, zp=contact.zip, ct=contact.country,
+            em=contact.email, ph=contact.phone
+        )
+        yield url_extend
         return True
 
+    @operation
     def delete_contact(self, contact_id) -> bool:
         """
         Delete contact from NameSilo account
@@ -325,11 +798,11 @@ class NameSilo:
         :return:
         :rtype: None
         """
-        url_extend = f"contactDelete?version=1&type=xml&key={self._token}&" \
-                     f"contact_id={contact_id}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._requests.build("contactDelete", contact_id=contact_id)
+        parsed_context = yield url_extend
         return parsed_context
 
+    @operation
     def add_account_funds(self, amount: float, payment_id: int) -> Tuple[bool, float]:
         """
         Adding funds to Namesilo account
@@ -339,12 +812,12 @@ class NameSilo:
         :return: Status and amount after adding funds, example: (True, 150.00)
         :rtype: tuple
         """
-        url_extend = f"addAccountFunds?version=1&type=xml&key={self._token}&" \
-                     f"amount={amount}&payment_id={payment_id}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._requests.build("addAccountFunds", amount=amount, payment_id=payment_id)
+        parsed_context = yield url_extend
         amount = parsed_context['namesilo']['reply']['new_balance']
         return True, float(amount.replace(",", ""))
 
+    @operation
     def get_account_balance(self) -> float:
         """
         Returns current account balance
@@ -352,11 +825,12 @@ class NameSilo:
         :return: current account balance
         :rtype: float
         """
-        url_extend = f"getAccountBalance?version=1&type=xml&key={self._token}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._requests.build("getAccountBalance")
+        parsed_context = yield url_extend
         amount = parsed_context['namesilo']['reply']['balance']
         return float(amount.replace(",", ""))
 
+    @operation
     def add_domain_privacy(self, domain_name: str) -> bool:
         """
         Adds privacy to specified domain name
@@ -365,11 +839,11 @@ class NameSilo:
         :return: Status of action
         :rtype: bool
         """
-        url_extend = f"addPrivacy?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("addPrivacy", domain=domain_name)
+        yield url_extend
         return True
 
+    @operation
     def remove_domain_privacy(self, domain_name: str) -> bool:
         """
         Removes privacy for specified domain name
@@ -378,33 +852,145 @@ class NameSilo:
         :return: Status of action
         :rtype: bool
         """
-        url_extend = f"removePrivacy?version=1&type=xml&key={self._token}&" \
-                     f"domain={domain_name}"
-        self._process_data(url_extend)
+        url_extend = self._requests.build("removePrivacy", domain=domain_name)
+        yield url_extend
         return True
 
-    def list_dns_records(self, domain_name) -> List:
+    def _plan_state(self, attribute: str, domains: Iterable[str], state: bool, known_state) -> Tuple[Dict, List, Tuple]:
+        """
+        Split domains into those already in state and those needing a call
+        """
+        domains = list(dict.fromkeys(domains))
+        if hasattr(known_state, 'domains'):
+            known_state = known_state.domains(domains)
+        known_state = known_state or {}
+
+        unchanged = {}
+        pending = []
+        for domain in domains:
+            known = known_state.get(domain, known_state.get(domain.lower()))
+            if known is not None and getattr(known, attribute) == state:
+                unchanged[domain] = DomainResult(domain, value=False)
+            else:
+                pending.append(domain)
+        method_name, already = self._state_methods[attribute][0 if state else 1]
+        return unchanged, pending, (getattr(self, method_name), already)
+
+    def _ensure_state(self, attribute: str, domains: Iterable[str], state: bool, known_state,
+                      max_workers: int, rate: float) -> Dict[str, DomainResult]:
+        results, pending, (method, already) = self._plan_state(attribute, domains, state, known_state)
+
+        def change(domain):
+            try:
+                return method(domain)
+            except already:
+                return False
+
+        for result in self._fan_out(change, pending, max_workers, rate):
+            results[result.domain] = result
+        return results
+
+    def ensure_locked(self, domains: Iterable[str], state: bool = True, known_state=None,
+                      max_workers: int = None, rate: float = None) -> Dict[str, DomainResult]:
+        """
+        Lock or unlock many domains, skipping domains already in state
+
+        Calls are sent only for domains whose known state differs or is
+        unknown, concurrently. Domain reported by API as already in the
+        state counts as success.
+
+        :param domains: Domain names
+        :param bool state: True to lock, False to unlock
+        :param known_state: Known domain state, dict of DomainInfo by domain name or Inventory
+        :param int max_workers: Number of concurrent calls, defaults to pool size
+        :param float rate: Maximum number of calls per second
+        :return: DomainResult for each domain, value is True when domain was changed
+        :rtype: dict
+        """
+        return self._ensure_state('locked', domains, state, known_state, max_workers, rate)
+
+    def ensure_private(self, domains: Iterable[str], state: bool = True, known_state=None,
+                       max_workers: int = None, rate: float = None) -> Dict[str, DomainResult]:
+        """
+        Add or remove WHOIS privacy for many domains, skipping domains already in state
+
+        :param domains: Domain names
+        :param bool state: True to add privacy, False to remove it
+        :param known_state: Known domain state, dict of DomainInfo by domain name or Inventory
+        :param int max_workers: Number of concurrent calls, defaults to pool size
+        :param float rate: Maximum number of calls per second
+        :return: DomainResult for each domain, value is True when domain was changed
+        :rtype: dict
+        """
+        return self._ensure_state('private', domains, state, known_state, max_workers, rate)
+
+    def ensure_auto_renew(self, domains: Iterable[str], state: bool = True, known_state=None,
+                          max_workers: int = None, rate: float = None) -> Dict[str, DomainResult]:
+        """
+        Turn auto-renewal on or off for many domains, skipping domains already in state
+
+        :param domains: Domain names
+        :param bool state: True to turn auto-renewal on, False to turn it off
+        :param known_state: Known domain state, dict of DomainInfo by domain name or Inventory
+        :param int max_workers: Number of concurrent calls, defaults to pool size
+        :param float rate: Maximum number of calls per second
+        :return: DomainResult for each domain, value is True when domain was changed
+        :rtype: dict
+        """
+        return self._ensure_state('auto_renew', domains, state, known_state, max_workers, rate)
+
+    @operation
+    def list_dns_records(self, domain_name, models: bool = False) -> List:
         """
         List all DNS records for specified domain name
 
         :param str domain_name: Domain name for listing DNS records
+        :param bool models: return list of DnsRecord objects instead of reply records
         :return: Returns a list of DNS records for specified domain name
         :rtype: list
         """
 
-        url_extend = f"dnsListRecords?version=1&type=xml&key={self._token}" \
-                     f"&domain={domain_name}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._requests.build("dnsListRecords", domain=domain_name)
+        parsed_context = yield url_extend
         records = parsed_context['namesilo']['reply']['resource_record']
+        if models:
+            return DnsRecord.process(records)
         return records
 
+    def iter_dns_records(self, domain_name: str) -> Iterator[dict]:
+        """
+        Iterate over DNS records for specified domain name
+
+        Records are yielded while response is downloaded, without
+        building the whole list in memory.
+
+        :param str domain_name: Domain name for listing DNS records
+        :return: DNS records for specified domain name
+        :rtype: Iterator[dict]
+        """
+        url_extend = self._requests.build("dnsListRecords", response_type='xml', domain=domain_name)
+        return self._stream_records(url_extend, 'resource_record')
+
+    def _dns_add_url(self, domain_name, record_type, record_host, record_value, ttl, distance=None) -> str:
+        return self._requests.build("dnsAddRecord", domain=domain_name, rrtype=record_type, rrhost=record_host,
+                                    rrvalue=record_value, rrttl=ttl, rrdistance=distance)
+
+    def _dns_update_url(self, domain_name, record_id, record_host, record_value, ttl, distance=None) -> str:
+        return self._requests.build("dnsUpdateRecord", domain=domain_name, rrid=record_id, rrhost=record_host,
+                                    rrvalue=record_value, rrttl=ttl, rrdistance=distance)
+
+    def _dns_delete_url(self, domain_name, record_id) -> str:
+        return self._requests.build("dnsDeleteRecord", domain=domain_name, rrid=record_id)
+
+    @operation
     def add_dns_records(
             self,
             domain_name: str,
             record_type: str,
             record_host: str,
             record_value: str,
-            ttl: int = 7207
+            ttl: int = 7207,
+            distance: int = None
     ) -> int:
         """
         Add DNS record to specified domain name
@@ -414,17 +1000,17 @@ class NameSilo:
         :param str record_host: The hostname for the new record
         :param str record_value: The value for the resource record
         :param int ttl: The TTL for the new record
+        :param int distance: The priority for MX and SRV records
         :return: Returns record id for specified domain record
         :rtype: int
         """
 
-        url_extend = f"dnsAddRecord?version=1&type=xml&key={self._token}" \
-                     f"&domain={domain_name}&rrtype={record_type}" \
-                     f"&rrhost={record_host}&rrvalue={record_value}&rrttl={ttl}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._dns_add_url(domain_name, record_type, record_host, record_value, ttl, distance)
+        parsed_context = yield url_extend
         record_id = parsed_context['namesilo']['reply']['record_id']
         return record_id
 
+    @operation
     def update_dns_records(
             self,
             domain_name:
@@ -432,7 +1018,8 @@ class NameSilo:
             record_id: str,
             record_host: str,
             record_value: str,
-            ttl: int = 7207
+            ttl: int = 7207,
+            distance: int = None
     ) -> int:
         """
         Update an existing DNS resource record
@@ -442,14 +1029,318 @@ class NameSilo:
         :param str record_host: The hostname to use
         :param str record_value: The value for the resource record
         :param int ttl: The TTL for this record
+        :param int distance: The priority for MX and SRV records
         :return: Returns record id for updated domain record
         :rtype: int
         """
 
-        url_extend = f"dnsUpdateRecord?version=1&type=xml" \
-                     f"&key={self._token}&domain={domain_name}&" \
-                     f"rrid={record_id}&rrhost={record_host}" \
-                     f"&rrvalue={record_value}&rrttl={ttl}"
-        parsed_context = self._process_data(url_extend)
+        url_extend = self._dns_update_url(domain_name, record_id, record_host, record_value, ttl, distance)
+        parsed_context = yield url_extend
         new_record_id = parsed_context['namesilo']['reply']['record_id']
         return new_record_id
+
+    @operation
+    def delete_dns_record(self, domain_name: str, record_id: str) -> bool:
+        """
+        Delete an existing DNS resource record
+
+        :param str domain_name: Domain name for deleting DNS record
+        :param str record_id: The unique ID of the resource record
+        :return: Status of action
+        :rtype: bool
+        """
+        yield self._dns_delete_url(domain_name, record_id)
+        return True
+
+    @operation
+    def sync_dns(self, domain_name: str, desired_records: Iterable, dry_run: bool = False) -> DnsSyncPlan:
+        """
+        Bring DNS records of domain to desired state with minimal number of calls
+
+        Current records are compared with desired records, only missing
+        records are added, changed records updated in place and extra
+        records deleted. Changes are sent concurrently, failure of one
+        change is stored on that change instead of stopping the others.
+
+        :param str domain_name: Domain name
+        :param desired_records: Desired records, dicts with type, host, value
+                                and optional ttl and distance keys
+        :param bool dry_run: Only plan the changes, don't send them
+        :return: Planned changes, with errors for failed changes
+        :rtype: DnsSyncPlan
+        """
+        url_extend = self._requests.build("dnsListRecords", domain=domain_name)
+        parsed_context = yield url_extend
+        current = parsed_context['namesilo']['reply'].get('resource_record') or []
+        if isinstance(current, dict):
+            current = [current]
+
+        plan = plan_dns_sync(domain_name, current, desired_records)
+        if dry_run or not plan.changes:
+            return plan
+
+        url_extends = []
+        for change in plan.changes:
+            record = change.record
+            if change.action == DnsChange.ADD:
+                url_extends.append(self._dns_add_url(
+                    domain_name, record.type, record.host, record.value, record.ttl, record.distance
+                ))
+            elif change.action == DnsChange.UPDATE:
+                url_extends.append(self._dns_update_url(
+                    domain_name, change.record_id, record.host, record.value, record.ttl, record.distance
+                ))
+            else:
+                url_extends.append(self._dns_delete_url(domain_name, change.record_id))
+
+        for change, result in zip(plan.changes, (yield url_extends)):
+            if isinstance(result, BaseException):
+                change.error = result
+        plan.dry_run = False
+        return plan
+
+
+class AsyncNameSilo(NameSilo):
+    _pool_class = AsyncConnectionPool
+
+    def __init__(self, token, sandbox: bool = True, pool_size: int = 100,
+                 keep_alive: bool = True, timeout: float = None, max_concurrency: int = 100,
+                 response_format: str = 'xml', parser=None, rate_limiter: TokenBucket = None,
+                 retry_policy: RetryPolicy = None, price_cache: PriceCache = None,
+                 response_cache: ResponseCache = None, coalesce_reads: bool = False,
+                 base_url: str = None, observers: Iterable[Callable[[CallEvent], None]] = ()):
+        """
+        Asyncio NameSilo client, every NameSilo method returns awaitable
+
+        Requires aiohttp (pip install python-namesilo[async]).
+
+        :param token: access token from namesilo.com
+        :param sandbox: true or false
+        :param int pool_size: maximum number of pooled connections
+        :param bool keep_alive: reuse connections between API calls
+        :param float timeout: timeout in seconds for each API call
+        :param int max_concurrency: maximum number of in-flight API calls
+        :param str response_format: API response format, xml or json
+        :param parser: custom response parser, overrides response_format
+        :param TokenBucket rate_limiter: limits API calls per second
+        :param RetryPolicy retry_policy: retries failed API calls, no retries by default
+        :param PriceCache price_cache: cache used by get_tld_prices
+        :param ResponseCache response_cache: cache for domain info and DNS records,
+                                             invalidated by writes to the domain
+        :param bool coalesce_reads: share single request between identical
+                                    concurrent read calls
+        :param str base_url: API URL overriding sandbox and production URL
+        :param observers: functions called with CallEvent after every API call
+        """
+        super().__init__(token, sandbox, pool_size=pool_size, keep_alive=keep_alive, timeout=timeout,
+                         response_format=response_format, parser=parser, rate_limiter=rate_limiter,
+                         retry_policy=retry_policy, price_cache=price_cache,
+                         response_cache=response_cache, coalesce_reads=coalesce_reads,
+                         base_url=base_url, observers=observers)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    async def close(self):
+        """
+        Close all pooled connections
+        """
+        await self._pool.close()
+
+    def __enter__(self):
+        raise TypeError("AsyncNameSilo must be used with 'async with', not 'with'")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _run(self, operation):
+        url_extend = next(operation)
+        while True:
+            if isinstance(url_extend, list):
+                parsed_context = await asyncio.gather(
+                    *[self._process_observed(extend) for extend in url_extend], return_exceptions=True
+                )
+                try:
+                    url_extend = operation.send(parsed_context)
+                except StopIteration as result:
+                    return result.value
+                continue
+
+            event = self._start_call(url_extend)
+            parsed_context = None
+            try:
+                parsed_context = await self._process_data(url_extend)
+                self._start_convert(event)
+                url_extend = operation.send(parsed_context)
+            except StopIteration as result:
+                return result.value
+            except Exception as error:
+                self._set_error(event, error)
+                raise
+            finally:
+                self._finish_call(event, parsed_context)
+
+    async def _process_observed(self, url_extend):
+        event = self._start_call(url_extend)
+        parsed_context = None
+        try:
+            parsed_context = await self._process_data(url_extend)
+            return parsed_context
+        except Exception as error:
+            self._set_error(event, error)
+            raise
+        finally:
+            self._finish_call(event, parsed_context)
+
+    async def _process_data(self, url_extend):
+        generation = None
+        if self._response_cache is not None:
+            parsed_context = self._response_cache.get(url_extend)
+            if parsed_context is not None:
+                record(cached=True)
+                return parsed_context
+            generation = self._response_cache.generation(url_extend)
+
+        if self._single_flight is not None and is_read_operation(operation_name(url_extend)):
+            return await self._single_flight.do_async(
+                url_extend, functools.partial(self._request_data, url_extend, generation)
+            )
+        return await self._request_data(url_extend, generation)
+
+    async def _request_data(self, url_extend, generation: int = None):
+        retries = 0
+        while True:
+            try:
+                parsed_context = await self._get_content_xml(url_extend)
+                error_code = self._get_error_code(parsed_context)
+                record(code=error_code[0])
+                self.check_error_code(error_code)
+                break
+            except Exception as error:
+                if not self._should_retry(url_extend, error, retries):
+                    record(retries=retries)
+                    self._update_cache(url_extend, None)
+                    raise
+            await asyncio.sleep(self._retry_policy.delay(retries))
+            retries += 1
+
+        record(retries=retries)
+        self._record_retries(url_extend, retries, False)
+        self._update_cache(url_extend, parsed_context, generation)
+        return parsed_context
+
+    async def _fan_out(self, func: Callable, domains: Iterable[str], max_workers: int = None,
+                       rate: float = None) -> AsyncIterator[DomainResult]:
+        limiter = TokenBucket(rate) if rate else None
+        semaphore = asyncio.Semaphore(max_workers or self.max_concurrency)
+
+        async def call(domain):
+            if limiter is not None:
+                await limiter.acquire_async()
+            async with semaphore:
+                try:
+                    return DomainResult(domain, value=await func(domain))
+                except Exception as error:
+                    return DomainResult(domain, error=error)
+
+        tasks = [asyncio.ensure_future(call(domain)) for domain in domains]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_domains_info(self, domains: Iterable[str], max_workers: int = None,
+                         rate: float = None, lazy: bool = False) -> AsyncIterator[DomainResult]:
+        """
+        Fetch information about many domains concurrently, use with async for
+
+        :param domains: Domain names, DomainSummary objects or list_domains() items
+        :param int max_workers: Maximum number of in-flight requests
+        :param float rate: Maximum number of requests per second
+        :param bool lazy: return LazyDomainInfo, decoding fields on first access
+        :return: DomainResult with DomainInfo as value for each domain
+        :rtype: AsyncIterator[DomainResult]
+        """
+        return self._fan_out(functools.partial(self.get_domain_info, lazy=lazy), self._domain_names(domains),
+                             max_workers, rate)
+
+    async def _fetch_tld_prices(self) -> Dict[str, TldPrice]:
+        return TldPrice.process(await self.get_prices())
+
+    async def _ensure_state(self, attribute: str, domains: Iterable[str], state: bool, known_state,
+                            max_workers: int, rate: float) -> Dict[str, DomainResult]:
+        results, pending, (method, already) = self._plan_state(attribute, domains, state, known_state)
+
+        async def change(domain):
+            try:
+                return await method(domain)
+            except already:
+                return False
+
+        async for result in self._fan_out(change, pending, max_workers, rate):
+            results[result.domain] = result
+        return results
+
+    async def set_nameservers(self, domains: Iterable[str], name_servers: Iterable[str], known_state=None,
+                              max_workers: int = None, rate: float = None) -> Dict[str, DomainResult]:
+        name_servers = self._check_name_servers(name_servers)
+        results, pending = self._plan_name_servers(domains, name_servers, known_state)
+        check_current = dict(pending)
+
+        async def change(domain):
+            if check_current[domain] and self._same_name_servers(
+                    (await self.get_domain_info(domain, lazy=True)).name_servers, name_servers):
+                return False
+            return await self.change_domain_nameservers(domain, *name_servers)
+
+        async for result in self._fan_out(change, check_current, max_workers, rate):
+            results[result.domain] = result
+        return results
+
+    async def get_tld_prices(self) -> Dict[str, TldPrice]:
+        """
+        Returns registration, renew and transfer prices for supported TLDs
+
+        :return: Prices for each TLD, e.g. {'com': TldPrice(...)}
+        :rtype: dict
+        """
+        if self._price_cache is None:
+            return await self._fetch_tld_prices()
+        return await self._price_cache.get_async(self._fetch_tld_prices)
+
+    async def _stream_records(self, url: str, record_tag: str) -> AsyncIterator:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async()
+        async with self._semaphore:
+            async with self._pool.stream(self._base_url + url) as api_request:
+                self._check_status_code(api_request.status_code)
+                parser = XmlStreamParser(record_tag, self.check_error_code)
+                async for chunk in api_request.content:
+                    for item in parser.feed(chunk):
+                        yield item
+                for item in parser.close():
+                    yield item
+
+    async def _get_content_xml(self, url: str) -> dict:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async()
+        async with self._semaphore:
+            started = time.perf_counter()
+            api_request = await self._pool.get(self._base_url + url)
+        parse_started = time.perf_counter()
+        self._record_response(api_request, started, parse_started)
+        try:
+            return self._parse_response(api_request.status_code, api_request.content)
+        finally:
+            record(parse=time.perf_counter() - parse_started)
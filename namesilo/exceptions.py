@@ -172,6 +172,23 @@ class APIRequestError(NameSilo):
     pass
 
 
+class HTTPError(NameSilo):
+    """API responded with HTTP status code other than 200"""
+    def __init__(self, status_code: int):
+        super().__init__(f"API responded with status code: {status_code}")
+        self.status_code = status_code
+
+
+class TooManyRequests(HTTPError):
+    """API key is throttled (HTTP 429)"""
+    pass
+
+
+class OperationSkipped(NameSilo):
+    """Batch operation not sent because earlier operation on the same domain failed"""
+    pass
+
+
 exception_codes = {
     101: HTTPSNotUsed,
     102: NoAPIVersionSpecified,
@@ -0,0 +1,532 @@
+"""
+Local stand-in for NameSilo API, for offline load and concurrency tests
+
+    python -m namesilo.fake_server --port 8080 --domains 1000 --latency 0.05
+
+Point NameSilo at it with ``NameSilo(token, base_url="http://127.0.0.1:8080/api/")``.
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+import uuid
+import xmltodict
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable
+from urllib.parse import parse_qsl, urlsplit
+
+from namesilo.ratelimit import TokenBucket
+
+__author__ = 'goran.vrbaski'
+
+DEFAULT_NAME_SERVERS = ['NS1.DNSOWL.COM', 'NS2.DNSOWL.COM', 'NS3.DNSOWL.COM']
+DEFAULT_PRICES = {
+    'com': ('9.95', '9.95', '9.95'),
+    'net': ('11.79', '11.79', '11.79'),
+    'org': ('10.79', '10.79', '10.79'),
+    'io': ('34.99', '39.99', '39.99'),
+    'dev': ('12.99', '12.99', '12.99'),
+}
+
+
+class FakeApiError(Exception):
+    def __init__(self, code: int, detail: str):
+        super().__init__(detail)
+        self.code = code
+        self.detail = detail
+
+
+def _add_years(date: datetime.date, years: int) -> datetime.date:
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        return date.replace(year=date.year + years, day=28)
+
+
+class FakeDomain:
+    def __init__(self, name: str, created: datetime.date = None, expires: datetime.date = None):
+        self.name = name
+        self.created = created or datetime.date.today()
+        self.expires = expires or _add_years(self.created, 1)
+        self.locked = False
+        self.private = False
+        self.auto_renew = False
+        self.name_servers = list(DEFAULT_NAME_SERVERS)
+        self.records = {}
+
+
+class FakeNameSiloServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, token: str = None,
+                 domains: Iterable[str] = (), balance: float = 1000.0, prices: dict = None,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 error_codes: Iterable[int] = (115, 201), rate_limit: float = None, burst: int = 1):
+        """
+        Threaded HTTP server implementing the NameSilo operations used by NameSilo client
+
+        Replies have the same shape as real API replies, in xml or json
+        depending on type parameter of request. Account state (domains,
+        DNS records, contacts, balance) is kept in memory.
+
+        :param str host: Address to listen on
+        :param int port: Port to listen on, 0 picks free port
+        :param str token: Accepted API key, any key is accepted by default
+        :param domains: Domain names registered in the account
+        :param float balance: Account balance
+        :param dict prices: TLD mapped to (registration, renew, transfer) prices
+        :param float latency: Seconds added to every reply
+        :param float jitter: Random extra latency, up to given seconds
+        :param float error_rate: Fraction of requests failing with random code from error_codes
+        :param error_codes: NameSilo codes used for random errors
+        :param float rate_limit: Requests per second before replying with HTTP 429
+        :param int burst: Requests allowed at once by rate limit
+        """
+        self.token = token
+        self.balance = balance
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_codes = list(error_codes)
+        self.rate_limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.requests = Counter()
+        self.domains = {}
+        self.contacts = {}
+        self._injected = []
+        self._lock = threading.RLock()
+        self._next_contact_id = 1
+        for name in domains:
+            self.add_domain(name)
+        self.add_contact(first_name='John', last_name='Doe', address='Main Street 1', city='Springfield',
+                         state='IL', country='US', zip='62701', email='john.doe@example.com',
+                         phone='15555555555')
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def start(self) -> 'FakeNameSiloServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def add_domain(self, name: str, **attributes) -> FakeDomain:
+        """
+        Add domain to the account
+
+        :param str name: Domain name
+        :param attributes: FakeDomain attributes to set, e.g. locked=True
+        """
+        domain = FakeDomain(name.lower())
+        for attribute, value in attributes.items():
+            setattr(domain, attribute, value)
+        with self._lock:
+            self.domains[domain.name] = domain
+        return domain
+
+    def add_contact(self, **contact) -> str:
+        with self._lock:
+            contact_id = str(self._next_contact_id)
+            self._next_contact_id += 1
+            self.contacts[contact_id] = dict(contact, contact_id=contact_id)
+        return contact_id
+
+    def fail_next(self, code: int, operation: str = None, times: int = 1, http_status: int = None):
+        """
+        Make next requests fail
+
+        :param int code: NameSilo reply code to return
+        :param str operation: Fail only this operation, any operation by default
+        :param int times: Number of requests to fail
+        :param int http_status: Reply with this HTTP status instead of reply code
+        """
+        with self._lock:
+            for _ in range(times):
+                self._injected.append((operation, code, http_status))
+
+    def _take_injected(self, operation: str):
+        with self._lock:
+            for index, (injected_operation, code, http_status) in enumerate(self._injected):
+                if injected_operation in (None, operation):
+                    del self._injected[index]
+                    return code, http_status
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, content_type, body = server.handle(self.path)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, path: str):
+        """
+        Handle API request
+
+        :param str path: Request path with query string
+        :return: HTTP status, content type and body
+        """
+        url = urlsplit(path)
+        operation = url.path.rstrip('/').rsplit('/', 1)[-1]
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        response_type = params.get('type', 'xml')
+        with self._lock:
+            self.requests[operation] += 1
+
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if self.rate_limiter is not None and not self.rate_limiter.try_acquire():
+            return 429, 'text/plain', b'Too Many Requests'
+
+        reply = {}
+        try:
+            injected = self._take_injected(operation)
+            if injected is not None and injected[1] is not None:
+                return injected[1], 'text/plain', b'Injected HTTP error'
+            if injected is not None:
+                raise FakeApiError(injected[0], 'Injected error')
+            if self.error_rate and random.random() < self.error_rate:
+                raise FakeApiError(random.choice(self.error_codes), 'Injected error')
+            reply = self._dispatch(operation, params)
+            code, detail = 300, 'success'
+        except FakeApiError as error:
+            code, detail = error.code, error.detail
+
+        request = {'operation': operation, 'ip': '127.0.0.1'}
+        if response_type == 'json':
+            data = {'request': request, 'reply': dict(code=code, detail=detail, **self._json_reply(reply))}
+            return 200, 'application/json', json.dumps(data).encode()
+        data = {'request': request, 'reply': dict(code=str(code), detail=detail, **reply)}
+        return 200, 'text/xml', xmltodict.unparse({'namesilo': data}).encode()
+
+    @staticmethod
+    def _json_item(item, numbers: Iterable[str] = ()):
+        if not isinstance(item, dict):
+            return item
+        converted = {'domain': item['#text']}
+        for key, value in item.items():
+            if key.startswith('@'):
+                key = key[1:]
+                converted[key] = (float(value) if key == 'price' else int(value)) if key in numbers else value
+        return converted
+
+    @classmethod
+    def _json_reply(cls, reply: dict) -> dict:
+        """
+        Reshape reply built in xmltodict form the way NameSilo sends type=json replies
+
+        Name servers are a list of position and nameserver objects,
+        domains carry attributes as plain keys instead of '@' and '#text'
+        and availability statuses are lists.
+        """
+        reply = dict(reply)
+        if 'nameservers' in reply:
+            reply['nameservers'] = [
+                {'position': int(name_server['@position']), 'nameserver': name_server['#text']}
+                for name_server in reply['nameservers']['nameserver']
+            ]
+        if 'domains' in reply:
+            reply['domains'] = {'domain': [cls._json_item(domain) for domain in reply['domains']['domain']]}
+        for status in ('available', 'unavailable', 'invalid'):
+            if status in reply:
+                reply[status] = [
+                    cls._json_item(domain, ('price', 'premium', 'duration')) for domain in reply[status]['domain']
+                ]
+        return reply
+
+    def _dispatch(self, operation: str, params: dict) -> dict:
+        for required in ('version', 'type', 'key'):
+            if required not in params:
+                raise FakeApiError({'version': 102, 'type': 104, 'key': 109}[required], f'Missing {required}')
+        if self.token is not None and params['key'] != self.token:
+            raise FakeApiError(110, 'Invalid API Key')
+
+        handler = getattr(self, f"_op_{operation}", None)
+        if handler is None:
+            raise FakeApiError(107, 'Invalid API operation')
+        with self._lock:
+            return handler(params)
+
+    def _domain(self, params: dict) -> FakeDomain:
+        if 'domain' not in params:
+            raise FakeApiError(108, 'Missing parameters')
+        domain = self.domains.get(params['domain'].lower())
+        if domain is None:
+            raise FakeApiError(200, 'Domain is not active, or does not belong to this user')
+        return domain
+
+    def _price(self, domain: str, index: int) -> float:
+        tld = domain.rsplit('.', 1)[-1]
+        if tld not in self.prices:
+            raise FakeApiError(267, 'Invalid domain name or extension')
+        return float(self.prices[tld][index].replace(',', ''))
+
+    def _charge(self, amount: float):
+        if amount > self.balance:
+            raise FakeApiError(119, 'Insufficient funds')
+        self.balance -= amount
+
+    def _set_flag(self, params: dict, attribute: str, value: bool, already_code: int) -> dict:
+        domain = self._domain(params)
+        if getattr(domain, attribute) == value:
+            raise FakeApiError(already_code, 'No change required')
+        setattr(domain, attribute, value)
+        return {}
+
+    @staticmethod
+    def _yes_no(value: bool) -> str:
+        return 'Yes' if value else 'No'
+
+    def _op_checkRegisterAvailability(self, params: dict) -> dict:
+        available, unavailable, invalid = [], [], []
+        for name in params.get('domains', '').split(','):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if '.' not in name or name.rsplit('.', 1)[-1] not in self.prices:
+                invalid.append(name)
+            elif name in self.domains:
+                unavailable.append(name)
+            else:
+                available.append({
+                    '@price': self.prices[name.rsplit('.', 1)[-1]][0], '@premium': '0', '@duration': '1',
+                    '#text': name
+                })
+        reply = {}
+        for status, domains in (('available', available), ('unavailable', unavailable), ('invalid', invalid)):
+            if domains:
+                reply[status] = {'domain': domains}
+        return reply
+
+    def _op_getDomainInfo(self, params: dict) -> dict:
+        domain = self._domain(params)
+        contact_id = next(iter(self.contacts), '')
+        return {
+            'created': domain.created.isoformat(),
+            'expires': domain.expires.isoformat(),
+            'status': 'Active',
+            'locked': self._yes_no(domain.locked),
+            'private': self._yes_no(domain.private),
+            'auto_renew': self._yes_no(domain.auto_renew),
+            'traffic_type': 'Custom DNS',
+            'email_verification_required': 'No',
+            'portfolio': '',
+            'forward_url': 'N/A',
+            'forward_type': 'N/A',
+            'nameservers': {'nameserver': [
+                {'@position': str(position), '#text': name_server}
+                for position, name_server in enumerate(domain.name_servers, 1)
+            ]},
+            'contact_ids': {
+                'registrant': contact_id, 'administrative': contact_id,
+                'technical': contact_id, 'billing': contact_id,
+            },
+        }
+
+    def _op_changeNameServers(self, params: dict) -> dict:
+        domain = self._domain(params)
+        name_servers = [params[f"ns{index}"] for index in range(1, 14) if params.get(f"ns{index}")]
+        if len(name_servers) < 2:
+            raise FakeApiError(254, 'At least two name servers are required')
+        domain.name_servers = name_servers
+        return {}
+
+    def _op_listDomains(self, params: dict) -> dict:
+        return {'domains': {'domain': [
+            {'@created': domain.created.isoformat(), '@expires': domain.expires.isoformat(), '#text': name}
+            for name, domain in sorted(self.domains.items())
+        ]}}
+
+    def _op_registerDomain(self, params: dict) -> dict:
+        name = params.get('domain', '').lower()
+        if name in self.domains:
+            raise FakeApiError(261, 'Domain is not available')
+        years = int(params.get('years', 1))
+        if not 1 <= years <= 10:
+            raise FakeApiError(263, 'Invalid number of years')
+        amount = self._price(name, 0) * years
+        self._charge(amount)
+        domain = self.add_domain(name)
+        domain.expires = _add_years(domain.created, years)
+        domain.private = params.get('private') == '1'
+        domain.auto_renew = params.get('auto_renew') == '1'
+        return {'message': 'Your domain registration was successfully processed.',
+                'domain': name, 'order_amount': f"{amount:.2f}"}
+
+    def _op_renewDomain(self, params: dict) -> dict:
+        domain = self._domain(params)
+        years = int(params.get('years', 1))
+        if not 1 <= years <= 10:
+            raise FakeApiError(263, 'Invalid number of years')
+        amount = self._price(domain.name, 1) * years
+        self._charge(amount)
+        domain.expires = _add_years(domain.expires, years)
+        return {'message': 'Your domain renewal was successfully processed.',
+                'domain': domain.name, 'order_amount': f"{amount:.2f}"}
+
+    def _op_domainLock(self, params: dict) -> dict:
+        return self._set_flag(params, 'locked', True, 252)
+
+    def _op_domainUnlock(self, params: dict) -> dict:
+        return self._set_flag(params, 'locked', False, 253)
+
+    def _op_addAutoRenewal(self, params: dict) -> dict:
+        return self._set_flag(params, 'auto_renew', True, 250)
+
+    def _op_removeAutoRenewal(self, params: dict) -> dict:
+        return self._set_flag(params, 'auto_renew', False, 251)
+
+    def _op_addPrivacy(self, params: dict) -> dict:
+        return self._set_flag(params, 'private', True, 255)
+
+    def _op_removePrivacy(self, params: dict) -> dict:
+        return self._set_flag(params, 'private', False, 256)
+
+    def _op_getPrices(self, params: dict) -> dict:
+        return {
+            tld: {'registration': registration, 'transfer': transfer, 'renew': renew}
+            for tld, (registration, renew, transfer) in self.prices.items()
+        }
+
+    def _op_contactList(self, params: dict) -> dict:
+        return {'contact': list(self.contacts.values())}
+
+    def _contact_from_params(self, params: dict) -> dict:
+        return {
+            'first_name': params.get('fn', ''), 'last_name': params.get('ln', ''),
+            'address': params.get('ad', ''), 'city': params.get('cy', ''), 'state': params.get('st', ''),
+            'zip': params.get('zp', ''), 'country': params.get('ct', ''), 'email': params.get('em', ''),
+            'phone': params.get('ph', ''),
+        }
+
+    def _op_contactAdd(self, params: dict) -> dict:
+        return {'contact_id': self.add_contact(**self._contact_from_params(params))}
+
+    def _op_contactUpdate(self, params: dict) -> dict:
+        contact_id = params.get('contact_id')
+        if contact_id not in self.contacts:
+            raise FakeApiError(210, 'Contact profile does not exist')
+        self.contacts[contact_id].update(self._contact_from_params(params))
+        return {}
+
+    def _op_contactDelete(self, params: dict) -> dict:
+        if self.contacts.pop(params.get('contact_id'), None) is None:
+            raise FakeApiError(210, 'Contact profile does not exist')
+        return {}
+
+    def _op_addAccountFunds(self, params: dict) -> dict:
+        self.balance += float(params.get('amount', 0))
+        return {'new_balance': f"{self.balance:,.2f}"}
+
+    def _op_getAccountBalance(self, params: dict) -> dict:
+        return {'balance': f"{self.balance:,.2f}"}
+
+    def _op_dnsListRecords(self, params: dict) -> dict:
+        domain = self._domain(params)
+        return {'resource_record': list(domain.records.values())}
+
+    def _record(self, domain: FakeDomain, params: dict, record_type: str) -> dict:
+        host = params.get('rrhost', '').lower()
+        if host and host != domain.name and not host.endswith(f".{domain.name}"):
+            host = f"{host}.{domain.name}"
+        return {
+            'type': record_type,
+            'host': host or domain.name,
+            'value': params.get('rrvalue', ''),
+            'ttl': params.get('rrttl', '7207'),
+            'distance': params.get('rrdistance', '0'),
+        }
+
+    def _op_dnsAddRecord(self, params: dict) -> dict:
+        domain = self._domain(params)
+        record_id = uuid.uuid4().hex
+        domain.records[record_id] = dict(record_id=record_id, **self._record(domain, params, params.get('rrtype', 'A')))
+        return {'record_id': record_id}
+
+    def _op_dnsUpdateRecord(self, params: dict) -> dict:
+        domain = self._domain(params)
+        current = domain.records.pop(params.get('rrid'), None)
+        if current is None:
+            raise FakeApiError(280, 'DNS modification error')
+        record_id = uuid.uuid4().hex
+        domain.records[record_id] = dict(record_id=record_id, **self._record(domain, params, current['type']))
+        return {'record_id': record_id}
+
+    def _op_dnsDeleteRecord(self, params: dict) -> dict:
+        domain = self._domain(params)
+        if domain.records.pop(params.get('rrid'), None) is None:
+            raise FakeApiError(280, 'DNS modification error')
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for NameSilo API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--token', default=None, help="accepted API key, any key by default")
+    parser.add_argument('--domains', type=int, default=100, help="number of domains in the account")
+    parser.add_argument('--balance', type=float, default=1000.0)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every reply")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of failing requests")
+    parser.add_argument('--error-codes', default='115,201', help="comma separated reply codes for errors")
+    parser.add_argument('--rate-limit', type=float, default=None, help="requests per second")
+    parser.add_argument('--burst', type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeNameSiloServer(
+        host=args.host, port=args.port, token=args.token,
+        domains=[f"domain-{index}.com" for index in range(args.domains)], balance=args.balance,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        error_codes=[int(code) for code in args.error_codes.split(',') if code],
+        rate_limit=args.rate_limit, burst=args.burst
+    )
+    print(f"Fake NameSilo API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
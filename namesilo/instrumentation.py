@@ -0,0 +1,158 @@
+import re
+import threading
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+__author__ = 'goran.vrbaski'
+
+_API_KEY = re.compile(r'(?<=[?&]key=)[^&\s\'"]*')
+
+current_call = ContextVar('namesilo_current_call', default=None)
+
+
+def scrub_url(url_extend: str) -> str:
+    """
+    Hide API key in request URL, or in any text containing request URLs
+    such as connection error messages
+
+    :param str url_extend: Request URL relative to API base URL
+    :rtype: str
+    """
+    return _API_KEY.sub('***', url_extend)
+
+
+class CallEvent:
+    def __init__(self, operation: str, url: str):
+        """
+        Measurements of single API call, passed to observers
+
+        Times are in seconds. connect is time until response headers
+        arrived (connection set up and server processing), transfer is
+        time reading response body, parse is time spent in response
+        parser and convert is time spent building result from parsed
+        response. Times of all attempts are summed when call was retried.
+        Failed call carries exception class in error and its message, with
+        API key scrubbed, in error_message; the exception itself is not
+        kept since its message or arguments may contain request URL.
+
+        :param str operation: API operation name, e.g. getDomainInfo
+        :param str url: Request URL with API key scrubbed
+        """
+        self.operation = operation
+        self.url = url
+        self.connect = 0.0
+        self.transfer = 0.0
+        self.parse = 0.0
+        self.convert = 0.0
+        self.total = 0.0
+        self.response_size = 0
+        self.code = None
+        self.retries = 0
+        self.cached = False
+        self.error = None
+        self.error_message = None
+        self._started = None
+        self._convert_started = None
+        self._context_token = None
+
+    def __repr__(self):
+        return f"CallEvent({self.operation!r}, code={self.code}, total={self.total:.4f}, " \
+               f"connect={self.connect:.4f}, transfer={self.transfer:.4f}, parse={self.parse:.4f}, " \
+               f"convert={self.convert:.4f}, size={self.response_size}, retries={self.retries})"
+
+
+class HistogramObserver:
+    PHASES = ('total', 'connect', 'transfer', 'parse', 'convert')
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, namespace: str = 'namesilo'):
+        """
+        Aggregate call events into per-operation histograms
+
+        Pass as observer to NameSilo and dump collected metrics with
+        to_prometheus().
+
+        :param buckets: Upper bounds of duration buckets in seconds
+        :param str namespace: Prefix of metric names
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._calls = {}
+        self._bytes = {}
+        self._retries = {}
+
+    def __call__(self, event: CallEvent):
+        with self._lock:
+            for phase in self.PHASES:
+                histogram = self._durations.setdefault(
+                    (event.operation, phase), [[0] * (len(self.buckets) + 1), 0.0, 0]
+                )
+                value = getattr(event, phase)
+                histogram[0][bisect_left(self.buckets, value)] += 1
+                histogram[1] += value
+                histogram[2] += 1
+
+            code = 'cached' if event.cached else str(event.code) if event.code is not None else 'error'
+            self._calls[event.operation, code] = self._calls.get((event.operation, code), 0) + 1
+            self._bytes[event.operation] = self._bytes.get(event.operation, 0) + event.response_size
+            self._retries[event.operation] = self._retries.get(event.operation, 0) + event.retries
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+    def to_prometheus(self) -> str:
+        """
+        Dump metrics in Prometheus text exposition format
+
+        :rtype: str
+        """
+        name = f"{self.namespace}_call_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of NameSilo API calls by phase",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for (operation, phase), (counts, total, count) in sorted(self._durations.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(
+                        f"{name}_bucket{{{self._labels(operation=operation, phase=phase, le=le)}}} {cumulative}"
+                    )
+                labels = self._labels(operation=operation, phase=phase)
+                lines.append(f"{name}_sum{{{labels}}} {total}")
+                lines.append(f"{name}_count{{{labels}}} {count}")
+
+            for metric, help_text, values, label in (
+                ('calls_total', 'NameSilo API calls by reply code', self._calls, None),
+                ('response_bytes_total', 'Bytes received from NameSilo API', self._bytes, 'operation'),
+                ('retries_total', 'Retried NameSilo API requests', self._retries, 'operation'),
+            ):
+                lines.append(f"# HELP {self.namespace}_{metric} {help_text}")
+                lines.append(f"# TYPE {self.namespace}_{metric} counter")
+                for key, value in sorted(values.items()):
+                    labels = self._labels(operation=key) if label else self._labels(operation=key[0], code=key[1])
+                    lines.append(f"{self.namespace}_{metric}{{{labels}}} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def record(**measurements):
+    """
+    Add measurements to event of API call in progress, if any
+
+    Durations and sizes are added, other values replaced.
+    """
+    event: Optional[CallEvent] = current_call.get()
+    if event is None:
+        return
+    for name, value in measurements.items():
+        if isinstance(value, float) or name == 'response_size':
+            setattr(event, name, getattr(event, name) + value)
+        else:
+            setattr(event, name, value)
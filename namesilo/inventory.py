@@ -0,0 +1,226 @@
+import sqlite3
+import threading
+import time
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from namesilo.common.models import parse_date
+
+__author__ = 'goran.vrbaski'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS domains (
+    name TEXT PRIMARY KEY,
+    created TEXT,
+    expires TEXT,
+    status TEXT,
+    locked INTEGER,
+    private INTEGER,
+    auto_renew INTEGER,
+    traffic_type TEXT,
+    fetched_at REAL
+);
+CREATE INDEX IF NOT EXISTS domains_expires ON domains (expires);
+CREATE INDEX IF NOT EXISTS domains_fetched_at ON domains (fetched_at);
+CREATE TABLE IF NOT EXISTS name_servers (
+    domain TEXT NOT NULL REFERENCES domains (name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name_server TEXT NOT NULL,
+    PRIMARY KEY (domain, position)
+);
+CREATE INDEX IF NOT EXISTS name_servers_name_server ON name_servers (name_server);
+"""
+
+
+class InventoryDomain:
+    __slots__ = ('name', 'created', 'expires', 'status', 'locked', 'private', 'auto_renew',
+                 'traffic_type', 'name_servers', 'fetched_at')
+
+    def __init__(self, name, created, expires, status, locked, private, auto_renew, traffic_type,
+                 name_servers, fetched_at):
+        """
+        Domain state stored in Inventory, same fields as DomainInfo
+
+        :param float fetched_at: Unix time domain info was fetched
+        """
+        self.name = name
+        self.created = parse_date(created)
+        self.expires = parse_date(expires)
+        self.status = status
+        self.locked = bool(locked)
+        self.private = bool(private)
+        self.auto_renew = bool(auto_renew)
+        self.traffic_type = traffic_type
+        self.name_servers = name_servers
+        self.fetched_at = fetched_at
+
+    def __repr__(self):
+        return f"InventoryDomain({self.name!r}, expires={self.expires}, locked={self.locked}, " \
+               f"private={self.private}, auto_renew={self.auto_renew})"
+
+
+class InventoryRefresh:
+    def __init__(self):
+        """
+        Outcome of Inventory.refresh
+        """
+        self.fetched = []
+        self.unchanged = 0
+        self.removed = []
+        self.failed = {}
+
+    def __repr__(self):
+        return f"InventoryRefresh(fetched={len(self.fetched)}, unchanged={self.unchanged}, " \
+               f"removed={len(self.removed)}, failed={len(self.failed)})"
+
+
+class Inventory:
+    def __init__(self, client, path: str = ':memory:', max_age: float = 86400):
+        """
+        Local SQLite mirror of account domains and their DomainInfo
+
+        refresh() lists account domains and fetches info only for new
+        domains and domains fetched more than max_age seconds ago,
+        queries run against the local database.
+
+        :param NameSilo client: Client used for refreshing
+        :param str path: SQLite database path, in memory by default
+        :param float max_age: Seconds after which domain info is fetched again
+        """
+        self._client = client
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM domains")[0][0]
+
+    def close(self):
+        self._connection.close()
+
+    def _query(self, sql: str, parameters: Iterable = ()) -> list:
+        with self._lock:
+            return self._connection.execute(sql, tuple(parameters)).fetchall()
+
+    def refresh(self, max_age: float = None, max_workers: int = None, rate: float = None) -> InventoryRefresh:
+        """
+        Bring inventory up to date with the account
+
+        :param float max_age: Overrides max_age given on creation, 0 fetches every domain
+        :param int max_workers: Number of concurrent getDomainInfo calls
+        :param float rate: Maximum number of getDomainInfo calls per second
+        :rtype: InventoryRefresh
+        """
+        max_age = self.max_age if max_age is None else max_age
+        result = InventoryRefresh()
+        names = {summary.name.lower() for summary in self._client.list_domains(models=True)}
+        known = dict(self._query("SELECT name, fetched_at FROM domains"))
+
+        result.removed = sorted(set(known) - names)
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM domains WHERE name = ?", [(name,) for name in result.removed])
+
+        threshold = time.time() - max_age
+        stale = sorted(name for name in names if known.get(name) is None or known[name] <= threshold)
+        result.unchanged = len(names) - len(stale)
+
+        for domain_result in self._client.get_domains_info(stale, max_workers=max_workers, rate=rate):
+            if not domain_result.ok:
+                result.failed[domain_result.domain] = domain_result.error
+                continue
+            self.store(domain_result.domain, domain_result.value)
+            result.fetched.append(domain_result.domain)
+        return result
+
+    def store(self, name: str, info, fetched_at: float = None):
+        """
+        Save DomainInfo of domain
+
+        :param str name: Domain name
+        :param DomainInfo info: Domain information
+        :param float fetched_at: Unix time info was fetched, now by default
+        """
+        name = name.lower()
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO domains VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, info.created and info.created.isoformat(), info.expires and info.expires.isoformat(),
+                 info.status, info.locked, info.private, info.auto_renew, info.traffic_type, fetched_at)
+            )
+            self._connection.execute("DELETE FROM name_servers WHERE domain = ?", (name,))
+            self._connection.executemany(
+                "INSERT INTO name_servers VALUES (?, ?, ?)",
+                [(name, position, name_server.lower()) for position, name_server in enumerate(info.name_servers, 1)]
+            )
+
+    def domains(self, names: Iterable[str] = None) -> Dict[str, InventoryDomain]:
+        """
+        Stored state of domains
+
+        :param names: Domain names, all stored domains by default
+        :return: State for each stored domain
+        :rtype: dict
+        """
+        rows = self._query("SELECT * FROM domains ORDER BY name")
+        name_servers = {}
+        for domain, name_server in self._query("SELECT domain, name_server FROM name_servers "
+                                               "ORDER BY domain, position"):
+            name_servers.setdefault(domain, []).append(name_server)
+
+        wanted = {name.lower() for name in names} if names is not None else None
+        return {
+            row[0]: InventoryDomain(*row[:8], name_servers.get(row[0], []), row[8])
+            for row in rows if wanted is None or row[0] in wanted
+        }
+
+    def expiring_within(self, days: int, today: date = None) -> List[str]:
+        """
+        Domains expiring in the next days, including already expired
+
+        :param int days: Number of days from today
+        :param date today: Reference date, today by default
+        :rtype: list
+        """
+        limit = (today or date.today()) + timedelta(days=days)
+        return [name for name, in self._query(
+            "SELECT name FROM domains WHERE expires IS NOT NULL AND expires <= ? ORDER BY expires, name",
+            (limit.isoformat(),)
+        )]
+
+    def using_nameservers(self, *name_servers: str, match_all: bool = False) -> List[str]:
+        """
+        Domains delegated to given name servers
+
+        :param name_servers: Name server host names
+        :param bool match_all: Domain must use all given name servers, any of them by default
+        :rtype: list
+        """
+        name_servers = sorted({name_server.lower().rstrip('.') for name_server in name_servers})
+        if not name_servers:
+            return []
+        placeholders = ', '.join('?' * len(name_servers))
+        having = f"HAVING COUNT(DISTINCT name_server) = {len(name_servers)}" if match_all else ""
+        return [name for name, in self._query(
+            f"SELECT domain FROM name_servers WHERE name_server IN ({placeholders}) "
+            f"GROUP BY domain {having} ORDER BY domain",
+            name_servers
+        )]
+
+    def stale(self, max_age: float = None) -> List[str]:
+        """
+        Stored domains fetched more than max_age seconds ago
+        """
+        max_age = self.max_age if max_age is None else max_age
+        return [name for name, in self._query(
+            "SELECT name FROM domains WHERE fetched_at <= ? ORDER BY name", (time.time() - max_age,)
+        )]
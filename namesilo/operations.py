@@ -0,0 +1,55 @@
+from urllib.parse import unquote
+
+__author__ = 'goran.vrbaski'
+
+READ_OPERATIONS = frozenset({
+    'checkRegisterAvailability',
+    'contactList',
+    'dnsListRecords',
+    'getAccountBalance',
+    'getDomainInfo',
+    'getPrices',
+    'listDomains',
+})
+
+
+def operation_name(url_extend: str) -> str:
+    """
+    Returns API operation name of request, e.g. getDomainInfo
+
+    :param str url_extend: Request URL relative to API base URL
+    :rtype: str
+    """
+    operation = getattr(url_extend, 'operation', None)
+    if operation is not None:
+        return operation
+    return url_extend.split('?', 1)[0]
+
+
+def is_read_operation(operation: str) -> bool:
+    """
+    Read operations don't change anything and can be safely repeated
+
+    :param str operation: API operation name
+    :rtype: bool
+    """
+    return operation in READ_OPERATIONS
+
+
+def request_domain(url_extend: str):
+    """
+    Returns domain name request operates on, None for account-wide requests
+
+    :param str url_extend: Request URL relative to API base URL
+    :rtype: str
+    """
+    params = getattr(url_extend, 'params', None)
+    if params is not None:
+        domain = params.get('domain')
+        return str(domain).lower() if domain is not None else None
+
+    query = url_extend.split('?', 1)[1] if '?' in url_extend else ''
+    for parameter in query.split('&'):
+        if parameter.startswith('domain='):
+            return unquote(parameter[7:]).lower()
+    return None
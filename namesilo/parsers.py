@@ -0,0 +1,180 @@
+import json
+import xmltodict
+
+from typing import Callable, Iterator
+from xml.etree import ElementTree
+
+__author__ = 'goran.vrbaski'
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class XmlParser:
+    """Parser for type=xml responses"""
+    response_type = 'xml'
+
+    def parse(self, content: bytes) -> dict:
+        """
+        Parse API response body
+
+        :param bytes content: Response body
+        :return: Parsed response, {'namesilo': {'request': ..., 'reply': ...}}
+        :rtype: dict
+        """
+        return xmltodict.parse(content)
+
+
+class JsonParser:
+    """
+    Parser for type=json responses
+
+    JSON replies are normalized to the structure XmlParser produces,
+    so models and client methods work the same for both formats.
+    """
+    response_type = 'json'
+
+    def __init__(self, loads=None):
+        """
+        :param loads: JSON decoder function, defaults to orjson.loads when
+                      orjson is installed, json.loads otherwise
+        """
+        if loads is None:
+            loads = orjson.loads if orjson is not None else json.loads
+        self._loads = loads
+
+    def parse(self, content: bytes) -> dict:
+        data = self._loads(content)
+        reply = data.get('reply')
+        if isinstance(reply, dict):
+            data['reply'] = self._normalize_reply(reply)
+        return {'namesilo': data}
+
+    @classmethod
+    def _normalize_reply(cls, reply: dict) -> dict:
+        reply = cls._stringify(reply)
+        if isinstance(reply.get('nameservers'), list):
+            reply['nameservers'] = {
+                'nameserver': [
+                    {'@position': name_server.get('position'), '#text': name_server.get('nameserver')}
+                    for name_server in reply['nameservers']
+                ]
+            }
+
+        domains = reply.get('domains')
+        if isinstance(domains, dict) and isinstance(domains.get('domain'), list):
+            domains['domain'] = [cls._normalize_domain(domain) for domain in domains['domain']]
+        elif isinstance(domains, dict) and isinstance(domains.get('domain'), dict):
+            domains['domain'] = cls._normalize_domain(domains['domain'])
+
+        for status in ('available', 'unavailable', 'invalid'):
+            if isinstance(reply.get(status), list):
+                reply[status] = {'domain': [cls._normalize_domain(domain) for domain in reply[status]]}
+        return reply
+
+    @staticmethod
+    def _normalize_domain(domain):
+        if not isinstance(domain, dict):
+            return domain
+        normalized = {f"@{key}": value for key, value in domain.items() if key != 'domain'}
+        normalized['#text'] = domain['domain']
+        return normalized
+
+    @classmethod
+    def _stringify(cls, data):
+        """
+        XML replies contain only strings, convert numbers the same way
+        """
+        if isinstance(data, dict):
+            return {key: cls._stringify(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [cls._stringify(value) for value in data]
+        if isinstance(data, bool):
+            return str(int(data))
+        if isinstance(data, (int, float)):
+            return str(data)
+        return data
+
+
+class XmlStreamParser:
+    """
+    Incremental parser for type=xml responses with many repeated records
+
+    Response body is fed in chunks, every complete record element is
+    returned as soon as it is parsed and dropped from the tree, so
+    memory use does not grow with number of records.
+    """
+
+    def __init__(self, record_tag: str, check_error_code: Callable):
+        """
+        :param str record_tag: Tag of repeated record element, e.g. domain
+        :param check_error_code: Called with (code, detail) of the reply
+        """
+        self._record_tag = record_tag
+        self._check_error_code = check_error_code
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._stack = []
+        self._code = None
+
+    def feed(self, chunk: bytes) -> Iterator:
+        """
+        Parse next chunk of response body
+
+        :param bytes chunk: Part of response body
+        :return: Records completed by this chunk
+        """
+        self._parser.feed(chunk)
+        return self._read_events()
+
+    def close(self) -> Iterator:
+        """
+        Finish parsing, returns records left in the parser
+        """
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._stack.append(element)
+                continue
+
+            self._stack.pop()
+            parent = self._stack[-1].tag if self._stack else None
+            if parent == 'reply' and element.tag == 'code':
+                self._code = int(element.text)
+            elif parent == 'reply' and element.tag == 'detail':
+                self._check_error_code((self._code, element.text))
+            elif element.tag == self._record_tag and self._stack:
+                yield self._record(element)
+                self._stack[-1].remove(element)
+
+    @staticmethod
+    def _record(element):
+        if len(element):
+            return {child.tag: child.text for child in element}
+        return element.text
+
+
+parsers = {
+    'xml': XmlParser,
+    'json': JsonParser,
+}
+
+
+def get_parser(response_format: str):
+    """
+    Create parser for given response format
+
+    :param str response_format: xml or json
+    :return: Parser instance
+    """
+    try:
+        return parsers[response_format]()
+    except KeyError:
+        raise ValueError(
+            f"Unsupported response format: {response_format}, "
+            f"choose one of: {', '.join(parsers)}"
+        )
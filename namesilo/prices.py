@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+from typing import Awaitable, Callable, Dict, Optional
+
+from namesilo.common import TldPrice
+
+__author__ = 'goran.vrbaski'
+
+
+def find_tld_price(prices: Dict[str, TldPrice], domain: str) -> Optional[TldPrice]:
+    """
+    Price of domain's TLD, longest matching suffix wins (co.uk over uk)
+
+    :param dict prices: Prices for each TLD, e.g. result of get_tld_prices()
+    :param str domain: Domain name
+    :rtype: TldPrice
+    """
+    labels = domain.lower().rstrip('.').split('.')
+    for index in range(1, len(labels)):
+        price = prices.get('.'.join(labels[index:]))
+        if price is not None:
+            return price
+    return None
+
+
+class PriceCache:
+    def __init__(self, ttl: float = 3600, max_stale: float = None, path: str = None):
+        """
+        Cache for TLD prices with stale-while-revalidate refresh
+
+        Fresh prices are served from memory. Once prices are older than
+        ttl they are still served while single background refresh
+        fetches new ones. Prices older than ttl + max_stale, or missing,
+        are refreshed before returning, by one caller while concurrent
+        callers wait for its result. When path is set prices are
+        persisted to that file so new process starts with warm cache,
+        failure to write the file is ignored.
+
+        :param float ttl: Seconds prices are considered fresh
+        :param float max_stale: Seconds stale prices may be served, unlimited by default
+        :param str path: File for persisting prices between processes
+        """
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.path = path
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._async_fetch_lock = None
+        self._prices = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        if path is not None:
+            self._load()
+
+    @property
+    def age(self) -> Optional[float]:
+        """
+        Seconds since prices were fetched, None when cache is empty
+        """
+        if self._prices is None:
+            return None
+        return time.time() - self._fetched_at
+
+    def _is_expired(self) -> bool:
+        age = self.age
+        if age is None:
+            return True
+        return self.max_stale is not None and age > self.ttl + self.max_stale
+
+    def _start_refresh(self) -> bool:
+        age = self.age
+        with self._lock:
+            if self._refreshing or age is None or age <= self.ttl:
+                return False
+            self._refreshing = True
+            return True
+
+    def _refresh(self, fetch: Callable[[], Dict[str, TldPrice]]):
+        try:
+            self.update(fetch())
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
+
+    async def _refresh_async(self, fetch: Callable[[], Awaitable[Dict[str, TldPrice]]]):
+        try:
+            self.update(await fetch())
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
+
+    def get(self, fetch: Callable[[], Dict[str, TldPrice]]) -> Dict[str, TldPrice]:
+        """
+        Returns cached prices, calling fetch when they need refresh
+
+        :param fetch: Function returning current prices from API
+        :rtype: dict
+        """
+        if self._is_expired():
+            with self._fetch_lock:
+                if self._is_expired():
+                    self.update(fetch())
+        prices = self._prices
+        if self._start_refresh():
+            threading.Thread(target=self._refresh, args=(fetch,), daemon=True).start()
+        return prices
+
+    async def get_async(self, fetch: Callable[[], Awaitable[Dict[str, TldPrice]]]) -> Dict[str, TldPrice]:
+        """
+        Returns cached prices, awaiting fetch when they need refresh
+
+        :param fetch: Coroutine function returning current prices from API
+        :rtype: dict
+        """
+        if self._is_expired():
+            if self._async_fetch_lock is None:
+                self._async_fetch_lock = asyncio.Lock()
+            async with self._async_fetch_lock:
+                if self._is_expired():
+                    self.update(await fetch())
+        elif self._start_refresh():
+            asyncio.ensure_future(self._refresh_async(fetch))
+        return self._prices
+
+    def update(self, prices: Dict[str, TldPrice], fetched_at: float = None):
+        """
+        Replace cached prices
+
+        :param dict prices: Prices for each TLD
+        :param float fetched_at: Unix time prices were fetched, now by default
+        """
+        with self._lock:
+            self._prices = prices
+            self._fetched_at = time.time() if fetched_at is None else fetched_at
+        if self.path is not None:
+            try:
+                self._save()
+            except OSError:
+                pass
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as cache_file:
+                data = json.load(cache_file)
+            prices = {
+                tld: TldPrice(tld, *price) for tld, price in data['prices'].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self._prices = prices
+        self._fetched_at = data.get('fetched_at', 0.0)
+
+    def _save(self):
+        data = {
+            'fetched_at': self._fetched_at,
+            'prices': {
+                tld: [price.registration, price.renew, price.transfer]
+                for tld, price in self._prices.items()
+            }
+        }
+        temporary_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as cache_file:
+            json.dump(data, cache_file)
+        os.replace(temporary_path, self.path)
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import struct
+import threading
+import time
+
+__author__ = 'goran.vrbaski'
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Token bucket rate limiter, safe to share between threads
+
+        Bucket holds up to burst tokens and refills at rate tokens per
+        second. Every request takes one token, when the bucket is empty
+        callers wait in order of arrival.
+
+        :param float rate: Allowed requests per second
+        :param int burst: Number of requests allowed at once
+        """
+        if rate <= 0:
+            raise ValueError("rate must be greater than zero")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _take(self, tokens: float, updated: float, now: float):
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, now, wait
+
+    def _take_available(self, tokens: float, updated: float, now: float):
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, True
+        return tokens, now, False
+
+    def _apply(self, take):
+        with self._lock:
+            self._tokens, self._updated, result = take(self._tokens, self._updated, time.monotonic())
+        return result
+
+    def reserve(self) -> float:
+        """
+        Take one token without blocking
+
+        :return: Seconds to wait before sending the request
+        :rtype: float
+        """
+        return self._apply(self._take)
+
+    def try_acquire(self) -> bool:
+        """
+        Take one token only if one is available now
+
+        Unlike reserve, nothing is taken when the bucket is empty, so
+        rejected requests don't delay the following ones.
+
+        :return: True when token was taken
+        :rtype: bool
+        """
+        return self._apply(self._take_available)
+
+    def acquire(self):
+        """
+        Take one token, blocking until request may be sent
+        """
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Take one token, waiting on event loop until request may be sent
+        """
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class FileTokenBucket(TokenBucket):
+    _state = struct.Struct('dd')
+
+    def __init__(self, path: str, rate: float, burst: int = 1):
+        """
+        Token bucket stored in local file, shared between processes
+
+        Every process using the same path and API key draws from one
+        bucket. Bucket state is protected with flock, available on
+        POSIX systems only.
+
+        :param str path: Path of file holding bucket state
+        :param float rate: Allowed requests per second
+        :param int burst: Number of requests allowed at once
+        """
+        try:
+            import fcntl
+        except ImportError:
+            raise RuntimeError("FileTokenBucket requires POSIX file locking (fcntl)")
+
+        super().__init__(rate, burst)
+        self.path = path
+        self._fcntl = fcntl
+
+    def _apply(self, take):
+        descriptor = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._fcntl.flock(descriptor, self._fcntl.LOCK_EX)
+            data = os.pread(descriptor, self._state.size, 0)
+            now = time.time()
+            if len(data) == self._state.size:
+                tokens, updated = self._state.unpack(data)
+            else:
+                tokens, updated = float(self.burst), now
+
+            tokens, updated, result = take(tokens, updated, now)
+            os.pwrite(descriptor, self._state.pack(tokens, updated), 0)
+            return result
+        finally:
+            os.close(descriptor)
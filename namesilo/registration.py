@@ -0,0 +1,149 @@
+import threading
+
+from typing import Dict, Iterable
+
+from namesilo.common import DomainResult
+from namesilo.exceptions import InsufficientFunds
+from namesilo.prices import find_tld_price
+
+__author__ = 'goran.vrbaski'
+
+
+class BudgetLedger:
+    def __init__(self, balance: float):
+        """
+        Local account balance with reservations, safe to share between threads
+
+        :param float balance: Account balance read from API
+        """
+        self.balance = balance
+        self.reserved = 0.0
+        self.spent = 0.0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"BudgetLedger(balance={self.balance:.2f}, reserved={self.reserved:.2f}, spent={self.spent:.2f})"
+
+    @property
+    def available(self) -> float:
+        return self.balance - self.reserved
+
+    def reserve(self, amount: float) -> bool:
+        """
+        Reserve amount when balance covers it
+
+        :param float amount: Amount to reserve
+        :return: True when amount was reserved
+        :rtype: bool
+        """
+        with self._lock:
+            if amount > self.balance - self.reserved + 1e-9:
+                return False
+            self.reserved += amount
+            return True
+
+    def commit(self, amount: float):
+        """
+        Turn reservation into spending after successful order
+        """
+        with self._lock:
+            self.reserved -= amount
+            self.balance -= amount
+            self.spent += amount
+
+    def release(self, amount: float):
+        """
+        Drop reservation of failed order
+        """
+        with self._lock:
+            self.reserved -= amount
+
+    def deposit(self, amount: float):
+        """
+        Add funds added to account
+        """
+        with self._lock:
+            self.balance += amount
+
+
+class BulkRegistrar:
+    def __init__(self, client, payment_id: int = None, top_up_below: float = None, top_up_amount: float = None):
+        """
+        Register many domains concurrently without overspending
+
+        Account balance is read once per run and price of every domain
+        (TLD registration price from get_tld_prices, so a PriceCache is
+        reused) is reserved in a BudgetLedger before registerDomain is
+        sent. Domains the balance doesn't cover fail locally with
+        InsufficientFunds instead of in the API. Premium domains cost
+        more than the TLD price, the API rejects them when balance is
+        short.
+
+        When top_up_amount is set, account is topped up with
+        add_account_funds whenever available balance would drop below
+        top_up_below.
+
+        :param NameSilo client: Client used for the calls
+        :param int payment_id: ID of payment used for top-ups
+        :param float top_up_below: Available balance that triggers top-up
+        :param float top_up_amount: Amount added by single top-up
+        """
+        if top_up_amount is not None and payment_id is None:
+            raise ValueError("payment_id is required for top-ups")
+        self._client = client
+        self.payment_id = payment_id
+        self.top_up_below = top_up_below or 0.0
+        self.top_up_amount = top_up_amount
+        self.ledger = None
+        self._top_up_lock = threading.Lock()
+
+    def _reserve(self, ledger: BudgetLedger, amount: float) -> bool:
+        if self.top_up_amount is None:
+            return ledger.reserve(amount)
+        with self._top_up_lock:
+            if ledger.available - amount < self.top_up_below:
+                self._client.add_account_funds(self.top_up_amount, self.payment_id)
+                ledger.deposit(self.top_up_amount)
+            return ledger.reserve(amount)
+
+    def _register(self, ledger: BudgetLedger, prices: dict, years: int, auto_renew: int, private: int, domain: str):
+        price = find_tld_price(prices, domain)
+        if price is None or price.registration is None:
+            raise ValueError(f"No registration price for {domain}")
+        amount = round(price.registration * years, 2)
+
+        if not self._reserve(ledger, amount):
+            raise InsufficientFunds(f"Registration of {domain} for {amount:.2f} exceeds "
+                                    f"available balance {ledger.available:.2f}")
+        try:
+            result = self._client.register_domain(domain, years=years, auto_renew=auto_renew, private=private)
+        except Exception:
+            ledger.release(amount)
+            raise
+        ledger.commit(amount)
+        return result
+
+    def register(self, domains: Iterable[str], years: int = 1, auto_renew: int = 0, private: int = 0,
+                 max_workers: int = None, rate: float = None) -> Dict[str, DomainResult]:
+        """
+        Register domains concurrently within account balance
+
+        :param domains: Domain names to register
+        :param int years: how long to register domains
+        :param int auto_renew: turn on or off auto-renewal option
+        :param int private: hide your private information (WHOIS)
+        :param int max_workers: Number of concurrent registerDomain calls, defaults to pool size
+        :param float rate: Maximum number of registerDomain calls per second
+        :return: DomainResult for each domain, failure for one domain doesn't stop the others
+        :rtype: dict
+        """
+        prices = self._client.get_tld_prices()
+        self.ledger = BudgetLedger(self._client.get_account_balance())
+
+        def register(domain):
+            return self._register(self.ledger, prices, years, auto_renew, private, domain)
+
+        return {
+            result.domain: result
+            for result in self._client._fan_out(register, dict.fromkeys(domains), max_workers, rate)
+        }
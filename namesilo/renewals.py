@@ -0,0 +1,207 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from namesilo.common import DomainResult
+from namesilo.exceptions import InsufficientFunds, OperationSkipped
+from namesilo.prices import find_tld_price
+
+__author__ = 'goran.vrbaski'
+
+
+class RenewalItem:
+    __slots__ = ('domain', 'expires', 'price')
+
+    def __init__(self, domain, expires, price):
+        """
+        Domain scheduled for renewal
+
+        :param str domain: Domain name
+        :param date expires: Expiration date
+        :param float price: Renewal price for all renewed years, None when TLD has no price
+        """
+        self.domain = domain
+        self.expires = expires
+        self.price = price
+
+    def __repr__(self):
+        return f"RenewalItem({self.domain!r}, expires={self.expires}, price={self.price})"
+
+
+class RenewalGroup:
+    def __init__(self, start: date, end: date):
+        """
+        Domains expiring in the same window, both dates included
+
+        :param date start: First day of window
+        :param date end: Last day of window
+        """
+        self.start = start
+        self.end = end
+        self.items = []
+
+    def __repr__(self):
+        return f"RenewalGroup({self.start} - {self.end}, domains={len(self.items)}, total={self.total:.2f})"
+
+    @property
+    def total(self) -> float:
+        return sum(item.price for item in self.items)
+
+
+class RenewalPlan:
+    def __init__(self, today: date, years: int, balance: float):
+        """
+        Upcoming renewals grouped by expiry window, see RenewalPlanner.plan
+
+        :param date today: Date plan was made for
+        :param int years: Number of years each domain is renewed for
+        :param float balance: Account balance when plan was made
+        """
+        self.today = today
+        self.years = years
+        self.balance = balance
+        self.groups = []
+        self.unpriced = []
+        self.failed = {}
+
+    def __repr__(self):
+        return f"RenewalPlan(domains={len(self.items)}, total={self.total:.2f}, balance={self.balance:.2f}, " \
+               f"unpriced={len(self.unpriced)}, failed={len(self.failed)})"
+
+    @property
+    def items(self) -> List[RenewalItem]:
+        return [item for group in self.groups for item in group.items]
+
+    @property
+    def total(self) -> float:
+        return sum(group.total for group in self.groups)
+
+    @property
+    def affordable(self) -> bool:
+        return self.total <= self.balance
+
+
+class RenewalPlanner:
+    def __init__(self, client, window_days: int = 30):
+        """
+        Plan, price and run renewals of domains expiring soon
+
+        Expiration dates come from listDomains reply, getDomainInfo is
+        called concurrently only for domains the reply has no dates for.
+        Prices come from get_tld_prices and account balance is read once
+        per plan.
+
+        :param NameSilo client: Client used for the calls
+        :param int window_days: Length of expiry window domains are grouped by
+        """
+        if window_days < 1:
+            raise ValueError("window_days must be at least 1")
+        self._client = client
+        self.window_days = window_days
+
+    def _expirations(self, domains, known_state, max_workers, rate, failed) -> Dict[str, date]:
+        if hasattr(known_state, 'domains'):
+            known_state = known_state.domains(domains)
+        if known_state is not None:
+            return {
+                name: info.expires for name, info in known_state.items()
+                if info.expires is not None and (domains is None or name in domains)
+            }
+
+        expirations = {}
+        for summary in self._client.list_domains(models=True):
+            name = summary.name.lower()
+            if domains is None or name in domains:
+                expirations[name] = summary.expires
+        missing = [name for name in domains or () if name not in expirations]
+        missing += [name for name, expires in expirations.items() if expires is None]
+
+        for result in self._client.get_domains_info(missing, max_workers=max_workers, rate=rate, lazy=True):
+            if result.ok:
+                expirations[result.domain] = result.value.expires
+            else:
+                expirations.pop(result.domain, None)
+                failed[result.domain] = result.error
+        return {name: expires for name, expires in expirations.items() if expires is not None}
+
+    def plan(self, within_days: int = 90, years: int = 1, domains: Iterable[str] = None, known_state=None,
+             today: date = None, max_workers: int = None, rate: float = None) -> RenewalPlan:
+        """
+        Find domains expiring within given days and price their renewal
+
+        Already expired domains fall into the first window.
+
+        :param int within_days: Days from today to look ahead
+        :param int years: Number of years to renew for
+        :param domains: Domain names to consider, all account domains by default
+        :param known_state: Known domain state, dict of DomainInfo by domain name or Inventory,
+                            skips fetching expiration dates from API
+        :param date today: Reference date, today by default
+        :param int max_workers: Number of concurrent getDomainInfo calls
+        :param float rate: Maximum number of getDomainInfo calls per second
+        :rtype: RenewalPlan
+        """
+        today = today or date.today()
+        domains = {name.lower() for name in domains} if domains is not None else None
+        plan = RenewalPlan(today, years, 0.0)
+        expirations = self._expirations(domains, known_state, max_workers, rate, plan.failed)
+
+        limit = today + timedelta(days=within_days)
+        prices = self._client.get_tld_prices()
+        groups = {}
+        for name, expires in sorted(expirations.items(), key=lambda item: (item[1], item[0])):
+            if expires > limit:
+                continue
+            price = find_tld_price(prices, name)
+            if price is None or price.renew is None:
+                plan.unpriced.append(name)
+                continue
+            window = max((expires - today).days, 0) // self.window_days
+            group = groups.get(window)
+            if group is None:
+                start = today + timedelta(days=window * self.window_days)
+                group = groups[window] = RenewalGroup(start, start + timedelta(days=self.window_days - 1))
+            group.items.append(RenewalItem(name, expires, round(price.renew * years, 2)))
+
+        plan.groups = [groups[window] for window in sorted(groups)]
+        plan.balance = self._client.get_account_balance()
+        return plan
+
+    def renew(self, plan: RenewalPlan, allow_partial: bool = False, max_workers: int = None,
+              rate: float = None) -> Dict[str, DomainResult]:
+        """
+        Renew all priced domains of plan concurrently
+
+        :param RenewalPlan plan: Plan made by plan()
+        :param bool allow_partial: When balance doesn't cover the plan, renew domains
+                                   in order of expiration until the first one balance
+                                   doesn't cover, that one and all later are skipped
+                                   with OperationSkipped as error
+        :param int max_workers: Number of concurrent renewDomain calls
+        :param float rate: Maximum number of renewDomain calls per second
+        :return: DomainResult for each domain of plan
+        :rtype: dict
+        """
+        if not plan.affordable and not allow_partial:
+            raise InsufficientFunds(f"Renewals cost {plan.total:.2f}, account balance is {plan.balance:.2f}")
+
+        results = {}
+        renewed = []
+        budget = plan.balance
+        items = plan.items
+        for index, item in enumerate(items):
+            if item.price > budget:
+                for skipped in items[index:]:
+                    results[skipped.domain] = DomainResult(skipped.domain, error=OperationSkipped(
+                        f"Renewal of {skipped.domain} skipped, balance {budget:.2f} ran out "
+                        f"at {item.domain} expiring {item.expires}"
+                    ))
+                break
+            budget -= item.price
+            renewed.append(item.domain)
+
+        def renew(domain):
+            return self._client.renew_domain(domain, years=plan.years)
+
+        for result in self._client._fan_out(renew, renewed, max_workers, rate):
+            results[result.domain] = result
+        return results
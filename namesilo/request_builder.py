@@ -0,0 +1,75 @@
+import re
+
+from urllib.parse import quote
+
+__author__ = 'goran.vrbaski'
+
+SAFE_CHARACTERS = "@:/,"
+_SAFE_VALUE = re.compile(r'[A-Za-z0-9_.\-~@:/,]*\Z')
+
+
+class ApiRequest(str):
+    """
+    Request URL relative to API base URL, carrying operation name and
+    parameters it was built from, so they don't have to be parsed back
+    out of the URL
+    """
+
+    def __new__(cls, url: str, operation: str, params: dict):
+        request = super().__new__(cls, url)
+        request.operation = operation
+        request.params = params
+        return request
+
+
+def encode(value) -> str:
+    """
+    Percent-encode query parameter value
+
+    :param value: Parameter value, converted with str
+    :rtype: str
+    """
+    value = value if isinstance(value, str) else str(value)
+    if _SAFE_VALUE.match(value):
+        return value
+    return quote(value, safe=SAFE_CHARACTERS)
+
+
+class RequestBuilder:
+    def __init__(self, token: str, response_type: str = 'xml'):
+        """
+        Builds request URLs for API operations
+
+        Static part of the URL (operation, version, type and key) is
+        encoded once per operation and reused, only parameter values are
+        encoded on every call. Parameters with None value are left out.
+
+        :param str token: API key
+        :param str response_type: Default response type, xml or json
+        """
+        self._token = encode(token)
+        self._response_type = response_type
+        self._templates = {}
+
+    def _template(self, operation: str, response_type: str) -> str:
+        template = self._templates.get((operation, response_type))
+        if template is None:
+            template = f"{operation}?version=1&type={encode(response_type)}&key={self._token}"
+            self._templates[operation, response_type] = template
+        return template
+
+    def build(self, operation: str, /, response_type: str = None, **params) -> ApiRequest:
+        """
+        Build request URL
+
+        :param str operation: API operation name, e.g. getDomainInfo
+        :param str response_type: Response type overriding the default
+        :param params: Query parameters in order they are sent
+        :return: Request URL relative to API base URL
+        :rtype: ApiRequest
+        """
+        url = self._template(operation, response_type or self._response_type)
+        params = {name: value for name, value in params.items() if value is not None}
+        if params:
+            url += ''.join(f"&{name}={encode(value)}" for name, value in params.items())
+        return ApiRequest(url, operation, params)
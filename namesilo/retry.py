@@ -0,0 +1,123 @@
+import asyncio
+import random
+import threading
+
+from typing import Callable, Dict, Iterable
+
+from namesilo.exceptions import HTTPError, exception_codes
+from namesilo.operations import is_read_operation, operation_name
+
+__author__ = 'goran.vrbaski'
+
+
+class RetryStats:
+    def __init__(self):
+        """
+        Retry counters for single API operation
+        """
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.max_retries = 0
+
+    def __repr__(self):
+        return f"RetryStats(calls={self.calls}, retries={self.retries}, " \
+               f"failures={self.failures}, max_retries={self.max_retries})"
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 30,
+                 jitter: bool = True, retry_codes: Iterable[int] = (115, 201),
+                 retry_status_codes: Iterable[int] = (429, 500, 502, 503, 504),
+                 guards: Dict[str, Callable] = None):
+        """
+        Retry failed API calls with exponential backoff
+
+        Read operations (getDomainInfo, dnsListRecords, ...) are retried
+        on transient errors: network errors, listed HTTP status codes and
+        listed NameSilo reply codes. Write operations (registerDomain,
+        addAccountFunds, ...) are retried only when guard for that
+        operation returns True, e.g. after checking the domain was not
+        registered by the failed attempt.
+
+        :param int max_retries: Maximum number of retries per call
+        :param float backoff: Delay before first retry in seconds, doubled on each retry
+        :param float max_backoff: Maximum delay between retries in seconds
+        :param bool jitter: Randomize delays ("full jitter") to spread out retries
+        :param retry_codes: NameSilo reply codes that are retried
+        :param retry_status_codes: HTTP status codes that are retried
+        :param dict guards: Operation name mapped to callable(url_extend, error) -> bool
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_exceptions = tuple(exception_codes[code] for code in retry_codes)
+        self.guards = guards or {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def is_transient(self, error: Exception) -> bool:
+        """
+        Check if error is transient and the same request may succeed later
+
+        :param Exception error: Error raised by API call
+        :rtype: bool
+        """
+        if isinstance(error, HTTPError):
+            return error.status_code in self.retry_status_codes
+        return isinstance(error, self.retry_exceptions + (OSError, asyncio.TimeoutError))
+
+    def should_retry(self, url_extend: str, error: Exception, retries: int) -> bool:
+        """
+        Decide if failed API call should be sent again
+
+        :param str url_extend: Request URL relative to API base URL
+        :param Exception error: Error raised by API call
+        :param int retries: Number of retries already made for this call
+        :rtype: bool
+        """
+        if retries >= self.max_retries or not self.is_transient(error):
+            return False
+
+        operation = operation_name(url_extend)
+        if is_read_operation(operation):
+            return True
+
+        guard = self.guards.get(operation)
+        return guard is not None and bool(guard(url_extend, error))
+
+    def delay(self, retries: int) -> float:
+        """
+        Seconds to wait before next retry
+
+        :param int retries: Number of retries already made for this call
+        :rtype: float
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** retries)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def record(self, url_extend: str, retries: int, failed: bool):
+        """
+        Record outcome of API call in retry statistics
+        """
+        operation = operation_name(url_extend)
+        with self._lock:
+            stats = self._stats.setdefault(operation, RetryStats())
+            stats.calls += 1
+            stats.retries += retries
+            stats.failures += failed
+            stats.max_retries = max(stats.max_retries, retries)
+
+    @property
+    def stats(self) -> Dict[str, RetryStats]:
+        """
+        Retry statistics for each API operation
+
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._stats)
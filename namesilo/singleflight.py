@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+from typing import Awaitable, Callable, Hashable
+
+__author__ = 'goran.vrbaski'
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesce identical concurrent calls into single call
+
+        While call for a key is in flight, other callers asking for the
+        same key wait for it and receive its result (or exception)
+        instead of making their own call. Works for threads with do()
+        and for asyncio tasks with do_async().
+        """
+        self.calls = 0
+        self.collapsed = 0
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def do(self, key: Hashable, func: Callable):
+        """
+        Call func, unless call with the same key is already in flight
+
+        :param key: Identity of the call, e.g. request URL
+        :param func: Function without arguments making the call
+        :return: Result of func
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.calls += 1
+            else:
+                leader = False
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except Exception as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable]):
+        """
+        Await func(), unless call with the same key is already in flight
+
+        :param key: Identity of the call, e.g. request URL
+        :param func: Coroutine function without arguments making the call
+        :return: Result of func
+        """
+        key = (asyncio.get_running_loop(), key)
+        future = self._async_calls.get(key)
+        with self._lock:
+            if future is not None:
+                self.collapsed += 1
+            else:
+                self.calls += 1
+
+        if future is None:
+            future = self._async_calls[key] = asyncio.ensure_future(func())
+            future.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        return await asyncio.shield(future)
@@ -0,0 +1,124 @@
+import re
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Iterable, Iterator
+
+from namesilo.common import DomainAvailability
+from namesilo.prices import find_tld_price
+
+__author__ = 'goran.vrbaski'
+
+_INVALID_LABEL_CHARACTERS = re.compile(r'[^a-z0-9-]+')
+
+
+def _label(value: str) -> str:
+    return _INVALID_LABEL_CHARACTERS.sub('', value.lower()).strip('-')
+
+
+def spin_candidates(seeds: Iterable[str], tlds: Iterable[str], prefixes: Iterable[str] = (),
+                    suffixes: Iterable[str] = (), separators: Iterable[str] = ('',)) -> Iterator[str]:
+    """
+    Lazily expand seed words into candidate domain names
+
+    Every seed is combined with each prefix and suffix (and without
+    them), joined by each separator, under each TLD. Seeds are expanded
+    one after another, so names built from first seeds come first.
+    Duplicates and labels longer than 63 characters are left out.
+
+    :param seeds: Seed words, e.g. ["cloud", "dev tools"]
+    :param tlds: TLDs without leading dot, e.g. ["com", "io"]
+    :param prefixes: Words put in front of seed
+    :param suffixes: Words put after seed
+    :param separators: Strings put between words, e.g. ("", "-")
+    :rtype: Iterator[str]
+    """
+    tlds = [tld.lower().lstrip('.') for tld in tlds]
+    prefixes = [''] + [_label(prefix) for prefix in prefixes]
+    suffixes = [''] + [_label(suffix) for suffix in suffixes]
+    separators = list(separators)
+    seen = set()
+    for seed in seeds:
+        seed = _label(seed.replace(' ', '-'))
+        if not seed:
+            continue
+        for prefix in prefixes:
+            for suffix in suffixes:
+                for separator in separators:
+                    label = separator.join(word for word in (prefix, seed, suffix) if word)
+                    if len(label) > 63:
+                        continue
+                    for tld in tlds:
+                        name = f"{label}.{tld}"
+                        if name not in seen:
+                            seen.add(name)
+                            yield name
+
+
+class NameSpinner:
+    def __init__(self, client, batch_size: int = 200, max_workers: int = None):
+        """
+        Stream spun candidate names through batched availability checks
+
+        Candidates are generated lazily and sent to
+        checkRegisterAvailability in batches, up to max_workers batches
+        at once. Available names are yielded as soon as their batch
+        returns, so first results don't wait for the whole list.
+
+        :param NameSilo client: Client used for the calls
+        :param int batch_size: Names per checkRegisterAvailability request, 200 at most
+        :param int max_workers: Number of batches checked at once, defaults to client pool size
+        """
+        self._client = client
+        self.batch_size = batch_size
+        self.max_workers = max_workers or client._pool.pool_size
+
+    def search(self, seeds: Iterable[str], prefixes: Iterable[str] = (), suffixes: Iterable[str] = (),
+               tlds: Iterable[str] = None, separators: Iterable[str] = ('',),
+               limit: int = None) -> Iterator[DomainAvailability]:
+        """
+        Find available names spun from seeds
+
+        Stop iterating, or pass limit, to stop sending further batches.
+        Names the reply has no price for get TLD registration price.
+
+        :param seeds: Seed words
+        :param prefixes: Words put in front of seed
+        :param suffixes: Words put after seed
+        :param tlds: TLDs to try, all TLDs returned by get_tld_prices by default
+        :param separators: Strings put between words
+        :param int limit: Stop after this many available names
+        :return: Available names with price, in order batches complete
+        :rtype: Iterator[DomainAvailability]
+        """
+        prices = self._client.get_tld_prices()
+        candidates = spin_candidates(seeds, prices if tlds is None else tlds, prefixes, suffixes, separators)
+        batches = iter(lambda: list(islice(candidates, self.batch_size)), [])
+        if limit is not None and limit <= 0:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = set()
+        found = 0
+        try:
+            while True:
+                for batch in islice(batches, self.max_workers - len(pending)):
+                    pending.add(executor.submit(self._client.check_domains, batch, self.batch_size))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for availability in future.result().values():
+                        if not availability.available:
+                            continue
+                        if availability.price is None:
+                            price = find_tld_price(prices, availability.domain)
+                            availability.price = price.registration if price is not None else None
+                        yield availability
+                        found += 1
+                        if limit is not None and found >= limit:
+                            return
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
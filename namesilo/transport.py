@@ -0,0 +1,254 @@
+import threading
+import time
+
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+
+__author__ = 'goran.vrbaski'
+
+
+class PoolStats:
+    def __init__(self, requests_sent: int, connections: int):
+        """
+        Connection reuse statistics of ConnectionPool
+
+        :param int requests_sent: Number of requests sent through the pool
+        :param int connections: Number of TCP/TLS connections opened
+        """
+        self.requests = requests_sent
+        self.connections = connections
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    def __repr__(self):
+        return f"PoolStats(requests={self.requests}, " \
+               f"connections={self.connections}, reused={self.reused})"
+
+
+class CountingAdapter(HTTPAdapter):
+    def __init__(self, on_connect, **kwargs):
+        """
+        HTTPAdapter calling on_connect for every TCP/TLS connection it opens
+
+        urllib3 reopens dropped connections in place, so number of
+        connection objects in the pool doesn't tell how many handshakes
+        were made, connect() calls do.
+
+        :param on_connect: Called without arguments before each connect
+        :param kwargs: HTTPAdapter arguments
+        """
+        self._on_connect = on_connect
+        super().__init__(**kwargs)
+
+    def _counting_pool_class(self, pool_class):
+        on_connect = self._on_connect
+
+        class CountingConnection(pool_class.ConnectionCls):
+            def connect(self):
+                on_connect()
+                super().connect()
+
+        return type(pool_class.__name__, (pool_class,), {'ConnectionCls': CountingConnection})
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': self._counting_pool_class(HTTPConnectionPool),
+            'https': self._counting_pool_class(HTTPSConnectionPool),
+        }
+
+
+class ConnectionPool:
+    def __init__(self, pool_size: int = 10, keep_alive: bool = True, timeout: float = None):
+        """
+        Thread-safe pool of keep-alive HTTP connections
+
+        All threads share one urllib3 connection pool through a single
+        HTTPAdapter, while each thread gets its own requests.Session
+        so session state (cookies, headers) is never shared.
+
+        :param int pool_size: Maximum number of connections kept per host
+        :param bool keep_alive: Reuse connections between requests
+        :param float timeout: Timeout in seconds for each request
+        """
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._adapter = CountingAdapter(self._count_connection, pool_connections=pool_size, pool_maxsize=pool_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+
+    def _count_connection(self):
+        with self._lock:
+            self._connections += 1
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            if not self.keep_alive:
+                session.headers['Connection'] = 'close'
+            self._local.session = session
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Send GET request through pooled connection
+
+        :param str url: Full request URL
+        :return: HTTP response
+        :rtype: requests.Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with self._lock:
+            self._requests += 1
+        return self._session().get(url, **kwargs)
+
+    def warm_up(self, url: str, connections: int = 1):
+        """
+        Open connections ahead of time so first API calls skip the handshake
+
+        Connections are opened with HEAD requests, each response is kept
+        open until all are sent so every request gets its own connection.
+
+        :param str url: Any URL on the API host
+        :param int connections: Number of connections to open
+        """
+        if not self.keep_alive:
+            return
+        session = self._session()
+        responses = []
+        try:
+            for _ in range(min(connections, self.pool_size)):
+                with self._lock:
+                    self._requests += 1
+                responses.append(session.head(url, stream=True, timeout=self.timeout))
+        finally:
+            for response in responses:
+                # reading the (empty) body returns connection to the pool instead of closing it
+                response.content
+                response.close()
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Current connection reuse statistics
+
+        :rtype: PoolStats
+        """
+        return PoolStats(self._requests, self._connections)
+
+    def close(self):
+        self._adapter.close()
+
+
+class AsyncResponse:
+    def __init__(self, status_code: int, content: bytes, elapsed: timedelta = None):
+        """
+        Fully read response returned by AsyncConnectionPool
+
+        :param int status_code: HTTP status code
+        :param content: Response body, or async iterator of chunks for streamed response
+        :param timedelta elapsed: Time between sending request and receiving
+                                  response headers, like requests Response.elapsed
+        """
+        self.status_code = status_code
+        self.content = content
+        self.elapsed = elapsed
+
+
+class AsyncConnectionPool:
+    def __init__(self, pool_size: int = 100, keep_alive: bool = True, timeout: float = None):
+        """
+        Non-blocking pool of keep-alive HTTP connections backed by aiohttp
+
+        aiohttp session is created on first request, inside running
+        event loop.
+
+        :param int pool_size: Maximum number of open connections
+        :param bool keep_alive: Reuse connections between requests
+        :param float timeout: Timeout in seconds for each request
+        """
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._session = None
+        self._requests = 0
+        self._connections = 0
+
+    def _client_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise ImportError(
+                    "AsyncNameSilo requires aiohttp, "
+                    "install it with: pip install python-namesilo[async]"
+                )
+
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, force_close=not self.keep_alive),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=[trace_config]
+            )
+        return self._session
+
+    async def _on_connection_create(self, session, context, params):
+        self._connections += 1
+
+    async def get(self, url: str) -> AsyncResponse:
+        """
+        Send GET request through pooled connection
+
+        :param str url: Full request URL
+        :return: HTTP response with body already read
+        :rtype: AsyncResponse
+        """
+        self._requests += 1
+        started = time.perf_counter()
+        async with self._client_session().get(url) as response:
+            elapsed = timedelta(seconds=time.perf_counter() - started)
+            return AsyncResponse(response.status, await response.read(), elapsed)
+
+    @asynccontextmanager
+    async def stream(self, url: str, chunk_size: int = 65536):
+        """
+        Send GET request through pooled connection without reading the body
+
+        Use as async context manager, body is read with
+        ``async for chunk in response.content``.
+
+        :param str url: Full request URL
+        :param int chunk_size: Size of body chunks in bytes
+        :return: HTTP response with content as async iterator of chunks
+        :rtype: AsyncResponse
+        """
+        self._requests += 1
+        async with self._client_session().get(url) as response:
+            yield AsyncResponse(response.status, response.content.iter_chunked(chunk_size))
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Current connection reuse statistics
+
+        :rtype: PoolStats
+        """
+        return PoolStats(self._requests, self._connections)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
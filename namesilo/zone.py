@@ -0,0 +1,192 @@
+from collections import defaultdict
+from typing import Iterable, List
+
+__author__ = 'goran.vrbaski'
+
+DEFAULT_TTL = 7207
+
+
+class DnsRecordSpec:
+    def __init__(self, domain, record_type, host, value, ttl=DEFAULT_TTL, distance=None, record_id=None):
+        """
+        DNS record normalized for comparison
+
+        :param str domain: Domain name the record belongs to
+        :param str record_type: Record type, e.g. A, MX, TXT
+        :param str host: Host, relative ('www', '' or '@' for apex) or fully qualified
+        :param str value: Record value
+        :param int ttl: Record TTL
+        :param int distance: Priority of MX and SRV records
+        :param str record_id: NameSilo record ID, for existing records
+        """
+        domain = domain.lower().rstrip('.')
+        host = (host or '').lower().rstrip('.')
+        if host in ('', '@', domain):
+            host = ''
+        elif host.endswith(f".{domain}"):
+            host = host[:-len(domain) - 1]
+
+        self.domain = domain
+        self.type = record_type.upper()
+        self.host = host
+        self.value = value
+        self.ttl = int(ttl) if ttl else DEFAULT_TTL
+        self.distance = int(distance) if distance not in (None, '') else None
+        self.record_id = record_id
+
+    def __repr__(self):
+        return f"DnsRecordSpec({self.type} {self.fqdn} {self.value!r}, ttl={self.ttl})"
+
+    @property
+    def fqdn(self) -> str:
+        return f"{self.host}.{self.domain}" if self.host else self.domain
+
+    @property
+    def identity(self) -> tuple:
+        return self.type, self.host, self.value
+
+    @property
+    def settings(self) -> tuple:
+        return self.ttl, self.distance if self.type in ('MX', 'SRV') else None
+
+    @classmethod
+    def from_reply(cls, domain: str, record: dict) -> 'DnsRecordSpec':
+        """
+        Create from dnsListRecords resource record
+        """
+        return cls(domain, record['type'], record['host'], record['value'],
+                   record.get('ttl'), record.get('distance'), record.get('record_id'))
+
+    @classmethod
+    def from_desired(cls, domain: str, record) -> 'DnsRecordSpec':
+        """
+        Create from desired record, dict with type, host, value and
+        optional ttl and distance keys
+        """
+        if isinstance(record, DnsRecordSpec):
+            return record
+        return cls(domain, record['type'], record.get('host', ''), record['value'],
+                   record.get('ttl'), record.get('distance'))
+
+
+class DnsChange:
+    ADD = 'add'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+    def __init__(self, action: str, record: DnsRecordSpec, record_id: str = None):
+        """
+        Single DNS API call of the sync plan
+
+        :param str action: add, update or delete
+        :param DnsRecordSpec record: Desired record, current record for delete
+        :param str record_id: ID of record to update or delete
+        """
+        self.action = action
+        self.record = record
+        self.record_id = record_id
+        self.error = None
+
+    def __repr__(self):
+        status = f", error={self.error!r}" if self.error is not None else ""
+        return f"DnsChange({self.action} {self.record!r}{status})"
+
+
+class DnsSyncPlan:
+    def __init__(self, domain: str, changes: List[DnsChange], unchanged: int, dry_run: bool):
+        """
+        Minimal set of changes bringing the zone to desired state
+
+        :param str domain: Domain name
+        :param list changes: Add, update and delete calls
+        :param int unchanged: Number of records already in desired state
+        :param bool dry_run: Changes were planned but not sent
+        """
+        self.domain = domain
+        self.changes = changes
+        self.unchanged = unchanged
+        self.dry_run = dry_run
+
+    def __repr__(self):
+        return f"DnsSyncPlan({self.domain!r}, add={len(self.adds)}, update={len(self.updates)}, " \
+               f"delete={len(self.deletes)}, unchanged={self.unchanged}, dry_run={self.dry_run})"
+
+    def _actions(self, action: str) -> List[DnsChange]:
+        return [change for change in self.changes if change.action == action]
+
+    @property
+    def adds(self) -> List[DnsChange]:
+        return self._actions(DnsChange.ADD)
+
+    @property
+    def updates(self) -> List[DnsChange]:
+        return self._actions(DnsChange.UPDATE)
+
+    @property
+    def deletes(self) -> List[DnsChange]:
+        return self._actions(DnsChange.DELETE)
+
+    @property
+    def failed(self) -> List[DnsChange]:
+        return [change for change in self.changes if change.error is not None]
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+def plan_dns_sync(domain: str, current: Iterable[dict], desired: Iterable) -> DnsSyncPlan:
+    """
+    Compute minimal changes turning current records into desired records
+
+    Records with the same type, host and value are kept, updated in
+    place when only TTL or distance differ. Remaining records of the
+    same type and host are updated in place, the rest are added or
+    deleted.
+
+    :param str domain: Domain name
+    :param current: Records returned by list_dns_records
+    :param desired: Desired records
+    :return: Planned changes
+    :rtype: DnsSyncPlan
+    """
+    current = [DnsRecordSpec.from_reply(domain, record) for record in current]
+    desired = [DnsRecordSpec.from_desired(domain, record) for record in desired]
+    changes = []
+    unchanged = 0
+
+    by_identity = defaultdict(list)
+    for record in current:
+        by_identity[record.identity].append(record)
+
+    remaining_desired = []
+    for record in desired:
+        matches = by_identity.get(record.identity)
+        if not matches:
+            remaining_desired.append(record)
+            continue
+
+        match = next((candidate for candidate in matches if candidate.settings == record.settings), matches[0])
+        matches.remove(match)
+        if match.settings == record.settings:
+            unchanged += 1
+        else:
+            changes.append(DnsChange(DnsChange.UPDATE, record, match.record_id))
+
+    remaining_current = defaultdict(list)
+    for records in by_identity.values():
+        for record in records:
+            remaining_current[record.type, record.host].append(record)
+
+    for record in remaining_desired:
+        candidates = remaining_current.get((record.type, record.host))
+        if candidates:
+            changes.append(DnsChange(DnsChange.UPDATE, record, candidates.pop(0).record_id))
+        else:
+            changes.append(DnsChange(DnsChange.ADD, record))
+
+    for records in remaining_current.values():
+        for record in records:
+            changes.append(DnsChange(DnsChange.DELETE, record, record.record_id))
+
+    return DnsSyncPlan(domain, changes, unchanged, dry_run=True)
@@ -10,8 +10,9 @@ with open(path.join(here, 'README.md'), encoding='utf-8') as f:
 setup(
     name='python-namesilo',
     version='1.7.0',
-    packages=find_packages(exclude=['docs', 'tests']),
+    packages=find_packages(exclude=['benchmarks', 'docs', 'tests']),
     install_requires=['requests', 'xmltodict'],
+    extras_require={'async': ['aiohttp'], 'json': ['orjson']},
     python_requires='>=3.8,<=3.12',
     py_modules=['namesilo'],
     classifiers=[
@@ -1,10 +1,44 @@
+import asyncio
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
 import unittest
+import xmltodict
 
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 
-from namesilo.core import NameSilo, ContactModel
-from namesilo.common import DomainInfo
-from namesilo.exceptions import APIRequestError, DomainProcessingError
+from namesilo.batch import AsyncBatchExecutor, BatchExecutor, BatchOperation
+from namesilo.cache import ResponseCache
+from namesilo.core import AsyncNameSilo, NameSilo, ContactModel
+from namesilo.parsers import JsonParser, XmlParser, get_parser
+from namesilo.prices import PriceCache, find_tld_price
+from namesilo.operations import operation_name, request_domain
+from namesilo.ratelimit import FileTokenBucket, TokenBucket
+from namesilo.request_builder import RequestBuilder
+from namesilo.retry import RetryPolicy
+from namesilo.singleflight import SingleFlight
+from namesilo.spinner import NameSpinner, spin_candidates
+from namesilo.transport import AsyncResponse, ConnectionPool
+from namesilo.zone import plan_dns_sync
+from namesilo.common import (
+    DnsRecord, DomainAvailability, DomainInfo, DomainResult, DomainSummary, LazyDomainInfo, TldPrice
+)
+from namesilo.inventory import Inventory
+from namesilo.registration import BudgetLedger, BulkRegistrar
+from namesilo.renewals import RenewalPlanner
+from namesilo.instrumentation import HistogramObserver, scrub_url
+from namesilo.exceptions import (
+    APIRequestError, CentralRegistryNotResponding, DNSModificationError, DomainAlreadyLocked,
+    DomainProcessingError, HTTPError, InsufficientFunds, InvalidAPIKey, NameServerUpdateError, OperationSkipped,
+    TooManyRequests
+)
+from namesilo.fake_server import FakeNameSiloServer
 from tests.mocked_data import mocked_data, mocked_single_contact
 
 
@@ -29,7 +63,7 @@ class NameSiloTestCase(unittest.TestCase):
         mock_check.assert_called_once()
         mock_error_code.assert_called_once()
 
-    @mock.patch('namesilo.core.requests.get')
+    @mock.patch('namesilo.transport.ConnectionPool.get')
     def test_get_content_xml(self, mock_requests):
         mock_response = mock.Mock()
         mock_response.status_code = 200
@@ -43,7 +77,12 @@ class NameSiloTestCase(unittest.TestCase):
             "http://sandbox.namesilo.com/api/some_url_extend"
         )
 
-    @mock.patch('namesilo.core.requests.get')
+    @mock.patch('namesilo.transport.ConnectionPool.get')
+    def test_get_content_xml_too_many_requests(self, mock_requests):
+        mock_requests.return_value.status_code = 429
+        self.assertRaises(TooManyRequests, self.ns._get_content_xml, 'url')
+
+    @mock.patch('namesilo.transport.ConnectionPool.get')
     def test_get_content_xml_exception(self, mock_requests):
         mock_response = mock.Mock()
         mock_response.status_code = 404
@@ -94,6 +133,29 @@ class NameSiloTestCase(unittest.TestCase):
             "domains=some-domain.com"
         )
 
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_check_domains_batches(self, mock_process_data):
+        mock_process_data.side_effect = lambda url: xmltodict.parse(
+            "<namesilo><reply><code>300</code><detail>success</detail><available>" +
+            "".join(
+                f'<domain price="1,009.95" premium="1">{domain}</domain>'
+                for domain in url.split("domains=")[1].split(",")[:-1]
+            ) +
+            f"</available><unavailable><domain>{url.split(',')[-1]}</domain>"
+            f"</unavailable></reply></namesilo>"
+        )
+        domains = [f"domain-{index}.com" for index in range(450)]
+        availability = self.ns.check_domains(domains + domains[:10])
+
+        self.assertEqual(mock_process_data.call_count, 3)
+        self.assertEqual(len(availability), 450)
+        self.assertTrue(availability["domain-0.com"].available)
+        self.assertTrue(availability["domain-0.com"].premium)
+        self.assertEqual(availability["domain-0.com"].price, 1009.95)
+        self.assertFalse(availability["domain-199.com"].available)
+        self.assertIsNone(availability["domain-199.com"].price)
+        self.assertFalse(availability["domain-449.com"].available)
+
     @mock.patch('namesilo.core.NameSilo._process_data')
     def test_domain_registration(self, mock_content_xml):
         domain_name = "some-domain.com"
@@ -234,6 +296,41 @@ class NameSiloTestCase(unittest.TestCase):
             "domain=some-domain.com"
         )
 
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_get_domains_info(self, mock_process_data):
+        def process_data(url):
+            if url.endswith("broken.com"):
+                raise DomainProcessingError("error")
+            return mocked_data
+
+        mocked_data['namesilo']['reply']['code'] = 300
+        mock_process_data.side_effect = process_data
+        domains = [f"domain-{index}.com" for index in range(20)] + ["broken.com"]
+        results = {result.domain: result for result in self.ns.get_domains_info(domains, max_workers=4)}
+
+        self.assertEqual(len(results), 21)
+        self.assertEqual(mock_process_data.call_count, 21)
+        self.assertIsInstance(results["domain-0.com"].value, DomainInfo)
+        self.assertTrue(results["domain-0.com"].ok)
+        self.assertFalse(results["broken.com"].ok)
+        self.assertIsInstance(results["broken.com"].error, DomainProcessingError)
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_get_domains_info_rate(self, mock_process_data):
+        mock_process_data.return_value = mocked_data
+        started = time.monotonic()
+        results = list(self.ns.get_domains_info(["a.com", "b.com", "c.com"], rate=20))
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertTrue(all(isinstance(result, DomainResult) for result in results))
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_get_domains_info_lazy(self, mock_process_data):
+        mocked_data['namesilo']['reply']['code'] = 300
+        mock_process_data.return_value = mocked_data
+        results = list(self.ns.get_domains_info(["a.com", "b.com"], lazy=True))
+        self.assertTrue(all(isinstance(result.value, LazyDomainInfo) for result in results))
+        self.assertIsInstance(self.ns.get_domain_info("a.com", lazy=True), LazyDomainInfo)
+
     @mock.patch('namesilo.core.NameSilo._process_data')
     def test_change_domain_nameservers(self, mock_content_xml):
         mock_content_xml.return_value = mocked_data
@@ -319,6 +416,24 @@ class NameSiloTestCase(unittest.TestCase):
         )
         self.assertEqual(record_id, 'e3f383786a647e83c49c6082c7ce8014')
 
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_add_dns_record_distance(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.ns.add_dns_records("some-domain.com", "MX", "", "mx.some-domain.com", 3600, 10)
+        mock_content_xml.assert_called_once_with(
+            "dnsAddRecord?version=1&type=xml&key=name-silo-token&domain=some-domain.com&"
+            "rrtype=MX&rrhost=&rrvalue=mx.some-domain.com&rrttl=3600&rrdistance=10"
+        )
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_delete_dns_record(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.assertTrue(self.ns.delete_dns_record("some-domain.com", "e3f383786a647e83c49c6082c7ce8014"))
+        mock_content_xml.assert_called_once_with(
+            "dnsDeleteRecord?version=1&type=xml&key=name-silo-token&domain=some-domain.com&"
+            "rrid=e3f383786a647e83c49c6082c7ce8014"
+        )
+
     @mock.patch('namesilo.core.NameSilo._process_data')
     def test_update_dns_record(self, mock_content_xml):
         mock_content_xml.return_value = mocked_data
@@ -333,6 +448,1426 @@ class NameSiloTestCase(unittest.TestCase):
         self.assertEqual(record_id, 'e3f383786a647e83c49c6082c7ce8014')
 
 
+class ParserTestCase(unittest.TestCase):
+    domain_info_xml = b"""<?xml version="1.0"?>
+        <namesilo><request><operation>getDomainInfo</operation><ip>1.1.1.1</ip></request>
+        <reply><code>300</code><detail>success</detail><created>2020-01-01</created>
+        <expires>2030-01-01</expires><status>Active</status><locked>Yes</locked>
+        <private>No</private><auto_renew>Yes</auto_renew><traffic_type>Forwarded</traffic_type>
+        <email_verification_required>No</email_verification_required><portfolio/>
+        <forward_url>N/A</forward_url><forward_type>N/A</forward_type>
+        <nameservers><nameserver position="1">NS1.EXAMPLE.COM</nameserver>
+        <nameserver position="2">NS2.EXAMPLE.COM</nameserver></nameservers>
+        <contact_ids><registrant>500</registrant><administrative>500</administrative>
+        <technical>500</technical><billing>500</billing></contact_ids></reply></namesilo>"""
+    domain_info_json = b"""{"request": {"operation": "getDomainInfo", "ip": "1.1.1.1"},
+        "reply": {"code": 300, "detail": "success", "created": "2020-01-01",
+        "expires": "2030-01-01", "status": "Active", "locked": "Yes", "private": "No",
+        "auto_renew": "Yes", "traffic_type": "Forwarded", "email_verification_required": "No",
+        "portfolio": null, "forward_url": "N/A", "forward_type": "N/A",
+        "nameservers": [{"position": 1, "nameserver": "NS1.EXAMPLE.COM"},
+        {"position": 2, "nameserver": "NS2.EXAMPLE.COM"}],
+        "contact_ids": {"registrant": "500", "administrative": "500",
+        "technical": "500", "billing": "500"}}}"""
+
+    def test_get_parser(self):
+        self.assertIsInstance(get_parser("xml"), XmlParser)
+        self.assertIsInstance(get_parser("json"), JsonParser)
+        self.assertRaises(ValueError, get_parser, "yaml")
+
+    def test_json_matches_xml(self):
+        xml_reply = XmlParser().parse(self.domain_info_xml)
+        json_reply = JsonParser().parse(self.domain_info_json)
+        self.assertEqual(xml_reply, json_reply)
+        self.assertEqual(
+            [getattr(DomainInfo(xml_reply), name) for name in DomainInfo.__slots__ if name != 'contacts'],
+            [getattr(DomainInfo(json_reply), name) for name in DomainInfo.__slots__ if name != 'contacts']
+        )
+        self.assertEqual(DomainInfo(json_reply).name_servers, ["NS1.EXAMPLE.COM", "NS2.EXAMPLE.COM"])
+
+    def test_json_availability(self):
+        reply = JsonParser().parse(
+            b'{"request": {}, "reply": {"code": 300, "detail": "success",'
+            b'"available": [{"domain": "first.com", "price": 9.95, "premium": 0}],'
+            b'"unavailable": ["second.com"]}}'
+        )
+        availability = DomainAvailability.process(reply['namesilo']['reply'])
+        self.assertEqual(availability["first.com"].price, 9.95)
+        self.assertFalse(availability["second.com"].available)
+
+    def test_json_response_format(self):
+        ns = NameSilo("name-silo-token", response_format="json")
+        with mock.patch.object(ns, '_process_data', return_value=mocked_data) as mock_process_data:
+            ns.get_account_balance()
+        mock_process_data.assert_called_once_with(
+            "getAccountBalance?version=1&type=json&key=name-silo-token"
+        )
+
+
+def _take_tokens(path, count, queue):
+    bucket = FileTokenBucket(path, rate=50, burst=5)
+    for _ in range(count):
+        bucket.acquire()
+    queue.put(time.time())
+
+
+class RequestBuilderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.builder = RequestBuilder("name silo+token")
+
+    def test_build(self):
+        request = self.builder.build("getDomainInfo", domain="example.com")
+        self.assertEqual(request, "getDomainInfo?version=1&type=xml&key=name%20silo%2Btoken&domain=example.com")
+        self.assertEqual(request.operation, "getDomainInfo")
+        self.assertEqual(request.params, {'domain': "example.com"})
+        self.assertEqual(operation_name(request), "getDomainInfo")
+        self.assertEqual(request_domain(self.builder.build("domainLock", domain="Example.com")), "example.com")
+        self.assertIsNone(request_domain(self.builder.build("getAccountBalance")))
+
+    def test_values_are_encoded(self):
+        self.assertEqual(
+            self.builder.build("dnsAddRecord", rrvalue="a&b=c+d e#f?", rrdistance=None),
+            "dnsAddRecord?version=1&type=xml&key=name%20silo%2Btoken&rrvalue=a%26b%3Dc%2Bd%20e%23f%3F"
+        )
+        self.assertEqual(
+            self.builder.build("contactAdd", em="some.email@some.domain.com", domains="a.com,b.com"),
+            "contactAdd?version=1&type=xml&key=name%20silo%2Btoken&em=some.email@some.domain.com&domains=a.com,b.com"
+        )
+
+    def test_response_type(self):
+        self.assertTrue(self.builder.build("listDomains", response_type="json").startswith(
+            "listDomains?version=1&type=json&"
+        ))
+
+
+class ModelsTestCase(unittest.TestCase):
+    def test_domain_info(self):
+        info = DomainInfo(XmlParser().parse(ParserTestCase.domain_info_xml))
+        self.assertEqual(info.created, datetime.date(2020, 1, 1))
+        self.assertEqual(info.expires, datetime.date(2030, 1, 1))
+        self.assertTrue(info.locked)
+        self.assertFalse(info.private)
+        self.assertTrue(info.auto_renew)
+        self.assertEqual(info.contacts.registrant, "500")
+        self.assertFalse(hasattr(info, '__dict__'))
+
+    def test_lazy_domain_info(self):
+        reply = XmlParser().parse(ParserTestCase.domain_info_xml)
+        with mock.patch('namesilo.common.models.NameServers.process') as mock_process:
+            info = LazyDomainInfo(reply)
+            self.assertEqual(info.expires, datetime.date(2030, 1, 1))
+            mock_process.assert_not_called()
+        self.assertIsInstance(info, DomainInfo)
+        self.assertEqual(info.name_servers, ["NS1.EXAMPLE.COM", "NS2.EXAMPLE.COM"])
+        self.assertIs(info.name_servers, info.name_servers)
+        self.assertEqual(
+            [getattr(info, name) for name in DomainInfo.__slots__ if name != 'contacts'],
+            [getattr(DomainInfo(reply), name) for name in DomainInfo.__slots__ if name != 'contacts']
+        )
+        self.assertRaises(AttributeError, getattr, info, 'missing')
+
+    def test_dns_record(self):
+        records = DnsRecord.process({
+            'record_id': '1', 'type': 'MX', 'host': 'example.com', 'value': 'mx.example.com',
+            'ttl': '3600', 'distance': '10'
+        })
+        self.assertEqual(records, [DnsRecord('1', 'MX', 'example.com', 'mx.example.com', 3600, 10)])
+        self.assertFalse(hasattr(records[0], '__dict__'))
+
+    def test_domain_summary(self):
+        self.assertEqual(
+            DomainSummary.process([
+                'first.com', {'@created': '2020-01-01', '@expires': '2021-01-01', '#text': 'second.com'}
+            ]),
+            [DomainSummary('first.com'),
+             DomainSummary('second.com', datetime.date(2020, 1, 1), datetime.date(2021, 1, 1))]
+        )
+
+    def test_contact_model_slots(self):
+        contact = ContactModel.convert_contact_model(mocked_single_contact['namesilo']['reply']['contact'])
+        self.assertFalse(hasattr(contact, '__dict__'))
+        self.assertEqual(str(contact), "First Last - 500")
+
+
+class RateLimitTestCase(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, burst=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, places=2)
+
+    def test_shared_between_threads(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        started = time.monotonic()
+        threads = [
+            threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - started, 0.18)
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, TokenBucket, 0)
+
+    def test_try_acquire(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual([bucket.try_acquire() for _ in range(5)], [True, True, False, False, False])
+        time.sleep(0.11)
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_file_bucket_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bucket")
+            queue = multiprocessing.Queue()
+            started = time.time()
+            processes = [
+                multiprocessing.Process(target=_take_tokens, args=(path, 5, queue))
+                for _ in range(3)
+            ]
+            for process in processes:
+                process.start()
+            finished = max(queue.get(timeout=10) for _ in processes)
+            for process in processes:
+                process.join()
+        self.assertGreaterEqual(finished - started, 0.18)
+
+    @mock.patch('namesilo.transport.ConnectionPool.get')
+    def test_namesilo_rate_limiter(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.content = b"<namesilo><reply><code>300</code><detail/></reply></namesilo>"
+        bucket = TokenBucket(rate=10, burst=1)
+        ns = NameSilo("name-silo-token", rate_limiter=bucket)
+        with mock.patch.object(bucket, 'acquire', wraps=bucket.acquire) as mock_acquire:
+            ns.delete_contact(1)
+            ns.delete_contact(2)
+        self.assertEqual(mock_acquire.call_count, 2)
+
+
+class RetryTestCase(unittest.TestCase):
+    reply_ok = {'namesilo': {'reply': {'code': '300', 'detail': 'success', 'balance': '10'}}}
+    reply_registry_down = {'namesilo': {'reply': {'code': '115', 'detail': 'registry down'}}}
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=2, backoff=0)
+        self.ns = NameSilo("name-silo-token", retry_policy=self.policy)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_read_retried(self, mock_content_xml):
+        mock_content_xml.side_effect = [self.reply_registry_down, HTTPError(503), self.reply_ok]
+        self.assertEqual(self.ns.get_account_balance(), 10)
+        self.assertEqual(mock_content_xml.call_count, 3)
+        self.assertEqual(self.policy.stats['getAccountBalance'].retries, 2)
+        self.assertEqual(self.policy.stats['getAccountBalance'].failures, 0)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_retries_exhausted(self, mock_content_xml):
+        mock_content_xml.return_value = self.reply_registry_down
+        self.assertRaises(CentralRegistryNotResponding, self.ns.get_account_balance)
+        self.assertEqual(mock_content_xml.call_count, 3)
+        self.assertEqual(self.policy.stats['getAccountBalance'].failures, 1)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_write_not_retried(self, mock_content_xml):
+        mock_content_xml.return_value = self.reply_registry_down
+        self.assertRaises(CentralRegistryNotResponding, self.ns.register_domain, "some-domain.com")
+        mock_content_xml.assert_called_once()
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_write_retried_with_guard(self, mock_content_xml):
+        guard = mock.Mock(return_value=True)
+        self.policy.guards['registerDomain'] = guard
+        mock_content_xml.side_effect = [self.reply_registry_down, self.reply_ok]
+        self.assertTrue(self.ns.register_domain("some-domain.com"))
+        guard.assert_called_once()
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_permanent_error_not_retried(self, mock_content_xml):
+        mock_content_xml.side_effect = HTTPError(404)
+        self.assertRaises(HTTPError, self.ns.get_account_balance)
+        mock_content_xml.assert_called_once()
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+        self.assertEqual([policy.delay(retries) for retries in range(4)], [1, 2, 4, 5])
+        policy.jitter = True
+        self.assertTrue(all(0 <= policy.delay(3) <= 5 for _ in range(20)))
+
+
+class PriceCacheTestCase(unittest.TestCase):
+    prices_reply = {
+        'namesilo': {
+            'reply': {
+                'code': '300', 'detail': 'success',
+                'com': {'registration': '8.99', 'transfer': '8.39', 'renew': '1,008.99'},
+                'net': {'registration': '10.99', 'transfer': '10.99', 'renew': '12.99'},
+            }
+        }
+    }
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "prices.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_tld_prices(self, mock_process_data):
+        mock_process_data.return_value = self.prices_reply
+        prices = NameSilo("name-silo-token").get_tld_prices()
+        self.assertEqual(prices['com'], TldPrice('com', 8.99, 1008.99, 8.39))
+        self.assertEqual(set(prices), {'com', 'net'})
+
+    def test_cold_cache_fetched_once(self):
+        cache = PriceCache(ttl=60)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'com': TldPrice('com', 1, 1, 1)}
+
+        threads = [threading.Thread(target=cache.get, args=(fetch,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+
+    def test_save_failure_ignored(self):
+        cache = PriceCache(path=os.path.join(self.directory.name, "missing", "prices.json"))
+        prices = cache.get(lambda: {'com': TldPrice('com', 1, 1, 1)})
+        self.assertEqual(prices['com'].registration, 1)
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_fresh_prices_cached(self, mock_process_data):
+        mock_process_data.return_value = self.prices_reply
+        ns = NameSilo("name-silo-token", price_cache=PriceCache(ttl=60))
+        ns.get_tld_prices()
+        ns.get_tld_prices()
+        mock_process_data.assert_called_once()
+
+    def test_stale_while_revalidate(self):
+        cache = PriceCache(ttl=60)
+        cache.update({'com': TldPrice('com', 1, 1, 1)}, fetched_at=time.time() - 120)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return {'com': TldPrice('com', 2, 2, 2)}
+
+        self.assertEqual(cache.get(fetch)['com'].registration, 1)
+        self.assertTrue(refreshed.wait(5))
+        for _ in range(50):
+            if not cache._refreshing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get(fetch)['com'].registration, 2)
+
+    def test_expired_prices_fetched(self):
+        cache = PriceCache(ttl=60, max_stale=60)
+        cache.update({'com': TldPrice('com', 1, 1, 1)}, fetched_at=time.time() - 180)
+        prices = cache.get(lambda: {'com': TldPrice('com', 2, 2, 2)})
+        self.assertEqual(prices['com'].registration, 2)
+
+    def test_persisted(self):
+        PriceCache(path=self.path).update({'com': TldPrice('com', 8.99, 9.99, 7.99)})
+        cache = PriceCache(path=self.path)
+        self.assertLess(cache.age, 60)
+        self.assertEqual(cache.get(mock.Mock())['com'], TldPrice('com', 8.99, 9.99, 7.99))
+
+    def test_corrupted_file_ignored(self):
+        with open(self.path, 'w') as cache_file:
+            cache_file.write("not json")
+        self.assertIsNone(PriceCache(path=self.path).age)
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        mocked_data['namesilo']['reply']['code'] = 300
+        self.cache = ResponseCache(maxsize=3)
+        self.ns = NameSilo("name-silo-token", response_cache=self.cache)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_reads_cached(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.ns.get_domain_info("example.com")
+        self.ns.get_domain_info("example.com")
+        self.ns.list_dns_records("example.com")
+        self.ns.list_dns_records("example.com")
+        self.assertEqual(mock_content_xml.call_count, 2)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_get_returns_copy(self):
+        url_extend = self.ns._requests.build("getDomainInfo", domain="example.com")
+        self.cache.update(url_extend, {'namesilo': {'reply': {'locked': 'No'}}})
+        self.cache.get(url_extend)['namesilo']['reply']['locked'] = 'Yes'
+        self.assertEqual(self.cache.get(url_extend)['namesilo']['reply']['locked'], 'No')
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_uncached_operation(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.ns.get_account_balance()
+        self.ns.get_account_balance()
+        self.assertEqual(mock_content_xml.call_count, 2)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_read_in_flight_during_write_not_stored(self, mock_content_xml):
+        read_started = threading.Event()
+        write_done = threading.Event()
+
+        def content(url_extend):
+            if operation_name(url_extend) == 'getDomainInfo' and not write_done.is_set():
+                read_started.set()
+                write_done.wait(5)
+            return mocked_data
+
+        mock_content_xml.side_effect = content
+        reader = threading.Thread(target=self.ns.get_domain_info, args=("example.com",))
+        reader.start()
+        self.assertTrue(read_started.wait(5))
+        self.ns.lock_domain("example.com")
+        write_done.set()
+        reader.join(5)
+        self.assertEqual(len(self.cache), 0)
+
+        self.ns.get_domain_info("example.com")
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(mock_content_xml.call_count, 3)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_write_invalidates_domain(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.ns.get_domain_info("example.com")
+        self.ns.get_domain_info("other.com")
+        self.ns.lock_domain("example.com")
+        self.ns.get_domain_info("example.com")
+        self.ns.get_domain_info("other.com")
+        self.assertEqual(mock_content_xml.call_count, 4)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_failed_write_invalidates_domain(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.ns.list_dns_records("example.com")
+        mock_content_xml.side_effect = HTTPError(500)
+        self.assertRaises(HTTPError, self.ns.add_dns_records, "example.com", "A", "www", "10.0.0.1")
+        self.assertEqual(len(self.cache), 0)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_lru_eviction(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        for domain in ["a.com", "b.com", "c.com"]:
+            self.ns.get_domain_info(domain)
+        self.ns.get_domain_info("a.com")
+        self.ns.get_domain_info("d.com")
+        self.assertEqual(len(self.cache), 3)
+        self.ns.get_domain_info("a.com")
+        self.ns.get_domain_info("b.com")
+        self.assertEqual(mock_content_xml.call_count, 5)
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_ttl(self, mock_content_xml):
+        mock_content_xml.return_value = mocked_data
+        self.cache.ttl = 0
+        self.ns.get_domain_info("example.com")
+        self.ns.get_domain_info("example.com")
+        self.assertEqual(mock_content_xml.call_count, 2)
+
+
+class RecordingClient:
+    def __init__(self, delay: float = 0.01):
+        self._pool = mock.Mock(pool_size=3)
+        self.max_concurrency = 3
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def _call(self, name, domain):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.calls.append((name, domain))
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if domain == "broken.com" and name == "register_domain":
+            raise DomainProcessingError("error")
+        return True
+
+    def register_domain(self, domain_name, years=1):
+        return self._call("register_domain", domain_name)
+
+    def add_domain_privacy(self, domain_name):
+        return self._call("add_domain_privacy", domain_name)
+
+    def get_account_balance(self):
+        return self._call("get_account_balance", None)
+
+
+class AsyncRecordingClient(RecordingClient):
+    async def _call(self, name, domain):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.calls.append((name, domain))
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        if domain == "broken.com" and name == "register_domain":
+            raise DomainProcessingError("error")
+        return True
+
+
+class BatchExecutorTestCase(unittest.TestCase):
+    def operations(self):
+        operations = []
+        for domain in ["first.com", "second.com", "broken.com", "third.com"]:
+            operations.append(BatchOperation("register_domain", domain, years=2))
+            operations.append(BatchOperation("add_domain_privacy", domain_name=domain))
+        operations.append(BatchOperation("get_account_balance"))
+        return operations
+
+    def test_operation(self):
+        self.assertEqual(BatchOperation("register_domain", "Example.com").domain, "example.com")
+        self.assertEqual(BatchOperation("change_domain_nameservers", domain="a.com").domain, "a.com")
+        self.assertIsNone(BatchOperation("add_account_funds", 10.0, 1).domain)
+
+    def test_run(self):
+        client = RecordingClient()
+        progress = []
+        with BatchExecutor(client, on_progress=lambda *args: progress.append(args[:2])) as executor:
+            report = executor.run(self.operations())
+
+        self.assertEqual(len(report.succeeded), 7)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(report.failed[0][0].domain, "broken.com")
+        self.assertEqual([operation.method for operation in report.skipped], ["add_domain_privacy"])
+        self.assertEqual(report.cancelled, [])
+        self.assertFalse(report.ok)
+        self.assertLessEqual(client.max_running, 3)
+        self.assertGreater(client.max_running, 1)
+        for domain in ["first.com", "second.com", "third.com"]:
+            calls = [name for name, call_domain in client.calls if call_domain == domain]
+            self.assertEqual(calls, ["register_domain", "add_domain_privacy"])
+        self.assertEqual(sorted(progress), [(index, 9) for index in range(1, 10)])
+
+    def test_skipped_operations_finish(self):
+        reports = []
+        with BatchExecutor(RecordingClient()) as executor:
+            futures = executor.map([BatchOperation("register_domain", "broken.com")] + [
+                BatchOperation("add_domain_privacy", "broken.com") for _ in range(3)
+            ])
+            thread = threading.Thread(target=lambda: reports.append(executor.wait()), daemon=True)
+            thread.start()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(reports[0].skipped), 3)
+        self.assertIsInstance(futures[1].exception(), OperationSkipped)
+
+    def test_futures(self):
+        with BatchExecutor(RecordingClient(), max_concurrency=1, stop_on_error=False) as executor:
+            futures = executor.map(self.operations())
+            self.assertTrue(futures[0].result())
+            self.assertIsInstance(futures[4].exception(), DomainProcessingError)
+            self.assertTrue(futures[5].result())
+
+    def test_fake_server(self):
+        with FakeNameSiloServer(token="name-silo-token") as server:
+            ns = NameSilo("name-silo-token", base_url=server.base_url)
+            with BatchExecutor(ns) as executor:
+                report = executor.run([
+                    operation
+                    for domain in ["first.com", "second.com"]
+                    for operation in (
+                        BatchOperation("register_domain", domain),
+                        BatchOperation("add_dns_records", domain, "A", "www", "10.0.0.1"),
+                        BatchOperation("add_domain_privacy", domain),
+                    )
+                ])
+            ns.close()
+            self.assertTrue(report.ok)
+            self.assertTrue(server.domains["first.com"].private)
+
+
+class AsyncBatchExecutorTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_run(self):
+        client = AsyncRecordingClient()
+        progress = []
+        executor = AsyncBatchExecutor(client, on_progress=lambda *args: progress.append(args[0]))
+        report = await executor.run(BatchExecutorTestCase.operations(None))
+
+        self.assertEqual(len(report.succeeded), 7)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual([operation.method for operation in report.skipped], ["add_domain_privacy"])
+        self.assertLessEqual(client.max_running, 3)
+        for domain in ["first.com", "second.com", "third.com"]:
+            calls = [name for name, call_domain in client.calls if call_domain == domain]
+            self.assertEqual(calls, ["register_domain", "add_domain_privacy"])
+        self.assertEqual(sorted(progress), list(range(1, 10)))
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def test_identical_calls_collapsed(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        func = mock.Mock(side_effect=lambda: release.wait() and "result")
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight.do("key", func)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while single_flight.collapsed < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        func.assert_called_once()
+        self.assertEqual(results, ["result"] * 5)
+        self.assertEqual((single_flight.calls, single_flight.collapsed), (1, 4))
+
+    def test_error_shared(self):
+        single_flight = SingleFlight()
+        self.assertRaises(HTTPError, single_flight.do, "key", mock.Mock(side_effect=HTTPError(500)))
+        self.assertEqual(single_flight.do("key", lambda: "result"), "result")
+
+    @mock.patch('namesilo.core.NameSilo._get_content_xml')
+    def test_namesilo_reads_collapsed(self, mock_content_xml):
+        def slow_response(url):
+            time.sleep(0.05)
+            return mocked_data
+
+        mocked_data['namesilo']['reply']['code'] = 300
+        mock_content_xml.side_effect = slow_response
+        ns = NameSilo("name-silo-token", coalesce_reads=True)
+        threads = [threading.Thread(target=ns.get_account_balance) for _ in range(5)]
+        threads += [threading.Thread(target=ns.lock_domain, args=("example.com",)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(mock_content_xml.call_count, 3)
+        self.assertEqual(ns.collapsed_calls, 4)
+
+
+class DnsSyncTestCase(unittest.TestCase):
+    current = [
+        {'record_id': '1', 'type': 'A', 'host': 'example.com', 'value': '10.0.0.1', 'ttl': '7207', 'distance': '0'},
+        {'record_id': '2', 'type': 'A', 'host': 'www.example.com', 'value': '10.0.0.1', 'ttl': '7207', 'distance': '0'},
+        {'record_id': '3', 'type': 'MX', 'host': 'example.com', 'value': 'mx1.old.com', 'ttl': '7207', 'distance': '10'},
+        {'record_id': '4', 'type': 'MX', 'host': 'example.com', 'value': 'mx2.old.com', 'ttl': '7207', 'distance': '20'},
+        {'record_id': '5', 'type': 'TXT', 'host': 'old.example.com', 'value': 'remove me', 'ttl': '7207', 'distance': '0'},
+        {'record_id': '6', 'type': 'CNAME', 'host': 'blog.example.com', 'value': 'example.com', 'ttl': '7207'},
+    ]
+    desired = [
+        {'type': 'A', 'host': '@', 'value': '10.0.0.1'},
+        {'type': 'A', 'host': 'www', 'value': '10.0.0.1', 'ttl': 3600},
+        {'type': 'MX', 'host': '', 'value': 'mx1.new.com', 'distance': 10},
+        {'type': 'CNAME', 'host': 'blog.example.com', 'value': 'example.com'},
+        {'type': 'TXT', 'host': '', 'value': 'v=spf1 -all'},
+    ]
+
+    def setUp(self):
+        self.ns = NameSilo("name-silo-token")
+
+    def test_plan(self):
+        plan = plan_dns_sync("example.com", self.current, self.desired)
+        self.assertEqual(plan.unchanged, 2)
+        self.assertEqual([(change.record_id, change.record.ttl) for change in plan.updates], [('2', 3600), ('3', 7207)])
+        self.assertEqual(plan.updates[1].record.value, 'mx1.new.com')
+        self.assertEqual([change.record.value for change in plan.adds], ['v=spf1 -all'])
+        self.assertEqual(sorted(change.record_id for change in plan.deletes), ['4', '5'])
+
+    def test_plan_no_changes(self):
+        plan = plan_dns_sync("example.com", self.current, self.current)
+        self.assertEqual(plan.changes, [])
+        self.assertEqual(plan.unchanged, 6)
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_sync_dns(self, mock_process_data):
+        def process_data(url):
+            if url.startswith("dnsListRecords"):
+                return {'namesilo': {'reply': {'resource_record': self.current}}}
+            if "rrid=5" in url:
+                raise DNSModificationError("error")
+            return {'namesilo': {'reply': {'record_id': 'new'}}}
+
+        mock_process_data.side_effect = process_data
+        plan = self.ns.sync_dns("example.com", self.desired)
+        self.assertFalse(plan.dry_run)
+        self.assertEqual(mock_process_data.call_count, 6)
+        self.assertEqual(len(plan.failed), 1)
+        self.assertIsInstance(plan.failed[0].error, DNSModificationError)
+        mock_process_data.assert_any_call(
+            "dnsUpdateRecord?version=1&type=xml&key=name-silo-token&domain=example.com&"
+            "rrid=3&rrhost=&rrvalue=mx1.new.com&rrttl=7207&rrdistance=10"
+        )
+        mock_process_data.assert_any_call(
+            "dnsDeleteRecord?version=1&type=xml&key=name-silo-token&domain=example.com&rrid=4"
+        )
+
+    @mock.patch('namesilo.core.NameSilo._process_data')
+    def test_sync_dns_dry_run(self, mock_process_data):
+        mock_process_data.return_value = {'namesilo': {'reply': {'resource_record': self.current[0]}}}
+        plan = self.ns.sync_dns("example.com", self.desired, dry_run=True)
+        self.assertTrue(plan.dry_run)
+        self.assertEqual(len(plan.adds), 4)
+        mock_process_data.assert_called_once()
+
+
+class StreamingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ns = NameSilo("name-silo-token", sandbox=True)
+
+    @staticmethod
+    def streamed_response(body: bytes, chunk_size: int = 7):
+        response = mock.Mock()
+        response.status_code = 200
+        response.iter_content.return_value = [
+            body[index:index + chunk_size] for index in range(0, len(body), chunk_size)
+        ]
+        return response
+
+    @mock.patch('namesilo.transport.ConnectionPool.get')
+    def test_iter_domains(self, mock_get):
+        mock_get.return_value = self.streamed_response(
+            b"<namesilo><request><operation>listDomains</operation></request>"
+            b"<reply><code>300</code><detail>success</detail><domains>" +
+            b"".join(f"<domain>domain-{index}.com</domain>".encode() for index in range(100)) +
+            b"</domains></reply></namesilo>"
+        )
+        domains = self.ns.iter_domains()
+        self.assertEqual(next(domains), "domain-0.com")
+        self.assertEqual(len(list(domains)), 99)
+        mock_get.assert_called_once_with(
+            "http://sandbox.namesilo.com/api/listDomains?version=1&type=xml&key=name-silo-token",
+            stream=True
+        )
+        mock_get.return_value.close.assert_called_once()
+
+    @mock.patch('namesilo.transport.ConnectionPool.get')
+    def test_iter_dns_records(self, mock_get):
+        mock_get.return_value = self.streamed_response(
+            b"<namesilo><reply><code>300</code><detail>success</detail>"
+            b"<resource_record><record_id>1</record_id><type>A</type>"
+            b"<host>some-domain.com</host><value>107.161.23.204</value></resource_record>"
+            b"<resource_record><record_id>2</record_id><type>MX</type>"
+            b"<host>some-domain.com</host><value>mx.some-domain.com</value></resource_record>"
+            b"</reply></namesilo>"
+        )
+        records = list(self.ns.iter_dns_records("some-domain.com"))
+        self.assertEqual(
+            records[0],
+            {'record_id': '1', 'type': 'A', 'host': 'some-domain.com', 'value': '107.161.23.204'}
+        )
+        self.assertEqual(records[1]['type'], 'MX')
+
+    @mock.patch('namesilo.transport.ConnectionPool.get')
+    def test_iter_domains_error_code(self, mock_get):
+        mock_get.return_value = self.streamed_response(
+            b"<namesilo><reply><code>400</code><detail>error</detail></reply></namesilo>"
+        )
+        self.assertRaises(APIRequestError, list, self.ns.iter_domains())
+
+
+class FakeServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNameSiloServer(token="name-silo-token", domains=["example.com", "example.net"]).start()
+        self.ns = NameSilo("name-silo-token", base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.ns.close()
+        self.server.stop()
+
+    def test_base_url(self):
+        self.assertEqual(self.ns._base_url, self.server.base_url)
+
+    def test_warm_up(self):
+        ns = NameSilo("name-silo-token", base_url=self.server.base_url, warm_up=2)
+        self.assertEqual(ns.pool_stats.connections, 2)
+        ns.get_account_balance()
+        self.assertEqual(ns.pool_stats.connections, 2)
+        ns.close()
+
+    def test_domains(self):
+        self.assertEqual(len(self.ns.list_domains()), 2)
+        summary = self.ns.list_domains(models=True)[0]
+        self.assertEqual(summary.name, "example.com")
+        self.assertIsInstance(summary.expires, datetime.date)
+        self.assertEqual(list(self.ns.iter_domains()), ["example.com", "example.net"])
+        info = self.ns.get_domain_info("example.com")
+        self.assertEqual(info.name_servers, ['NS1.DNSOWL.COM', 'NS2.DNSOWL.COM', 'NS3.DNSOWL.COM'])
+        self.assertTrue(self.ns.lock_domain("example.com"))
+        self.assertRaises(DomainAlreadyLocked, self.ns.lock_domain, "example.com")
+
+    def test_registration_and_balance(self):
+        availability = self.ns.check_domains(["example.com", "new-domain.com", "invalid"])
+        self.assertFalse(availability["example.com"].available)
+        self.assertEqual(availability["new-domain.com"].price, 9.95)
+        self.assertTrue(self.ns.register_domain("new-domain.com", years=2))
+        self.assertEqual(self.ns.get_account_balance(), 1000 - 2 * 9.95)
+
+    def test_special_characters(self):
+        value = "v=spf1 include:a.example.com&b +all"
+        record_id = self.ns.add_dns_records("example.com", "TXT", "", value)
+        record, = self.ns.list_dns_records("example.com", models=True)
+        self.assertEqual((record.record_id, record.value), (record_id, value))
+
+    def test_dns(self):
+        record_id = self.ns.add_dns_records("example.com", "A", "www", "10.0.0.1")
+        self.assertEqual(self.ns.list_dns_records("example.com")['host'], "www.example.com")
+        record, = self.ns.list_dns_records("example.com", models=True)
+        self.assertEqual((record.record_id, record.ttl), (record_id, 7207))
+        self.assertTrue(self.ns.delete_dns_record("example.com", record_id))
+
+    def test_domains_info_from_list_domains(self):
+        for domains in (self.ns.list_domains(), self.ns.list_domains(models=True), ["example.com", "example.net"]):
+            results = sorted(self.ns.get_domains_info(domains), key=lambda result: result.domain)
+            self.assertEqual([result.domain for result in results], ["example.com", "example.net"])
+            self.assertTrue(all(result.ok for result in results))
+
+    def test_json(self):
+        ns = NameSilo("name-silo-token", base_url=self.server.base_url, response_format="json")
+        self.assertEqual(ns.get_domain_info("example.com").name_servers[0], 'NS1.DNSOWL.COM')
+        self.assertEqual(len(ns.get_tld_prices()), 5)
+        self.assertEqual(ns.list_domains(), self.ns.list_domains())
+        self.assertEqual(ns.list_domains(models=True), self.ns.list_domains(models=True))
+        ns.close()
+
+    def test_ensure_state(self):
+        self.server.domains["example.com"].locked = True
+        self.server.domains["example.net"].private = True
+        known_state = {"example.com": self.ns.get_domain_info("example.com")}
+        results = self.ns.ensure_locked(["example.com", "example.net", "missing.com"], known_state=known_state)
+        self.assertFalse(results["example.com"].value)
+        self.assertTrue(results["example.net"].value)
+        self.assertFalse(results["missing.com"].ok)
+        self.assertEqual(self.server.requests['domainLock'], 2)
+
+        results = self.ns.ensure_private(["example.com", "example.net"])
+        self.assertEqual([results[domain].value for domain in ("example.com", "example.net")], [True, False])
+        self.assertTrue(all(result.ok for result in self.ns.ensure_auto_renew(["example.com"]).values()))
+        self.assertTrue(self.server.domains["example.com"].auto_renew)
+        self.assertTrue(self.ns.ensure_locked(["example.com"], state=False)["example.com"].value)
+        self.assertFalse(self.server.domains["example.com"].locked)
+
+    def test_set_nameservers(self):
+        self.server.add_domain("anycast.com", name_servers=["NS1.ANYCAST.NET", "NS2.ANYCAST.NET",
+                                                            "NS3.ANYCAST.NET", "NS4.ANYCAST.NET"])
+        name_servers = [f"ns{index}.anycast.net" for index in range(1, 5)]
+        self.server.fail_next(254, operation="changeNameServers")
+        results = self.ns.set_nameservers(["example.com", "anycast.com"], name_servers, max_workers=1)
+        self.assertIsInstance(results["example.com"].error, NameServerUpdateError)
+        self.assertFalse(results["anycast.com"].value)
+
+        results = self.ns.set_nameservers(["example.com", "example.net"], name_servers, rate=50)
+        self.assertTrue(all(result.value for result in results.values()))
+        self.assertEqual(self.server.domains["example.net"].name_servers, name_servers)
+
+        known_state = {"example.com": self.ns.get_domain_info("example.com")}
+        requests = self.server.requests['getDomainInfo']
+        self.assertFalse(self.ns.set_nameservers(["example.com"], name_servers, known_state)["example.com"].value)
+        self.assertEqual(self.server.requests['getDomainInfo'], requests)
+        self.assertRaises(ValueError, self.ns.set_nameservers, ["example.com"], name_servers * 4)
+
+    def test_injected_errors(self):
+        self.server.fail_next(115, operation="getAccountBalance")
+        self.assertRaises(CentralRegistryNotResponding, self.ns.get_account_balance)
+        self.server.fail_next(None, http_status=503)
+        self.assertRaises(HTTPError, self.ns.get_account_balance)
+        self.assertEqual(self.ns.get_account_balance(), 1000)
+
+    def test_invalid_key(self):
+        ns = NameSilo("wrong-token", base_url=self.server.base_url)
+        self.assertRaises(InvalidAPIKey, ns.get_account_balance)
+
+    def test_rate_limit(self):
+        self.server.rate_limiter = TokenBucket(rate=1, burst=2)
+        self.ns.get_account_balance()
+        self.ns.get_account_balance()
+        self.assertRaises(TooManyRequests, self.ns.get_account_balance)
+        self.assertEqual(self.server.requests['getAccountBalance'], 3)
+
+    def test_rejected_requests_dont_consume_rate_limit(self):
+        self.server.rate_limiter = TokenBucket(rate=10, burst=1)
+        rejected = 0
+        for _ in range(30):
+            try:
+                self.ns.get_account_balance()
+            except TooManyRequests:
+                rejected += 1
+        self.assertGreater(rejected, 0)
+
+        for _ in range(3):
+            time.sleep(0.2)
+            self.assertEqual(self.ns.get_account_balance(), 1000)
+
+    def test_json_reply_shapes(self):
+        self.server.add_domain("anycast.com", name_servers=["NS1.ANYCAST.NET", "NS2.ANYCAST.NET"])
+        _, _, body = self.server.handle("/api/getDomainInfo?version=1&type=json&key=name-silo-token"
+                                             "&domain=anycast.com")
+        reply = json.loads(body)['reply']
+        self.assertEqual(reply['code'], 300)
+        self.assertEqual(reply['nameservers'], [{"position": 1, "nameserver": "NS1.ANYCAST.NET"},
+                                                {"position": 2, "nameserver": "NS2.ANYCAST.NET"}])
+
+        _, _, body = self.server.handle("/api/listDomains?version=1&type=json&key=name-silo-token")
+        domain = json.loads(body)['reply']['domains']['domain'][0]
+        self.assertEqual(set(domain), {"domain", "created", "expires"})
+
+        _, _, body = self.server.handle("/api/checkRegisterAvailability?version=1&type=json&key=name-silo-token"
+                                        "&domains=example.com,new-domain.com")
+        reply = json.loads(body)['reply']
+        self.assertEqual(reply['available'], [{"domain": "new-domain.com", "price": 9.95, "premium": 0, "duration": 1}])
+        self.assertEqual(reply['unavailable'], ["example.com"])
+
+        ns = NameSilo("name-silo-token", base_url=self.server.base_url, response_format="json")
+        self.assertEqual(ns.check_domains(["new-domain.com"])["new-domain.com"].price, 9.95)
+        self.assertEqual(ns.get_domain_info("anycast.com").name_servers, ["NS1.ANYCAST.NET", "NS2.ANYCAST.NET"])
+        ns.close()
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNameSiloServer(token="name-silo-token", domains=["example.com", "example.net"]).start()
+        self.events = []
+        self.ns = NameSilo("name-silo-token", base_url=self.server.base_url, observers=[self.events.append])
+
+    def tearDown(self):
+        self.ns.close()
+        self.server.stop()
+
+    def test_scrub_url(self):
+        self.assertEqual(
+            scrub_url("getDomainInfo?version=1&type=xml&key=secret&domain=example.com"),
+            "getDomainInfo?version=1&type=xml&key=***&domain=example.com"
+        )
+        self.assertEqual(scrub_url("Max retries exceeded with url: /api/getAccountBalance?key=secret (Caused by)"),
+                         "Max retries exceeded with url: /api/getAccountBalance?key=*** (Caused by)")
+
+    def test_event(self):
+        self.ns.get_domain_info("example.com")
+        event, = self.events
+        self.assertEqual(event.operation, "getDomainInfo")
+        self.assertNotIn("name-silo-token", event.url)
+        self.assertEqual(event.code, 300)
+        self.assertEqual(event.retries, 0)
+        self.assertIsNone(event.error)
+        self.assertGreater(event.response_size, 0)
+        self.assertGreater(event.connect, 0)
+        self.assertGreater(event.parse, 0)
+        self.assertGreater(event.convert, 0)
+        self.assertGreaterEqual(event.total, event.connect + event.transfer + event.parse + event.convert)
+
+    def test_error_and_retries(self):
+        ns = NameSilo("name-silo-token", base_url=self.server.base_url, observers=[self.events.append],
+                      retry_policy=RetryPolicy(max_retries=1, backoff=0))
+        self.server.fail_next(115, operation="getAccountBalance", times=2)
+        self.assertRaises(CentralRegistryNotResponding, ns.get_account_balance)
+        event, = self.events
+        self.assertEqual(event.code, 115)
+        self.assertEqual(event.retries, 1)
+        self.assertIs(event.error, CentralRegistryNotResponding)
+        ns.close()
+
+    def test_connection_error_scrubbed(self):
+        ns = NameSilo("name-silo-token", base_url="http://127.0.0.1:9/api/", observers=[self.events.append],
+                      retry_policy=RetryPolicy(max_retries=0))
+        with self.assertRaises(Exception) as context:
+            ns.get_account_balance()
+        self.assertIn("name-silo-token", str(context.exception))
+        event, = self.events
+        self.assertIs(event.error, type(context.exception))
+        self.assertNotIn("name-silo-token", event.error_message)
+        self.assertIn("key=***", event.error_message)
+        ns.close()
+
+    def test_concurrent_calls(self):
+        self.ns.check_domains([f"domain-{index}.com" for index in range(5)], batch_size=2)
+        self.assertEqual([event.operation for event in self.events], ["checkRegisterAvailability"] * 3)
+        self.assertTrue(all(event.code == 300 for event in self.events))
+
+    def test_cached(self):
+        ns = NameSilo("name-silo-token", base_url=self.server.base_url, observers=[self.events.append],
+                      response_cache=ResponseCache())
+        ns.get_domain_info("example.com")
+        ns.get_domain_info("example.com")
+        self.assertEqual([event.cached for event in self.events], [False, True])
+        self.assertEqual(self.events[1].code, 300)
+        ns.close()
+
+    def test_observer_error_ignored(self):
+        self.ns.add_observer(mock.Mock(side_effect=RuntimeError))
+        self.assertEqual(self.ns.get_account_balance(), 1000)
+
+    def test_histogram(self):
+        histogram = HistogramObserver(buckets=(0.5, 10))
+        self.ns.add_observer(histogram)
+        self.ns.get_account_balance()
+        self.ns.get_account_balance()
+        self.server.fail_next(115, operation="getAccountBalance")
+        self.assertRaises(CentralRegistryNotResponding, self.ns.get_account_balance)
+
+        metrics = histogram.to_prometheus()
+        self.assertIn("# TYPE namesilo_call_duration_seconds histogram", metrics)
+        self.assertIn(
+            'namesilo_call_duration_seconds_bucket{operation="getAccountBalance",phase="total",le="+Inf"} 3',
+            metrics
+        )
+        self.assertIn(
+            'namesilo_call_duration_seconds_count{operation="getAccountBalance",phase="parse"} 3', metrics
+        )
+        self.assertIn('namesilo_calls_total{operation="getAccountBalance",code="300"} 2', metrics)
+        self.assertIn('namesilo_calls_total{operation="getAccountBalance",code="115"} 1', metrics)
+
+
+class InventoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNameSiloServer(token="name-silo-token").start()
+        today = datetime.date.today()
+        self.server.add_domain("first.com", expires=today + datetime.timedelta(days=10))
+        self.server.add_domain("second.com", expires=today + datetime.timedelta(days=100), locked=True,
+                               name_servers=["NS1.ANYCAST.NET", "NS2.ANYCAST.NET"])
+        self.server.add_domain("third.com", expires=today + datetime.timedelta(days=20),
+                               name_servers=["NS1.ANYCAST.NET", "NS9.OTHER.NET"])
+        self.ns = NameSilo("name-silo-token", base_url=self.server.base_url)
+        self.directory = tempfile.TemporaryDirectory()
+        self.inventory = Inventory(self.ns, os.path.join(self.directory.name, "inventory.db"), max_age=3600)
+
+    def tearDown(self):
+        self.inventory.close()
+        self.directory.cleanup()
+        self.ns.close()
+        self.server.stop()
+
+    def test_refresh(self):
+        result = self.inventory.refresh()
+        self.assertEqual(sorted(result.fetched), ["first.com", "second.com", "third.com"])
+        self.assertEqual(len(self.inventory), 3)
+        self.assertEqual(self.server.requests['getDomainInfo'], 3)
+
+        self.server.add_domain("fourth.com")
+        del self.server.domains["first.com"]
+        result = self.inventory.refresh()
+        self.assertEqual(result.fetched, ["fourth.com"])
+        self.assertEqual(result.removed, ["first.com"])
+        self.assertEqual(result.unchanged, 2)
+        self.assertEqual(self.server.requests['getDomainInfo'], 4)
+
+        self.assertEqual(len(self.inventory.refresh(max_age=0).fetched), 3)
+
+    def test_failed_domain(self):
+        self.server.fail_next(261, operation="getDomainInfo")
+        result = self.inventory.refresh()
+        self.assertEqual(len(result.failed), 1)
+        self.assertEqual(len(self.inventory.refresh().fetched), 1)
+
+    def test_queries(self):
+        self.inventory.refresh()
+        self.assertEqual(self.inventory.expiring_within(30), ["first.com", "third.com"])
+        self.assertEqual(self.inventory.using_nameservers("ns1.anycast.net"), ["second.com", "third.com"])
+        self.assertEqual(
+            self.inventory.using_nameservers("ns1.anycast.net", "ns2.anycast.net", match_all=True), ["second.com"]
+        )
+        state = self.inventory.domains(["second.com"])["second.com"]
+        self.assertTrue(state.locked)
+        self.assertEqual(state.name_servers, ["ns1.anycast.net", "ns2.anycast.net"])
+
+    def test_ensure_with_inventory(self):
+        self.inventory.refresh()
+        results = self.ns.ensure_locked(["first.com", "second.com", "third.com"], known_state=self.inventory)
+        self.assertEqual({domain: result.value for domain, result in results.items()},
+                         {"first.com": True, "second.com": False, "third.com": True})
+        self.assertEqual(self.server.requests['domainLock'], 2)
+
+    def test_persisted(self):
+        self.inventory.refresh()
+        with Inventory(self.ns, os.path.join(self.directory.name, "inventory.db")) as inventory:
+            self.assertEqual(len(inventory), 3)
+            self.assertEqual(inventory.stale(), [])
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        KeepAliveHandler.connections += 1
+        super().setup()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        body = b"<namesilo><reply><code>300</code><detail>success</detail></reply></namesilo>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RenewalPlannerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+        self.server = FakeNameSiloServer(token="name-silo-token", balance=50.0).start()
+        for name, days in (("first.com", 5), ("second.io", 40), ("third.net", 20), ("later.com", 200),
+                           ("expired.org", -3)):
+            self.server.add_domain(name, expires=self.today + datetime.timedelta(days=days))
+        self.ns = NameSilo("name-silo-token", base_url=self.server.base_url)
+        self.planner = RenewalPlanner(self.ns, window_days=30)
+
+    def tearDown(self):
+        self.ns.close()
+        self.server.stop()
+
+    def test_plan(self):
+        plan = self.planner.plan(within_days=90)
+        self.assertEqual([[item.domain for item in group.items] for group in plan.groups],
+                         [["expired.org", "first.com", "third.net"], ["second.io"]])
+        self.assertEqual(plan.groups[1].start, self.today + datetime.timedelta(days=30))
+        self.assertEqual(plan.groups[1].total, 39.99)
+        self.assertAlmostEqual(plan.total, 10.79 + 9.95 + 11.79 + 39.99, places=2)
+        self.assertEqual(plan.balance, 50.0)
+        self.assertFalse(plan.affordable)
+        self.assertEqual(self.server.requests['getDomainInfo'], 0)
+        self.assertEqual(self.server.requests['getAccountBalance'], 1)
+
+        plan = self.planner.plan(within_days=30, years=2, domains=["First.com"])
+        self.assertEqual([(item.domain, item.price) for item in plan.items], [("first.com", 19.9)])
+
+    def test_renew(self):
+        plan = self.planner.plan(within_days=90)
+        self.assertRaises(InsufficientFunds, self.planner.renew, plan)
+        results = self.planner.renew(plan, allow_partial=True, max_workers=2)
+        self.assertEqual(sorted(domain for domain, result in results.items() if result.ok),
+                         ["expired.org", "first.com", "third.net"])
+        self.assertIsInstance(results["second.io"].error, OperationSkipped)
+        self.assertGreater(self.server.domains["first.com"].expires, self.today + datetime.timedelta(days=360))
+        self.assertAlmostEqual(self.server.balance, 50.0 - 10.79 - 9.95 - 11.79, places=2)
+        self.assertEqual(self.server.requests['renewDomain'], 3)
+
+    def test_partial_renewal_stops_at_first_unaffordable(self):
+        self.server.balance = 45.0
+        self.server.add_domain("soon.io", expires=self.today + datetime.timedelta(days=1))
+        plan = self.planner.plan(within_days=90)
+        self.assertEqual([item.domain for item in plan.items][:3], ["expired.org", "soon.io", "first.com"])
+        results = self.planner.renew(plan, allow_partial=True)
+        self.assertEqual([domain for domain, result in results.items() if result.ok], ["expired.org"])
+        for domain in ("soon.io", "first.com", "third.net", "second.io"):
+            self.assertIsInstance(results[domain].error, OperationSkipped)
+        self.assertEqual(self.server.requests['renewDomain'], 1)
+
+    def test_find_tld_price(self):
+        prices = {"uk": TldPrice("uk", 5.0, 5.0, 5.0), "co.uk": TldPrice("co.uk", 9.0, 9.0, 9.0)}
+        self.assertEqual(find_tld_price(prices, "example.co.uk").tld, "co.uk")
+        self.assertEqual(find_tld_price(prices, "example.uk").tld, "uk")
+        self.assertIsNone(find_tld_price(prices, "example.com"))
+
+
+class BulkRegistrarTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNameSiloServer(token="name-silo-token", domains=["taken.com"], balance=30.0).start()
+        self.ns = NameSilo("name-silo-token", base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.ns.close()
+        self.server.stop()
+
+    def test_register_within_budget(self):
+        registrar = BulkRegistrar(self.ns)
+        domains = ["taken.com", "first.com", "second.com", "third.com", "fourth.com", "invalid.zzz"]
+        results = registrar.register(domains, max_workers=1)
+        registered = sorted(domain for domain, result in results.items() if result.ok)
+        self.assertEqual(registered, ["first.com", "second.com", "third.com"])
+        self.assertIsInstance(results["taken.com"].error, DomainProcessingError)
+        self.assertIsInstance(results["fourth.com"].error, InsufficientFunds)
+        self.assertIsInstance(results["invalid.zzz"].error, ValueError)
+        self.assertEqual(self.server.requests['getAccountBalance'], 1)
+        self.assertEqual(self.server.requests['registerDomain'], 4)
+        self.assertAlmostEqual(self.server.balance, 30.0 - 3 * 9.95, places=2)
+        self.assertAlmostEqual(registrar.ledger.spent, 3 * 9.95, places=2)
+        self.assertAlmostEqual(registrar.ledger.reserved, 0.0, places=6)
+
+    def test_top_up(self):
+        registrar = BulkRegistrar(self.ns, payment_id=1, top_up_below=5.0, top_up_amount=20.0)
+        results = registrar.register([f"domain-{index}.com" for index in range(6)], max_workers=3)
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertEqual(self.server.requests['addAccountFunds'], 2)
+        self.assertAlmostEqual(self.server.balance, 30.0 + 2 * 20.0 - 6 * 9.95, places=2)
+        self.assertAlmostEqual(registrar.ledger.available, self.server.balance, places=2)
+        self.assertRaises(ValueError, BulkRegistrar, self.ns, top_up_amount=20.0)
+
+    def test_ledger(self):
+        ledger = BudgetLedger(10.0)
+        self.assertTrue(ledger.reserve(6.0))
+        self.assertFalse(ledger.reserve(6.0))
+        ledger.release(6.0)
+        self.assertTrue(ledger.reserve(10.0))
+        ledger.commit(10.0)
+        self.assertEqual((ledger.available, ledger.spent), (0.0, 10.0))
+
+
+class NameSpinnerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeNameSiloServer(token="name-silo-token", domains=["cloud.com", "getcloud.io"]).start()
+        self.ns = NameSilo("name-silo-token", base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.ns.close()
+        self.server.stop()
+
+    def test_spin_candidates(self):
+        candidates = spin_candidates(["Cloud", "dev tools", "cloud"], ["com", ".io"], prefixes=["get"],
+                                     separators=("", "-"))
+        self.assertEqual(next(candidates), "cloud.com")
+        self.assertEqual(list(candidates), [
+            "cloud.io", "getcloud.com", "getcloud.io", "get-cloud.com", "get-cloud.io",
+            "dev-tools.com", "dev-tools.io", "getdev-tools.com", "getdev-tools.io",
+            "get-dev-tools.com", "get-dev-tools.io",
+        ])
+
+    def test_search(self):
+        spinner = NameSpinner(self.ns, batch_size=3, max_workers=2)
+        found = list(spinner.search(["cloud", "sky"], prefixes=["get"], tlds=["com", "io"]))
+        self.assertEqual(sorted(result.domain for result in found),
+                         ["cloud.io", "getcloud.com", "getsky.com", "getsky.io", "sky.com", "sky.io"])
+        self.assertEqual({result.domain: result.price for result in found}["sky.io"], 34.99)
+        self.assertEqual(self.server.requests['checkRegisterAvailability'], 3)
+
+    def test_search_limit(self):
+        spinner = NameSpinner(self.ns, batch_size=2, max_workers=1)
+        found = list(spinner.search([f"seed{index}" for index in range(100)], tlds=["com"], limit=3))
+        self.assertEqual([result.domain for result in found], ["seed0.com", "seed1.com", "seed2.com"])
+        self.assertLessEqual(self.server.requests['checkRegisterAvailability'], 3)
+        self.assertEqual(len(list(spinner.search(["cloud"], tlds=["net", "org", "dev"]))), 3)
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(pool_size=2)
+        for _ in range(5):
+            self.assertEqual(pool.get(self.url).status_code, 200)
+        self.assertEqual(pool.stats.requests, 5)
+        self.assertEqual(pool.stats.connections, 1)
+        self.assertEqual(pool.stats.reused, 4)
+        pool.close()
+
+    def test_connections_without_keep_alive(self):
+        KeepAliveHandler.connections = 0
+        pool = ConnectionPool(pool_size=2, keep_alive=False)
+        for _ in range(5):
+            self.assertEqual(pool.get(self.url).status_code, 200)
+        self.assertEqual(KeepAliveHandler.connections, 5)
+        self.assertEqual(pool.stats.connections, 5)
+        self.assertEqual(pool.stats.reused, 0)
+        pool.close()
+
+    def test_connections_shared_between_threads(self):
+        pool = ConnectionPool(pool_size=4)
+        threads = [
+            threading.Thread(target=lambda: [pool.get(self.url) for _ in range(10)])
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(pool.stats.requests, 40)
+        self.assertLessEqual(pool.stats.connections, 4)
+        pool.close()
+
+    def test_warm_up(self):
+        pool = ConnectionPool(pool_size=2)
+        pool.warm_up(self.url, 2)
+        self.assertEqual(pool.stats.connections, 2)
+        pool.get(self.url)
+        pool.get(self.url)
+        self.assertEqual(pool.stats.connections, 2)
+        self.assertEqual(pool.stats.reused, 2)
+        pool.close()
+
+    def test_namesilo_uses_pool(self):
+        ns = NameSilo("name-silo-token", sandbox=True)
+        ns._base_url = self.url
+        ns._process_data("getAccountBalance?version=1&type=xml&key=token")
+        ns._process_data("getAccountBalance?version=1&type=xml&key=token")
+        self.assertEqual(ns.pool_stats.reused, 1)
+        ns.close()
+
+
+class FakeAsyncPool:
+    def __init__(self, body: bytes, delay: float = 0):
+        self.body = body
+        self.delay = delay
+        self.urls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get(self, url):
+        self.urls.append(url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return AsyncResponse(200, self.body)
+
+    @contextlib.asynccontextmanager
+    async def stream(self, url):
+        async def chunks():
+            for index in range(0, len(self.body), 7):
+                yield self.body[index:index + 7]
+
+        self.urls.append(url)
+        yield AsyncResponse(200, chunks())
+
+
+class AsyncNameSiloTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.ns = AsyncNameSilo("name-silo-token", sandbox=True, max_concurrency=5)
+
+    @mock.patch('namesilo.core.AsyncNameSilo._process_data', new_callable=mock.AsyncMock)
+    async def test_check_domain(self, mock_process_data):
+        mocked_data['namesilo']['reply']['available'] = []
+        mock_process_data.return_value = mocked_data
+        self.assertTrue(await self.ns.check_domain("some-domain.com"))
+        mock_process_data.assert_awaited_once_with(
+            "checkRegisterAvailability?version=1&type=xml&key=name-silo-token&"
+            "domains=some-domain.com"
+        )
+
+    @mock.patch('namesilo.core.AsyncNameSilo._process_data', new_callable=mock.AsyncMock)
+    async def test_get_domain_info(self, mock_process_data):
+        mocked_data['namesilo']['reply']['code'] = 300
+        mock_process_data.return_value = mocked_data
+        self.assertIsInstance(await self.ns.get_domain_info("some-domain.com"), DomainInfo)
+
+    async def test_error_code_raises(self):
+        self.ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>261</code><detail>error</detail></reply></namesilo>"
+        )
+        with self.assertRaises(DomainProcessingError):
+            await self.ns.register_domain("some-domain.com")
+        self.assertEqual(
+            self.ns._pool.urls,
+            ["http://sandbox.namesilo.com/api/registerDomain?version=1&type=xml&"
+             "key=name-silo-token&domain=some-domain.com&years=1&private=0&auto_renew=0"]
+        )
+
+    async def test_check_domains(self):
+        self.ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>300</code><detail>success</detail><available>"
+            b"<domain price=\"9.95\" premium=\"0\">first.com</domain></available>"
+            b"</reply></namesilo>"
+        )
+        availability = await self.ns.check_domains(
+            [f"domain-{index}.com" for index in range(10)], batch_size=2
+        )
+        self.assertEqual(len(self.ns._pool.urls), 5)
+        self.assertEqual(availability["first.com"].price, 9.95)
+
+    async def test_get_domains_info(self):
+        mocked_data['namesilo']['reply']['code'] = 300
+        self.ns._pool = FakeAsyncPool(b"", delay=0.01)
+        with mock.patch.object(self.ns, '_parse_response', return_value=mocked_data):
+            results = [result async for result in self.ns.get_domains_info(
+                [f"domain-{index}.com" for index in range(20)], max_workers=3
+            )]
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(isinstance(result.value, DomainInfo) for result in results))
+        self.assertLessEqual(self.ns._pool.max_in_flight, 3)
+
+    async def test_get_domains_info_lazy(self):
+        mocked_data['namesilo']['reply']['code'] = 300
+        self.ns._pool = FakeAsyncPool(b"")
+        with mock.patch.object(self.ns, '_parse_response', return_value=mocked_data):
+            results = [result async for result in self.ns.get_domains_info(["a.com", "b.com"], lazy=True)]
+        self.assertTrue(all(isinstance(result.value, LazyDomainInfo) for result in results))
+
+    async def test_iter_domains(self):
+        self.ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>300</code><detail>success</detail><domains>"
+            b"<domain>first.com</domain><domain>second.com</domain></domains></reply></namesilo>"
+        )
+        self.assertEqual([domain async for domain in self.ns.iter_domains()], ["first.com", "second.com"])
+
+    async def test_coalesce_reads(self):
+        ns = AsyncNameSilo("name-silo-token", coalesce_reads=True)
+        ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>300</code><detail>success</detail>"
+            b"<balance>10</balance></reply></namesilo>", delay=0.01
+        )
+        balances = await asyncio.gather(*[ns.get_account_balance() for _ in range(10)])
+        self.assertEqual(balances, [10] * 10)
+        self.assertEqual(len(ns._pool.urls), 1)
+        self.assertEqual(ns.collapsed_calls, 9)
+
+    async def test_bounded_concurrency(self):
+        self.ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>300</code><detail>success</detail>"
+            b"<balance>1,250.50</balance></reply></namesilo>", delay=0.01
+        )
+        balances = await asyncio.gather(*[self.ns.get_account_balance() for _ in range(50)])
+        self.assertEqual(balances, [1250.5] * 50)
+        self.assertEqual(self.ns._pool.max_in_flight, 5)
+
+    async def test_ensure_locked(self):
+        self.ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>252</code><detail>Domain is already locked</detail></reply></namesilo>"
+        )
+        known_state = {"first.com": mock.Mock(locked=True)}
+        results = await self.ns.ensure_locked(["first.com", "second.com"], known_state=known_state)
+        self.assertEqual([result.value for result in results.values()], [False, False])
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertEqual(len(self.ns._pool.urls), 1)
+
+    async def test_set_nameservers(self):
+        self.ns._pool = FakeAsyncPool(b"<namesilo><reply><code>300</code><detail>success</detail></reply></namesilo>")
+        known_state = {"first.com": mock.Mock(name_servers=["NS1.A.NET", "NS2.A.NET"])}
+        results = await self.ns.set_nameservers(["first.com", "second.com"], ["ns1.a.net", "ns2.b.net", "ns3.c.net"],
+                                                known_state={**known_state, "second.com": known_state["first.com"]})
+        self.assertEqual([result.value for result in results.values()], [True, True])
+        self.assertIn("&ns1=ns1.a.net&ns2=ns2.b.net&ns3=ns3.c.net", self.ns._pool.urls[0])
+
+    async def test_sync_context_manager_rejected(self):
+        with self.assertRaises(TypeError):
+            with self.ns:
+                pass
+        async with self.ns as ns:
+            self.assertIs(ns, self.ns)
+
+    async def test_observers(self):
+        events = []
+        ns = AsyncNameSilo("name-silo-token", coalesce_reads=True, observers=[events.append])
+        ns._pool = FakeAsyncPool(
+            b"<namesilo><reply><code>300</code><detail>success</detail>"
+            b"<balance>10</balance></reply></namesilo>", delay=0.01
+        )
+        await asyncio.gather(*[ns.get_account_balance() for _ in range(3)])
+        self.assertEqual([event.operation for event in events], ["getAccountBalance"] * 3)
+        self.assertEqual([event.code for event in events], [300] * 3)
+        self.assertEqual(sum(event.response_size > 0 for event in events), 1)
+        self.assertTrue(all("name-silo-token" not in event.url for event in events))
+
+
 if __name__ == '__main__':
     unittest.main()
 